@@ -5,18 +5,21 @@ Demonstrates advanced usage and analysis capabilities
 
 import pandas as pd
 import numpy as np
+from typing import Tuple
 from football_simulation import run_match, FootballModel
 from utils_logger import EventLogger
+from pitch import DEFAULT_GRID
+from parameter_sweep import grid_design, run_sweep, summarize_sweep
 
 
-def analyze_match_performance():
-    """Run a match and perform detailed performance analysis"""
+def analyze_match_performance(grid: Tuple[int, int] = DEFAULT_GRID):
+    """Run a match and perform detailed performance analysis on a pitch of grid zones"""
     print("="*60)
     print("ADVANCED FOOTBALL SIMULATION ANALYSIS")
     print("="*60)
     
     # Run a medium-length match
-    model = run_match(duration=30, seed=999, export_logs=False)
+    model = run_match(duration=30, seed=999, export_logs=False, grid=grid)
     
     # Convert events to DataFrame for analysis
     df = pd.DataFrame(model.event_logger.events)
@@ -26,22 +29,12 @@ def analyze_match_performance():
     # 1. Zone-based heat map analysis
     print("\n1. Zone Activity Heatmap:")
     if not df.empty:
-        zone_activity = df['zone'].value_counts()
-        
-        # Create a grid representation
-        zones = ['A1', 'A2', 'A3', 'A4', 'A5',
-                'B1', 'B2', 'B3', 'B4', 'B5', 
-                'C1', 'C2', 'C3', 'C4', 'C5',
-                'D1', 'D2', 'D3', 'D4', 'D5']
-        
-        print("   1    2    3    4    5")
-        for row in ['A', 'B', 'C', 'D']:
-            line = f"{row} "
-            for col in ['1', '2', '3', '4', '5']:
-                zone = row + col
-                count = zone_activity.get(zone, 0)
-                line += f"{count:4d} "
-            print(line)
+        # Grid shaped like the model's pitch
+        heatmap = model.pitch.heatmap(df['zone'])
+        width = max(4, len(str(heatmap.values.max())))
+        print("  " + " ".join(f"{col:>{width}}" for col in heatmap.columns))
+        for row, counts in heatmap.iterrows():
+            print(f"{row} " + " ".join(f"{count:{width}d}" for count in counts))
     
     # 2. Player performance analysis
     print(f"\n2. Top Performers:")
@@ -231,6 +224,14 @@ def compare_formations_simulation():
     print(f"\nHome team won {sum(1 for r in results if r['home_score'] > r['away_score'])} matches")
     print(f"Away team won {sum(1 for r in results if r['away_score'] > r['home_score'])} matches")
     print(f"Draws: {sum(1 for r in results if r['home_score'] == r['away_score'])} matches")
+    
+    # Home formations against the default 4-3-3, on the same seeds
+    print("\nHome formation comparison (10-minute matches, common seeds):")
+    design = grid_design({'home.formation': ['4-4-2', '4-3-3', '3-5-2', '5-3-2'], 'match_duration': [10]})
+    sweep = run_sweep(design, replicates=5, workers=1, verbose=False)
+    summary = summarize_sweep(sweep)
+    print(summary[['home.formation', 'matches', 'home_goals', 'away_goals', 'home_win', 'draw', 'away_win']]
+          .round(2).to_string(index=False))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,368 @@
+"""
+Archive Query Engine
+Bitmap and sequence indexes for filtering archived match events
+"""
+
+import fnmatch
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from match_archive import MatchArchive
+
+
+INDEX_FILE = 'query_index.npz'
+
+# Columns with a bitmap per distinct value
+INDEXED_COLUMNS = ['team', 'action', 'zone', 'outcome', 'pressure', 'team_status']
+
+# Off-ball events interleave with the ball carrier's actions within a step,
+# so they are left out of the action sequences by default
+SEQUENCE_SKIPPED_ACTIONS = ('SupportRequest',)
+
+
+@dataclass
+class QueryResult:
+    """Matching events or possessions plus how long the query took"""
+    count: int
+    elapsed_ms: float
+    rows: Dict[str, List[Any]] = field(default_factory=dict)
+    possessions: List[Tuple[int, str]] = field(default_factory=list)
+
+    def __str__(self):
+        return f"{self.count} matches in {self.elapsed_ms:.2f} ms"
+
+
+class ArchiveQueryEngine:
+    """
+    Query engine over a MatchArchive
+
+    The engine keeps one integer code per row for each indexed column, and
+    derives a packed bitmap per distinct value. A filter is then a handful
+    of bitwise ANDs/ORs. An inverted index maps each consecutive action pair
+    to the possessions that contain it, and sequence queries intersect those
+    posting lists; off-ball actions listed in sequence_skip are left out of
+    the sequences. Only chunks that hold a match are decoded from the
+    archive. The codes are persisted next to the archive and extended
+    incrementally as new matches are appended.
+    """
+
+    def __init__(self, archive: MatchArchive, persist: bool = True,
+                 sequence_skip: Tuple[str, ...] = SEQUENCE_SKIPPED_ACTIONS):
+        self.archive = archive
+        self.persist = persist
+        self.sequence_skip = tuple(sequence_skip)
+
+        self.vocab: Dict[str, List[Any]] = {col: [] for col in INDEXED_COLUMNS}
+        self._lookup: Dict[str, Dict[Any, int]] = {col: {} for col in INDEXED_COLUMNS}
+        self.codes: Dict[str, np.ndarray] = {col: np.zeros(0, dtype=np.uint16) for col in INDEXED_COLUMNS}
+        self.row_possession = np.zeros(0, dtype=np.int64)
+        self.entry_rows = np.zeros(1, dtype=np.int64)  # cumulative row offset per entry
+        self.possession_keys: List[Tuple[int, str]] = []
+        self.indexed_entries = 0
+
+        self._bitmaps: Dict[str, Dict[int, np.ndarray]] = {}
+        self._sequence_index: Optional[Dict[int, np.ndarray]] = None
+        self._sorted_actions = np.zeros(0, dtype=np.uint16)
+        self._possession_starts = np.zeros(1, dtype=np.int64)
+
+        if persist:
+            self._load()
+        self.update()
+
+    @property
+    def total_rows(self) -> int:
+        return int(self.entry_rows[-1])
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def update(self):
+        """Index matches appended to the archive since the last update"""
+        self.archive.refresh()
+        new_entries = range(self.indexed_entries, len(self.archive))
+        if not new_entries:
+            if not self._bitmaps:
+                self._build_bitmaps()
+            return
+
+        new_codes = {col: [] for col in INDEXED_COLUMNS}
+        new_possessions = []
+        offsets = [self.total_rows]
+
+        for entry_number in new_entries:
+            entry = self.archive.entries[entry_number]
+            for chunk in entry['chunks']:
+                for col in INDEXED_COLUMNS:
+                    new_codes[col].append(self._chunk_codes(entry_number, chunk, col))
+
+            row_possession = np.empty(entry['rows'], dtype=np.int64)
+            for pid, ranges in entry['possessions'].items():
+                number = len(self.possession_keys)
+                self.possession_keys.append((entry_number, pid))
+                for start, stop in ranges:
+                    row_possession[start:stop] = number
+            new_possessions.append(row_possession)
+            offsets.append(offsets[-1] + entry['rows'])
+
+        for col in INDEXED_COLUMNS:
+            self.codes[col] = np.concatenate([self.codes[col]] + new_codes[col]).astype(np.uint16)
+        self.row_possession = np.concatenate([self.row_possession] + new_possessions)
+        self.entry_rows = np.concatenate([self.entry_rows, np.asarray(offsets[1:], dtype=np.int64)])
+        self.indexed_entries = len(self.archive)
+
+        self._build_bitmaps()
+        self._sequence_index = None
+        if self.persist:
+            self._save()
+
+    def _chunk_codes(self, entry: int, chunk: Dict[str, Any], column: str) -> np.ndarray:
+        """Decode one chunk column and translate it to engine-wide codes"""
+        decoded = self.archive.read_chunk_column(entry, chunk, column, as_codes=True)
+        if isinstance(decoded, tuple):
+            local_codes, local_vocab = decoded
+        else:
+            local_vocab = sorted(set(decoded))
+            position = {value: i for i, value in enumerate(local_vocab)}
+            local_codes = np.asarray([position[value] for value in decoded], dtype=np.int64)
+
+        lookup = self._lookup[column]
+        translate = np.empty(len(local_vocab), dtype=np.uint16)
+        for i, value in enumerate(local_vocab):
+            if value not in lookup:
+                lookup[value] = len(self.vocab[column])
+                self.vocab[column].append(value)
+            translate[i] = lookup[value]
+        return translate[local_codes]
+
+    def _build_bitmaps(self):
+        self._bitmaps = {
+            col: {code: np.packbits(self.codes[col] == code) for code in range(len(self.vocab[col]))}
+            for col in INDEXED_COLUMNS
+        }
+
+    def _build_sequence_index(self):
+        """Inverted index from consecutive action pairs to possessions"""
+        skipped = [self._lookup['action'][a] for a in self.sequence_skip if a in self._lookup['action']]
+        kept = np.flatnonzero(~np.isin(self.codes['action'], skipped))
+        order = kept[np.lexsort((kept, self.row_possession[kept]))]
+        possessions = self.row_possession[order]
+        actions = self.codes['action'][order].astype(np.int64)
+
+        counts = np.bincount(possessions, minlength=len(self.possession_keys))
+        self._possession_starts = np.concatenate([[0], np.cumsum(counts)])
+        self._sorted_actions = actions
+
+        same = possessions[1:] == possessions[:-1]
+        pair_keys = actions[:-1][same] * len(self.vocab['action']) + actions[1:][same]
+        pair_possessions = possessions[1:][same]
+
+        self._sequence_index = {}
+        if len(pair_keys):
+            order = np.lexsort((pair_possessions, pair_keys))
+            keys, possessions = pair_keys[order], pair_possessions[order]
+            boundaries = np.flatnonzero(np.diff(keys)) + 1
+            for key_group, poss_group in zip(np.split(keys, boundaries), np.split(possessions, boundaries)):
+                self._sequence_index[int(key_group[0])] = np.unique(poss_group)
+
+    def _save(self):
+        path = os.path.join(self.archive.path, INDEX_FILE)
+        tmp_path = path + '.tmp.npz'
+        np.savez_compressed(
+            tmp_path,
+            meta=np.frombuffer(json.dumps({
+                'indexed_entries': self.indexed_entries,
+                'vocab': self.vocab,
+                'possession_keys': self.possession_keys,
+            }).encode('utf-8'), dtype=np.uint8),
+            row_possession=self.row_possession,
+            entry_rows=self.entry_rows,
+            **{f'codes_{col}': self.codes[col] for col in INDEXED_COLUMNS}
+        )
+        os.replace(tmp_path, path)
+
+    def _load(self):
+        path = os.path.join(self.archive.path, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            if meta['indexed_entries'] > len(self.archive):
+                return  # Index belongs to a different archive; rebuild it
+            self.indexed_entries = meta['indexed_entries']
+            self.vocab = meta['vocab']
+            self._lookup = {col: {v: i for i, v in enumerate(vals)} for col, vals in self.vocab.items()}
+            self.possession_keys = [tuple(key) for key in meta['possession_keys']]
+            self.row_possession = data['row_possession']
+            self.entry_rows = data['entry_rows']
+            self.codes = {col: data[f'codes_{col}'] for col in INDEXED_COLUMNS}
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _value_codes(self, column: str, value: Any) -> List[int]:
+        """Codes matching a filter value: a scalar, a list, or a glob pattern"""
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        codes = []
+        for item in values:
+            if isinstance(item, str) and any(ch in item for ch in '*?['):
+                codes.extend(i for i, v in enumerate(self.vocab[column])
+                             if isinstance(v, str) and fnmatch.fnmatchcase(v, item))
+            elif item in self._lookup[column]:
+                codes.append(self._lookup[column][item])
+        return codes
+
+    def _filter_bitmap(self, filters: Dict[str, Any]) -> np.ndarray:
+        """AND together the OR of the value bitmaps of each filtered column"""
+        unknown = [col for col in filters if col not in INDEXED_COLUMNS]
+        if unknown:
+            raise ValueError(f"Columns are not indexed: {unknown}")
+
+        result = np.packbits(np.ones(self.total_rows, dtype=bool))
+        for column, value in filters.items():
+            column_bitmap = np.zeros_like(result)
+            for code in self._value_codes(column, value):
+                column_bitmap |= self._bitmaps[column][code]
+            result &= column_bitmap
+        return result
+
+    def _rows(self, bitmap: np.ndarray) -> np.ndarray:
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.total_rows))
+
+    def count(self, **filters) -> QueryResult:
+        """Count events matching the filters without touching the archive"""
+        start = time.perf_counter()
+        count = int(np.unpackbits(self._filter_bitmap(filters), count=self.total_rows).sum())
+        return QueryResult(count, (time.perf_counter() - start) * 1000)
+
+    def events(self, columns: Optional[List[str]] = None, limit: Optional[int] = None,
+               **filters) -> QueryResult:
+        """
+        Fetch events matching the filters
+
+        Example: Away shots from the B row under pressure while trailing:
+            engine.events(team='Away', action='Shot', zone='B*',
+                          pressure=1, team_status='Home Leading')
+        """
+        start = time.perf_counter()
+        rows = self._rows(self._filter_bitmap(filters))
+        if limit is not None:
+            rows = rows[:limit]
+        result = QueryResult(len(rows), 0.0, rows=self.fetch_rows(rows, columns))
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def possessions(self, sequence: Optional[List[str]] = None, fetch: bool = False,
+                    columns: Optional[List[str]] = None, **filters) -> QueryResult:
+        """
+        Find possessions containing an action sequence and/or a matching event
+
+        Args:
+            sequence: Consecutive actions that must appear, e.g. ['Dribble', 'Shot']
+            fetch: Also return the events of the matching possessions
+            columns: Columns to return when fetching
+            **filters: Event filters; a possession matches if any event does
+        """
+        start = time.perf_counter()
+        candidates: Optional[np.ndarray] = None
+
+        if sequence:
+            candidates = self._sequence_possessions(sequence)
+        if filters:
+            matched = np.unique(self.row_possession[self._rows(self._filter_bitmap(filters))])
+            candidates = matched if candidates is None else np.intersect1d(candidates, matched)
+        if candidates is None:
+            candidates = np.arange(len(self.possession_keys))
+
+        keys = [self.possession_keys[number] for number in candidates.tolist()]
+        result = QueryResult(len(keys), 0.0, possessions=keys)
+        if fetch:
+            rows = np.flatnonzero(np.isin(self.row_possession, candidates))
+            result.rows = self.fetch_rows(rows, columns)
+        result.elapsed_ms = (time.perf_counter() - start) * 1000
+        return result
+
+    def _sequence_possessions(self, sequence: List[str]) -> np.ndarray:
+        codes = [self._lookup['action'].get(action) for action in sequence]
+        if any(code is None for code in codes):
+            return np.zeros(0, dtype=np.int64)
+        if self._sequence_index is None:
+            self._build_sequence_index()
+
+        if len(codes) == 1:
+            return np.unique(self.row_possession[self.codes['action'] == codes[0]])
+        if any(action in self.sequence_skip for action in sequence):
+            raise ValueError(f"Sequences cannot contain skipped actions {self.sequence_skip}")
+
+        # Intersect the posting lists of every consecutive pair
+        width = len(self.vocab['action'])
+        candidates = None
+        for a, b in zip(codes, codes[1:]):
+            postings = self._sequence_index.get(a * width + b, np.zeros(0, dtype=np.int64))
+            candidates = postings if candidates is None else np.intersect1d(candidates, postings)
+        if len(codes) == 2:
+            return candidates
+
+        # Longer sequences: confirm the pairs occur contiguously
+        target = np.asarray(codes)
+        confirmed = []
+        for number in candidates.tolist():
+            actions = self._sorted_actions[self._possession_starts[number]:self._possession_starts[number + 1]]
+            windows = np.lib.stride_tricks.sliding_window_view(actions, len(target))
+            if (windows == target).all(axis=1).any():
+                confirmed.append(number)
+        return np.asarray(confirmed, dtype=np.int64)
+
+    def fetch_rows(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Decode the given engine-wide rows, touching only chunks that contain them"""
+        rows = np.asarray(rows, dtype=np.int64)
+        entries = np.searchsorted(self.entry_rows, rows, side='right') - 1
+        result: Dict[str, List[Any]] = {}
+
+        for entry in np.unique(entries).tolist():
+            local = rows[entries == entry] - self.entry_rows[entry]
+            entry_columns = self.archive._columns(entry, columns)
+            for col in entry_columns:
+                result.setdefault(col, [])
+            result.setdefault('entry', [])
+
+            for chunk in self.archive.entries[entry]['chunks']:
+                first = chunk['first_row']
+                in_chunk = local[(local >= first) & (local < first + chunk['rows'])] - first
+                if not len(in_chunk):
+                    continue
+                for col in entry_columns:
+                    values = self.archive.read_chunk_column(entry, chunk, col)
+                    result[col].extend(values[i] for i in in_chunk.tolist())
+                result['entry'].extend([entry] * len(in_chunk))
+
+        return result
+
+
+if __name__ == "__main__":
+    import tempfile
+    from football_simulation import run_match
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = MatchArchive(directory)
+        for seed in range(10):
+            run_match(duration=90, seed=seed, export_logs=False, archive=archive)
+
+        engine = ArchiveQueryEngine(archive)
+        print(f"\nIndexed {engine.total_rows} events from {len(archive)} matches")
+
+        shots = engine.events(team='Away', action='Shot', zone='B*', pressure=1,
+                              team_status='Home Leading')
+        print(f"Away shots from row B under pressure while trailing: {shots}")
+
+        sequences = engine.possessions(sequence=['Dribble', 'Pass'])
+        print(f"Possessions containing Dribble → Pass: {sequences}")
+
+        combos = engine.possessions(sequence=['Pass', 'Pass', 'Dribble'], team='Home')
+        print(f"Home possessions with Pass → Pass → Dribble: {combos}")
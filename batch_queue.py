@@ -0,0 +1,364 @@
+"""
+Sharded Batch Queue
+Crash-resumable match batches spread over processes and hosts via a shared directory
+"""
+
+import json
+import os
+import socket
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterator, Optional
+
+from football_simulation import run_match
+
+
+JOB_FILE = 'job.json'
+CLOCK_FILE = '.clock'
+STATES = ('pending', 'leased', 'done')
+RESULTS_DIR = 'results'
+
+DEFAULT_LEASE_SECONDS = 300
+
+# Leased shards are named <shard>@<worker>, so the rename that claims a
+# shard also records who holds it
+OWNER_SEPARATOR = '@'
+
+
+def _write_atomic(path: str, data: bytes):
+    """Write a file so readers see either the old or the complete new content"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class BatchQueue:
+    """
+    A job of many seeded matches, split into shards kept in a directory
+
+    Each shard is a small JSON file that moves between pending/, leased/ and
+    done/ by atomic renames, so exactly one worker wins a claim even across
+    hosts sharing the filesystem. A leased shard carries its owner in its
+    file name, so every later step on the lease (heartbeat, completion) is
+    an operation on a path only that owner uses. Its mtime is its heartbeat;
+    shards whose lease has not been renewed for lease_seconds are renamed
+    back to pending/. Match results are appended to results/<shard>.partial
+    as they finish and published as results/<shard>.jsonl when the shard
+    completes, so a re-claimed shard skips matches already played.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, JOB_FILE)) as f:
+            self.job = json.load(f)
+
+    @classmethod
+    def create(cls, directory: str, matches: int, shard_size: int = 100, duration: int = 90,
+               first_seed: int = 0) -> 'BatchQueue':
+        """Lay out a new job of matches seeded first_seed .. first_seed + matches - 1"""
+        if os.path.exists(os.path.join(directory, JOB_FILE)):
+            raise FileExistsError(f"{directory} already holds a job")
+        for sub in STATES + (RESULTS_DIR,):
+            os.makedirs(os.path.join(directory, sub), exist_ok=True)
+
+        shards = 0
+        for shard, start in enumerate(range(first_seed, first_seed + matches, shard_size)):
+            spec = {'shard': shard, 'seeds': [start, min(start + shard_size, first_seed + matches)]}
+            _write_atomic(os.path.join(directory, 'pending', f"shard-{shard:06d}.json"),
+                          json.dumps(spec).encode('utf-8'))
+            shards += 1
+
+        job = {'matches': matches, 'shard_size': shard_size, 'shards': shards,
+               'duration': duration, 'first_seed': first_seed, 'created': time.time()}
+        # The job file goes last: its presence marks a fully laid out queue
+        _write_atomic(os.path.join(directory, JOB_FILE), json.dumps(job).encode('utf-8'))
+        return cls(directory)
+
+    def _path(self, state: str, name: str = '') -> str:
+        return os.path.join(self.directory, state, name)
+
+    def _names(self, state: str) -> List[str]:
+        return sorted(name for name in os.listdir(self._path(state)) if name.startswith('shard-'))
+
+    def _lease(self, name: str, worker: str) -> str:
+        """Path of a shard while leased by a worker"""
+        return self._path('leased', f"{name}{OWNER_SEPARATOR}{worker}")
+
+    def now(self) -> float:
+        """Current time according to the shared filesystem, immune to host clock skew"""
+        path = os.path.join(self.directory, CLOCK_FILE)
+        with open(path, 'a'):
+            os.utime(path)
+        return os.stat(path).st_mtime
+
+    def claim(self, worker: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Lease the next pending shard, or return None if none is left"""
+        worker = worker or worker_name()
+        for name in self._names('pending'):
+            leased = self._lease(name, worker)
+            try:
+                # A rename keeps the file's mtime, so an old pending shard would
+                # arrive in leased/ looking expired: touch it on both sides
+                os.utime(self._path('pending', name))
+                os.rename(self._path('pending', name), leased)
+                with open(leased) as f:
+                    spec = json.load(f)
+                spec['claimed'] = self.now()
+                os.utime(leased)
+            except FileNotFoundError:
+                continue  # Another worker got it first, or it was requeued under us
+            spec['worker'] = worker
+            spec['name'] = name
+            return spec
+        return None
+
+    def heartbeat(self, spec: Dict[str, Any]) -> bool:
+        """Renew a lease; False means it expired and was handed to someone else"""
+        try:
+            os.utime(self._lease(spec['name'], spec['worker']))
+            return True
+        except FileNotFoundError:
+            return False  # Requeued, and possibly re-claimed under another owner's name
+
+    def requeue_expired(self, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+        """Move shards whose lease was not renewed in time back to pending/"""
+        now = self.now()
+        requeued = 0
+        for lease in self._names('leased'):
+            name = lease.partition(OWNER_SEPARATOR)[0]
+            try:
+                if now - os.stat(self._path('leased', lease)).st_mtime < lease_seconds:
+                    continue
+                os.rename(self._path('leased', lease), self._path('pending', name))
+                requeued += 1
+            except FileNotFoundError:
+                pass  # Completed or requeued meanwhile
+        return requeued
+
+    def finished_seeds(self, spec: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+        """Results already recorded for a shard, keyed by seed"""
+        stem = self._path(RESULTS_DIR, spec['name'][:-len('.json')])
+        results = {}
+        for path in (stem + '.jsonl', stem + '.partial'):
+            if not os.path.exists(path):
+                continue
+            with open(path) as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn write from a crashed worker
+                    results[row['seed']] = row
+        return results
+
+    def record(self, spec: Dict[str, Any], row: Dict[str, Any]):
+        """Append one match result to the shard's partial file"""
+        stem = self._path(RESULTS_DIR, spec['name'][:-len('.json')])
+        with open(stem + '.partial', 'ab+') as f:
+            line = json.dumps(row).encode('utf-8') + b'\n'
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    line = b'\n' + line  # Start clear of a torn line left by a crash
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def complete(self, spec: Dict[str, Any], started: float) -> bool:
+        """
+        Publish a shard's results and mark it done
+
+        Returns False without touching the shard if the lease was lost: its
+        new owner may still be appending to the partial file.
+        """
+        leased = self._lease(spec['name'], spec['worker'])
+        if not self.heartbeat(spec):
+            return False
+        stem = self._path(RESULTS_DIR, spec['name'][:-len('.json')])
+        results = self.finished_seeds(spec)
+        lines = ''.join(json.dumps(results[seed]) + '\n' for seed in sorted(results))
+        _write_atomic(stem + '.jsonl', lines.encode('utf-8'))
+
+        summary = {'shard': spec['shard'], 'worker': spec['worker'], 'matches': len(results),
+                   'started': started, 'finished': self.now()}
+        try:
+            # Only the owner's own lease path can be renamed, so a late worker
+            # can never move a shard someone else re-claimed
+            os.rename(leased, self._path('done', spec['name']))
+        except FileNotFoundError:
+            return False  # Lease lost; the shard's new owner will finish it
+        with open(self._path('done', spec['name']), 'w') as f:
+            json.dump(summary, f)
+        if os.path.exists(stem + '.partial'):
+            os.remove(stem + '.partial')
+        return True
+
+    def status(self, window: float = 60.0) -> Dict[str, Any]:
+        """
+        Progress of the job
+
+        Counts shards in each state and matches played (including those in
+        shards still running), with overall throughput and throughput over
+        the last `window` seconds of completed shards.
+        """
+        counts = {state: len(self._names(state)) for state in STATES}
+        now = self.now()
+
+        matches_done, recent, workers = 0, 0, set()
+        for name in self._names('done'):
+            try:
+                with open(self._path('done', name)) as f:
+                    summary = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue  # Being written
+            matches_done += summary['matches']
+            workers.add(summary['worker'])
+            if now - summary['finished'] <= window:
+                recent += summary['matches']
+
+        in_progress = 0
+        for name in os.listdir(self._path(RESULTS_DIR)):
+            if name.endswith('.partial'):
+                with open(self._path(RESULTS_DIR, name)) as f:
+                    in_progress += sum(1 for _ in f)
+
+        played = matches_done + in_progress
+        elapsed = max(now - self.job['created'], 1e-9)
+        return {
+            **counts,
+            'shards': self.job['shards'],
+            'matches': self.job['matches'],
+            'matches_done': played,
+            'fraction_done': played / self.job['matches'] if self.job['matches'] else 1.0,
+            'matches_per_second': played / elapsed,
+            'recent_matches_per_second': recent / min(window, elapsed),
+            'workers_seen': len(workers),
+            'complete': counts['done'] == self.job['shards'],
+        }
+
+    def iter_results(self) -> Iterator[Dict[str, Any]]:
+        """Results of completed shards, in shard order"""
+        for name in self._names('done'):
+            with open(self._path(RESULTS_DIR, name[:-len('.json')] + '.jsonl')) as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def results(self):
+        """All completed results as a DataFrame"""
+        import pandas as pd
+        return pd.DataFrame(list(self.iter_results()))
+
+
+def _play(duration: int, seed: int) -> Dict[str, Any]:
+    model = run_match(duration=duration, seed=seed, export_logs=False, verbose=False)
+    stats = model.get_match_stats()
+    stats.pop('event_summary', None)
+    return stats
+
+
+def run_worker(directory: str, worker: Optional[str] = None,
+               lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_interval: float = 5.0,
+               max_shards: Optional[int] = None, verbose: bool = True) -> int:
+    """
+    Claim and play shards until the job is finished
+
+    Safe to run any number of times, on any host that sees the directory.
+    Expired leases are re-queued before each claim; when nothing is pending
+    but other workers still hold leases, the worker waits in case one of
+    them dies. Returns the number of shards this worker completed.
+    """
+    queue = BatchQueue(directory)
+    worker = worker or worker_name()
+    duration = queue.job['duration']
+    completed = 0
+
+    while max_shards is None or completed < max_shards:
+        queue.requeue_expired(lease_seconds)
+        spec = queue.claim(worker)
+        if spec is None:
+            if not queue._names('leased'):
+                break
+            time.sleep(poll_interval)
+            continue
+
+        started = queue.now()
+        finished = queue.finished_seeds(spec)
+        lost = False
+        for seed in range(*spec['seeds']):
+            if seed in finished:
+                continue
+            queue.record(spec, _play(duration, seed))
+            if not queue.heartbeat(spec):
+                lost = True
+                break
+        if not lost and queue.complete(spec, started):
+            completed += 1
+            if verbose:
+                status = queue.status()
+                print(f"[{worker}] shard {spec['shard']} done "
+                      f"({status['done']}/{status['shards']} shards, {status['fraction_done']:.0%})")
+    return completed
+
+
+def run_local(directory: str, workers: Optional[int] = None,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> int:
+    """Run workers in local processes until the job is finished"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_worker, directory, f"{worker_name()}-w{i}", lease_seconds)
+                   for i in range(workers)]
+        return sum(future.result() for future in futures)
+
+
+def _print_status(queue: BatchQueue):
+    status = queue.status()
+    print(f"{status['done']}/{status['shards']} shards done, {status['leased']} leased, "
+          f"{status['pending']} pending")
+    print(f"{status['matches_done']}/{status['matches']} matches ({status['fraction_done']:.1%}), "
+          f"{status['matches_per_second']:.2f} matches/s overall, "
+          f"{status['recent_matches_per_second']:.2f} matches/s in the last minute")
+
+
+if __name__ == "__main__":
+    import sys
+
+    # python batch_queue.py create DIR MATCHES [SHARD_SIZE] [DURATION]
+    # python batch_queue.py work DIR  |  status DIR
+    if len(sys.argv) >= 3:
+        command, directory = sys.argv[1], sys.argv[2]
+        if command == 'create':
+            args = [int(a) for a in sys.argv[3:6]]
+            queue = BatchQueue.create(directory, *args)
+            print(f"Created {queue.job['shards']} shards in {directory}")
+        elif command == 'work':
+            print(f"Completed {run_worker(directory)} shards")
+        elif command == 'status':
+            _print_status(BatchQueue(directory))
+        else:
+            sys.exit(f"Unknown command {command!r}")
+    else:
+        directory = tempfile.mkdtemp(prefix='batch-queue-')
+        queue = BatchQueue.create(directory, matches=40, shard_size=5, duration=5)
+        print(f"Job in {directory}: {queue.job['shards']} shards")
+
+        # A worker that stops after two shards, as if killed overnight
+        run_worker(directory, worker='first', max_shards=2, verbose=False)
+        _print_status(queue)
+
+        print("\nResuming with local workers...")
+        run_local(directory, workers=2)
+        _print_status(queue)
+        print(f"\n{len(queue.results())} results collected")
@@ -0,0 +1,225 @@
+"""
+Corpus Aggregation
+Out-of-core, parallel aggregation over directories of match CSV logs
+"""
+
+import glob
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Iterator, Optional, Tuple
+
+import pandas as pd
+
+from utils_logger import EVENT_DEFAULTS
+
+
+# Fixed dtypes for the export_logs CSV schema; low-cardinality strings are
+# read as categoricals so a chunk costs a few bytes per row
+CSV_DTYPES = {
+    'possession_id': 'string',
+    'timestamp': 'string',
+    'team': 'category',
+    'player_id': 'int16',
+    'action': 'category',
+    'zone': 'category',
+    'pressure': 'int8',
+    'team_status': 'category',
+    'outcome': 'category',
+    'xg_change': 'float64',
+    'receiver_id': 'int16',
+}
+
+# Columns the aggregates need; ids and timestamps are never read
+AGGREGATE_COLUMNS = ['team', 'player_id', 'action', 'zone', 'outcome', 'xg_change']
+
+DEFAULT_CHUNKSIZE = 50000
+
+
+def read_csv_chunks(path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+                    usecols: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Read a match CSV in chunks with fixed dtypes
+
+    Args:
+        path: CSV file in the example_output.csv schema
+        chunksize: Maximum number of rows per chunk
+        usecols: Columns to read; defaults to all columns of the schema
+
+    Columns the file lacks but the logger has a default for (e.g.
+    receiver_id in logs written before it existed) are filled with that
+    default; any other missing column is an error.
+    """
+    columns = usecols or list(CSV_DTYPES)
+    header = set(pd.read_csv(path, nrows=0).columns)
+    missing = [col for col in columns if col not in header and col in EVENT_DEFAULTS]
+    present = [col for col in columns if col not in missing]
+    dtypes = {col: CSV_DTYPES[col] for col in present if col in CSV_DTYPES}
+    for chunk in pd.read_csv(path, usecols=present, dtype=dtypes, chunksize=chunksize):
+        for col in missing:
+            chunk[col] = pd.Series(EVENT_DEFAULTS[col], index=chunk.index, dtype=CSV_DTYPES.get(col))
+        yield chunk[columns]
+
+
+class PartialAggregate:
+    """
+    Mergeable aggregate of match events
+
+    Holds only counts and sums keyed by zone, team and player, so its size
+    depends on the number of distinct keys, never on the number of events.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.events = 0
+        self.zone_counts: Counter = Counter()
+        self.player_actions: Counter = Counter()
+        self.player_successes: Counter = Counter()
+        self.player_xg: Counter = Counter()
+        self.team_xg: Counter = Counter()
+        self.team_shots: Counter = Counter()
+        self.team_goals: Counter = Counter()
+
+    def update(self, df: pd.DataFrame):
+        """Add a chunk of events"""
+        self.events += len(df)
+        self.zone_counts.update(df['zone'].value_counts().to_dict())
+
+        success = (df['outcome'] == 'Success').astype('int64')
+        players = df.assign(success=success).groupby(['team', 'player_id'], observed=True).agg(
+            actions=('action', 'size'), successes=('success', 'sum'), xg=('xg_change', 'sum')
+        )
+        for key, row in zip(players.index, players.itertuples(index=False)):
+            key = (str(key[0]), int(key[1]))
+            self.player_actions[key] += int(row.actions)
+            self.player_successes[key] += int(row.successes)
+            self.player_xg[key] += float(row.xg)
+
+        self.team_xg.update(df.groupby('team', observed=True)['xg_change'].sum().to_dict())
+        self.team_shots.update(df.loc[df['action'] == 'Shot', 'team'].value_counts().to_dict())
+        self.team_goals.update(df.loc[df['action'] == 'Goal', 'team'].value_counts().to_dict())
+
+    def merge(self, other: 'PartialAggregate') -> 'PartialAggregate':
+        """Fold another partial aggregate into this one"""
+        self.files += other.files
+        self.events += other.events
+        for name in ('zone_counts', 'player_actions', 'player_successes', 'player_xg',
+                     'team_xg', 'team_shots', 'team_goals'):
+            getattr(self, name).update(getattr(other, name))
+        return self
+
+    def heatmap(self) -> pd.DataFrame:
+        """Zone activity as a grid of rows (A, B, ...) by columns (1, 2, ...)"""
+        cells = {}
+        for zone, count in self.zone_counts.items():
+            if len(zone) >= 2 and zone[0].isalpha() and zone[1:].isdigit():
+                cells[(zone[0], int(zone[1:]))] = count
+        if not cells:
+            return pd.DataFrame()
+        rows = sorted({row for row, _ in cells})
+        cols = sorted({col for _, col in cells})
+        return pd.DataFrame(
+            [[cells.get((row, col), 0) for col in range(1, max(cols) + 1)] for row in rows],
+            index=rows, columns=range(1, max(cols) + 1)
+        )
+
+    def player_stats(self) -> pd.DataFrame:
+        """Actions, success rate and xG per (team, player_id)"""
+        rows = [
+            {
+                'team': team, 'player_id': player,
+                'actions': actions,
+                'success_rate': round(self.player_successes[(team, player)] / actions * 100, 1),
+                'xg_change': round(self.player_xg[(team, player)], 3),
+            }
+            for (team, player), actions in self.player_actions.items()
+        ]
+        if not rows:
+            return pd.DataFrame(columns=['team', 'player_id', 'actions', 'success_rate', 'xg_change'])
+        return pd.DataFrame(rows).sort_values('actions', ascending=False).reset_index(drop=True)
+
+    def team_stats(self) -> pd.DataFrame:
+        """xG, shots and goals per team"""
+        teams = sorted(set(self.team_xg) | set(self.team_shots) | set(self.team_goals))
+        return pd.DataFrame({
+            'xg_change': [round(self.team_xg[t], 3) for t in teams],
+            'shots': [self.team_shots[t] for t in teams],
+            'goals': [self.team_goals[t] for t in teams],
+        }, index=teams)
+
+
+def aggregate_files(paths: List[str], chunksize: int = DEFAULT_CHUNKSIZE) -> PartialAggregate:
+    """Aggregate a batch of CSV files chunk by chunk (runs in worker processes)"""
+    partial = PartialAggregate()
+    for path in paths:
+        for chunk in read_csv_chunks(path, chunksize, usecols=AGGREGATE_COLUMNS):
+            partial.update(chunk)
+        partial.files += 1
+    return partial
+
+
+def _batches(paths: Iterator[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def aggregate_directory(directory: str, pattern: str = '*.csv', workers: Optional[int] = None,
+                        chunksize: int = DEFAULT_CHUNKSIZE, files_per_task: int = 64,
+                        max_pending: Optional[int] = None) -> PartialAggregate:
+    """
+    Map-reduce aggregation over every matching CSV in a directory
+
+    Files are grouped into tasks of files_per_task and aggregated in a process
+    pool; partial aggregates are merged as tasks complete. At most max_pending
+    tasks are in flight, so memory is bounded by chunk size and pool width.
+
+    Args:
+        directory: Directory to scan
+        pattern: Glob pattern for match CSVs
+        workers: Number of worker processes (defaults to the CPU count)
+        chunksize: Rows per chunk read inside a worker
+        files_per_task: Files aggregated by one task
+        max_pending: Tasks submitted ahead of completion (defaults to 2 per worker)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 2 * workers
+    paths = glob.iglob(os.path.join(directory, pattern))
+
+    total = PartialAggregate()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for batch in _batches(paths, files_per_task):
+            pending.add(pool.submit(aggregate_files, batch, chunksize))
+            if len(pending) >= max_pending:
+                done = next(as_completed(pending))
+                pending.remove(done)
+                total.merge(done.result())
+        for future in as_completed(pending):
+            total.merge(future.result())
+
+    return total
+
+
+if __name__ == "__main__":
+    import sys
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else '.'
+
+    start = time.perf_counter()
+    result = aggregate_directory(directory, pattern='*.csv', files_per_task=4)
+    elapsed = time.perf_counter() - start
+
+    print(f"Aggregated {result.events} events from {result.files} files in {elapsed:.2f}s")
+    print("\nZone Activity Heatmap:")
+    print(result.heatmap())
+    print("\nTop 10 Most Active Players:")
+    print(result.player_stats().head(10).to_string(index=False))
+    print("\nTeam xG:")
+    print(result.team_stats())
@@ -0,0 +1,531 @@
+"""
+Decision Trace Recording
+Compact varint-encoded match traces that regenerate the full event log on demand
+"""
+
+import json
+import os
+import struct
+import tempfile
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+from utils_logger import EventLogger, EVENT_COLUMNS
+
+
+MAGIC = b'FDT1'
+EPOCH = datetime(2000, 1, 1)
+
+# Flag bits written before every event record
+SAME_POSSESSION = 1
+RAW_XG = 2
+RAW_TIMESTAMP = 4
+HAS_EXTRAS = 8
+RAW_NUMBERS = 16
+HAS_RECEIVER = 32
+
+# Fields stored as entries of the trace's string table
+STRING_FIELDS = ['team', 'action', 'zone', 'team_status', 'outcome']
+KNOWN_FIELDS = set(EVENT_COLUMNS)
+
+
+def write_varint(buffer: bytearray, value: int):
+    """Append an unsigned LEB128 varint"""
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """Read an unsigned varint, returning (value, next position)"""
+    result = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+
+
+def zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63) if value < 0 else value << 1
+
+
+def unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _timestamp_micros(timestamp: Any) -> Optional[int]:
+    """Microseconds since EPOCH if the timestamp round-trips exactly, else None"""
+    if not isinstance(timestamp, str) or not timestamp.endswith('Z'):
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp[:-1])
+    except ValueError:
+        return None
+    if moment.tzinfo is not None:
+        return None
+    micros = (moment - EPOCH) // timedelta(microseconds=1)
+    return micros if _format_timestamp(micros) == timestamp else None
+
+
+def _format_timestamp(micros: int) -> str:
+    return (EPOCH + timedelta(microseconds=micros)).isoformat() + 'Z'
+
+
+class DecisionTraceRecorder:
+    """
+    Event logger that keeps a compact trace instead of event dicts
+
+    Every logged event becomes a short record of varints: a flag byte, codes
+    into a string table that grows as new values appear, the jersey number,
+    pressure, xG in thousandths, the timestamp delta in microseconds, the
+    receiver's jersey number (passes only, flagged) and the number of model
+    steps since the previous event. A typical event costs
+    about fifteen bytes instead of a dict. Values that would not round-trip
+    exactly (unrounded xG, custom timestamps) are stored raw, so replaying the
+    trace always regenerates the original log.
+
+    The recorder implements the EventLogger interface; reading .events or
+    exporting decodes the trace on demand. Decoded events are cached and
+    each read only decodes the records added since the previous one. The
+    header holds everything FootballModel needs to play the match again
+    (see TraceReplayer.rerun()).
+    """
+
+    def __init__(self, mirror: Optional[EventLogger] = None):
+        self.header: Dict[str, Any] = {}
+        self.buffer = bytearray()
+        self.mirror = mirror  # Optional full logger kept for verification
+
+        self._model = None
+        self._strings: Dict[str, int] = {}
+        self._last_possession = None
+        self._last_micros = 0
+        self._last_step = 0
+
+        self._count = 0
+        self._possessions = set()
+        self._actions: Counter = Counter()
+        self._teams: Counter = Counter()
+
+        self._decoder = TraceDecoder()
+        self._decoded: List[Dict[str, Any]] = []
+
+    def bind(self, model):
+        """Attach to a model so records carry its step clock and config"""
+        self._model = model
+        self.header = {
+            'seed': model.seed,
+            'match_id': model.match_id,
+            'match_duration': model.match_duration,
+            'home_config': model.home_config.to_dict(),
+            'away_config': model.away_config.to_dict(),
+            'grid': list(model.grid),
+            'continuous': model.continuous,
+            'home_roster': model.rosters['Home'],
+            'away_roster': model.rosters['Away'],
+        }
+
+    # ------------------------------------------------------------------
+    # EventLogger interface
+    # ------------------------------------------------------------------
+
+    def add(self, event_dict: Dict[str, Any]):
+        """Encode an event into the trace"""
+        if 'timestamp' not in event_dict:
+            event_dict['timestamp'] = datetime.now().isoformat() + 'Z'
+        for field in EVENT_COLUMNS:
+            if field not in event_dict:
+                event_dict[field] = EventLogger.default_value(field)
+
+        self._encode(event_dict)
+
+        self._count += 1
+        self._possessions.add(event_dict['possession_id'])
+        self._actions[event_dict['action']] += 1
+        self._teams[event_dict['team']] += 1
+
+        if self.mirror is not None:
+            self.mirror.add(event_dict)
+
+    @property
+    def events(self) -> List[Dict[str, Any]]:
+        """Decoded events; records added since the last read are decoded now"""
+        if self._decoder.position < len(self.buffer):
+            self._decoded.extend(event for _, event in self._decoder.decode(self.buffer))
+        return self._decoded
+
+    def _logger(self) -> EventLogger:
+        logger = EventLogger()
+        logger.events = self.events
+        return logger
+
+    def to_columns(self, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        return self._logger().to_columns(columns)
+
+    def dump_csv(self, path: str):
+        self._logger().dump_csv(path)
+
+    def dump_xes(self, path: str):
+        self._logger().dump_xes(path)
+
+    def get_event_count(self):
+        return self._count
+
+    def clear(self):
+        """Drop the recorded stream, keeping the header"""
+        self.buffer = bytearray()
+        self._strings = {}
+        self._last_possession = None
+        self._last_micros = 0
+        self._last_step = 0
+        self._count = 0
+        self._possessions = set()
+        self._actions = Counter()
+        self._teams = Counter()
+        self._decoder = TraceDecoder()
+        self._decoded = []
+        if self.mirror is not None:
+            self.mirror.clear()
+
+    def get_summary(self):
+        if not self._count:
+            return "No events logged"
+        return {
+            'total_events': self._count,
+            'unique_possessions': len(self._possessions),
+            'actions': dict(self._actions.most_common()),
+            'teams': dict(self._teams.most_common())
+        }
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _write_string(self, value: str):
+        code = self._strings.get(value)
+        if code is not None:
+            write_varint(self.buffer, code)
+            return
+        # New table entry: the next free code, followed by the string itself
+        code = len(self._strings)
+        self._strings[value] = code
+        data = value.encode('utf-8')
+        write_varint(self.buffer, code)
+        write_varint(self.buffer, len(data))
+        self.buffer.extend(data)
+
+    def _encode(self, event: Dict[str, Any]):
+        flags = 0
+        possession = event['possession_id']
+        if possession == self._last_possession:
+            flags |= SAME_POSSESSION
+
+        xg = event['xg_change']
+        milli = round(xg * 1000) if type(xg) is float else None
+        if milli is None or repr(milli / 1000) != repr(xg):
+            flags |= RAW_XG
+
+        numbers = (event['player_id'], event['pressure'])
+        if any(type(value) is not int for value in numbers):
+            flags |= RAW_NUMBERS
+
+        micros = _timestamp_micros(event['timestamp'])
+        if micros is None:
+            flags |= RAW_TIMESTAMP
+
+        extras = [key for key in event if key not in KNOWN_FIELDS]
+        receiver = event.get('receiver_id', 0)
+        if type(receiver) is not int or receiver < 0:
+            extras.append('receiver_id')
+        elif receiver:
+            flags |= HAS_RECEIVER
+        if extras:
+            flags |= HAS_EXTRAS
+
+        buffer = self.buffer
+        step = self._model.steps if self._model is not None else 0
+        write_varint(buffer, flags)
+        write_varint(buffer, step - self._last_step)
+        self._last_step = step
+
+        if not flags & SAME_POSSESSION:
+            self._write_string(str(possession))
+            self._last_possession = possession
+
+        for field in STRING_FIELDS:
+            self._write_string(str(event[field]))
+        if flags & RAW_NUMBERS:
+            self._write_string(json.dumps(numbers))
+        else:
+            write_varint(buffer, zigzag(numbers[0]))
+            write_varint(buffer, zigzag(numbers[1]))
+
+        if flags & RAW_XG:
+            self._write_string(json.dumps(xg))
+        else:
+            write_varint(buffer, zigzag(milli))
+
+        if flags & RAW_TIMESTAMP:
+            self._write_string(json.dumps(event['timestamp']))
+        else:
+            write_varint(buffer, zigzag(micros - self._last_micros))
+            self._last_micros = micros
+
+        if flags & HAS_RECEIVER:
+            write_varint(buffer, receiver)
+
+        if extras:
+            write_varint(buffer, len(extras))
+            for key in extras:
+                self._write_string(key)
+                self._write_string(json.dumps(event[key]))
+
+    def to_bytes(self) -> bytes:
+        """Serialise the header and decision stream"""
+        header = json.dumps(self.header).encode('utf-8')
+        return MAGIC + struct.pack('<I', len(header)) + header + bytes(self.buffer)
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+
+class TraceDecoder:
+    """
+    Incremental decoder of a trace's record stream
+
+    Keeps the string table, delta bases and read position between calls,
+    so bytes appended to a growing stream are decoded without starting over.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.strings: List[str] = []
+        self.possession = None
+        self.micros = 0
+        self.step = 0
+
+    def decode(self, data: bytes) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (step, event) for every complete record after the current position"""
+        strings = self.strings
+        position = self.position
+
+        def read_string() -> str:
+            nonlocal position
+            code, position = read_varint(data, position)
+            if code == len(strings):
+                length, position = read_varint(data, position)
+                strings.append(data[position:position + length].decode('utf-8'))
+                position += length
+            return strings[code]
+
+        while position < len(data):
+            flags, position = read_varint(data, position)
+            delta, position = read_varint(data, position)
+            self.step += delta
+
+            if not flags & SAME_POSSESSION:
+                self.possession = read_string()
+
+            team, action, zone, team_status, outcome = (read_string() for _ in STRING_FIELDS)
+            if flags & RAW_NUMBERS:
+                player_id, pressure = json.loads(read_string())
+            else:
+                player_id, position = read_varint(data, position)
+                pressure, position = read_varint(data, position)
+                player_id, pressure = unzigzag(player_id), unzigzag(pressure)
+
+            if flags & RAW_XG:
+                xg_change = json.loads(read_string())
+            else:
+                milli, position = read_varint(data, position)
+                xg_change = unzigzag(milli) / 1000
+
+            if flags & RAW_TIMESTAMP:
+                timestamp = json.loads(read_string())
+            else:
+                delta, position = read_varint(data, position)
+                self.micros += unzigzag(delta)
+                timestamp = _format_timestamp(self.micros)
+
+            receiver_id = 0
+            if flags & HAS_RECEIVER:
+                receiver_id, position = read_varint(data, position)
+
+            event = {
+                'possession_id': self.possession,
+                'team': team,
+                'player_id': player_id,
+                'action': action,
+                'zone': zone,
+                'pressure': pressure,
+                'team_status': team_status,
+                'outcome': outcome,
+                'xg_change': xg_change,
+                'timestamp': timestamp,
+                'receiver_id': receiver_id,
+            }
+
+            if flags & HAS_EXTRAS:
+                count, position = read_varint(data, position)
+                for _ in range(count):
+                    key = read_string()
+                    event[key] = json.loads(read_string())
+
+            self.position = position
+            yield self.step, event
+
+
+class TraceReplayer:
+    """Regenerates EventLogger output from a recorded decision trace"""
+
+    def __init__(self, trace: bytes):
+        if trace[:4] != MAGIC:
+            raise ValueError("Not a decision trace")
+        (header_len,) = struct.unpack_from('<I', trace, 4)
+        self.header = json.loads(trace[8:8 + header_len].decode('utf-8'))
+        self.data = trace[8 + header_len:]
+
+    @classmethod
+    def load(cls, path: str) -> 'TraceReplayer':
+        with open(path, 'rb') as f:
+            return cls(f.read())
+
+    def iter_events(self, start_minute: Optional[float] = None,
+                    end_minute: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Decode events, optionally limited to a match-time window
+
+        Each model step is 0.1 minutes, so the window selects events logged
+        during steps round(start_minute * 10) up to, not including,
+        round(end_minute * 10). Events before the window are still decoded,
+        since later records refer to earlier table entries and deltas.
+        """
+        start_step = None if start_minute is None else round(start_minute * 10)
+        end_step = None if end_minute is None else round(end_minute * 10)
+
+        for step, event in TraceDecoder().decode(self.data):
+            if start_step is not None and step < start_step:
+                continue
+            if end_step is not None and step >= end_step:
+                break
+            yield event
+
+    def model_kwargs(self) -> Dict[str, Any]:
+        """FootballModel arguments that reproduce the recorded match"""
+        from team_config import TeamConfig
+
+        header = self.header
+        if header.get('seed') is None:
+            raise ValueError("Trace of an unseeded match cannot be re-run")
+        if 'home_config' not in header:
+            raise ValueError("Trace header predates model configs; it cannot be re-run")
+        return {
+            'match_duration': header['match_duration'],
+            'seed': header['seed'],
+            'home_config': TeamConfig.from_dict(header['home_config']),
+            'away_config': TeamConfig.from_dict(header['away_config']),
+            'grid': tuple(header['grid']),
+            'continuous': header['continuous'],
+            'home_roster': header['home_roster'],
+            'away_roster': header['away_roster'],
+        }
+
+    def rerun(self, **kwargs):
+        """
+        Play the recorded match again from its header
+
+        Returns the finished FootballModel, logging into a fresh recorder.
+        Events match the trace except for their wall-clock timestamps.
+        """
+        from football_simulation import FootballModel
+
+        model = FootballModel(verbose=False, event_logger=DecisionTraceRecorder(),
+                              **{**self.model_kwargs(), **kwargs})
+        if model.match_id != self.header['match_id']:
+            raise ValueError(f"Re-run drew match id {model.match_id}, trace has {self.header['match_id']}")
+        while model.running:
+            model.step()
+        return model
+
+    def to_logger(self, start_minute: Optional[float] = None,
+                  end_minute: Optional[float] = None) -> EventLogger:
+        """Rebuild an EventLogger, or a time slice of it"""
+        logger = EventLogger()
+        logger.events = list(self.iter_events(start_minute, end_minute))
+        return logger
+
+    def verify(self, original: EventLogger) -> bool:
+        """Check that the regenerated CSV export is byte-identical to the original's"""
+        regenerated = self.to_logger()
+        if regenerated.events != original.events:
+            return False
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for name, logger in (('original', original), ('regenerated', regenerated)):
+                path = os.path.join(directory, f"{name}.csv")
+                logger.dump_csv(path)
+                paths.append(path)
+            with open(paths[0], 'rb') as a, open(paths[1], 'rb') as b:
+                return a.read() == b.read()
+
+
+def record_match(duration: int = 90, seed: Optional[int] = None,
+                 verify: bool = False) -> DecisionTraceRecorder:
+    """
+    Simulate a match in recording mode
+
+    With verify=True a full EventLogger is kept alongside the trace and the
+    replayed log is checked against it; a mismatch raises ValueError.
+    """
+    from football_simulation import FootballModel
+
+    recorder = DecisionTraceRecorder(mirror=EventLogger() if verify else None)
+    model = FootballModel(match_duration=duration, seed=seed, verbose=False, event_logger=recorder)
+
+    steps = 0
+    while model.running and steps < duration * 10:
+        model.step()
+        steps += 1
+
+    if verify and not TraceReplayer(recorder.to_bytes()).verify(recorder.mirror):
+        raise ValueError("Replayed trace does not match the original event log")
+    return recorder
+
+
+if __name__ == "__main__":
+    import time
+
+    start = time.perf_counter()
+    recorder = record_match(duration=90, seed=123, verify=True)
+    elapsed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'match.csv')
+        recorder.mirror.dump_csv(csv_path)
+        csv_bytes = os.path.getsize(csv_path)
+
+    trace = recorder.to_bytes()
+    print(f"Recorded and verified {recorder.get_event_count()} events in {elapsed:.2f}s")
+    print(f"Trace: {len(trace) / 1024:.1f} KiB vs CSV {csv_bytes / 1024:.1f} KiB "
+          f"({len(trace) / recorder.get_event_count():.1f} bytes/event)")
+
+    replayer = TraceReplayer(trace)
+    start = time.perf_counter()
+    second_half = replayer.to_logger(start_minute=45)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Regenerated second half ({second_half.get_event_count()} events) in {elapsed:.1f} ms")
+
+    start = time.perf_counter()
+    rerun = replayer.rerun()
+    elapsed = time.perf_counter() - start
+    same = [{k: v for k, v in e.items() if k != 'timestamp'} for e in rerun.event_logger.events] == \
+        [{k: v for k, v in e.items() if k != 'timestamp'} for e in replayer.iter_events()]
+    print(f"Re-ran the match from the trace header in {elapsed:.2f}s: events identical "
+          f"apart from timestamps: {same}")
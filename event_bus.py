@@ -0,0 +1,189 @@
+"""
+Match Event Bus
+In-process publish/subscribe for simulation events, with per-action routing
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Iterable, Optional, Tuple
+
+from utils_logger import EVENT_COLUMNS, EventLogger
+
+
+# Typed record delivered to subscribers registered with kind='record'
+MatchEvent = namedtuple('MatchEvent', EVENT_COLUMNS)
+
+KINDS = ('dict', 'record', 'columns')
+
+
+class Subscription:
+    """
+    Handle returned by EventBus.subscribe()
+
+    Columnar subscriptions buffer events per column and hand the callback a
+    {column: list} chunk every batch_size events; flush() delivers whatever
+    is buffered, and the model flushes the bus when a match ends.
+    """
+
+    def __init__(self, bus: 'EventBus', callback: Callable[[Any], None],
+                 actions: Optional[Tuple[str, ...]], kind: str, batch_size: int,
+                 columns: List[str]):
+        self.bus = bus
+        self.callback = callback
+        self.actions = actions
+        self.kind = kind
+        self.batch_size = batch_size
+        self.columns = columns
+        self.delivered = 0
+        self._buffer: Dict[str, List[Any]] = {column: [] for column in columns}
+        self._buffered = 0
+
+        if kind == 'dict':
+            self.handle = callback
+        elif kind == 'record':
+            self.handle = self._handle_record
+        else:
+            self.handle = self._handle_columns
+
+    def _handle_record(self, event: Dict[str, Any]):
+        self.callback(MatchEvent(*[event[column] for column in EVENT_COLUMNS]))
+
+    def _handle_columns(self, event: Dict[str, Any]):
+        for column in self.columns:
+            self._buffer[column].append(event[column])
+        self._buffered += 1
+        if self._buffered >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Deliver buffered events of a columnar subscription"""
+        if not self._buffered:
+            return
+        chunk, self._buffer = self._buffer, {column: [] for column in self.columns}
+        self.delivered += self._buffered
+        self._buffered = 0
+        self.callback(chunk)
+
+    def unsubscribe(self):
+        """Stop receiving events; buffered columns are delivered first"""
+        self.flush()
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    Routes every published match event to the subscribers that asked for it
+
+    Subscribers register for all actions or only some, and receive either
+    the event dict (shared between subscribers, so treat it as read-only),
+    a MatchEvent namedtuple, or batched columnar chunks. Routing tables are
+    rebuilt on (un)subscribe, so publishing is one dict lookup per event.
+
+    Publishers call wants(action) before building an event: with nobody
+    subscribed to an action, no dict, timestamp or string formatting is
+    produced for it at all. The model's EventLogger is simply the default
+    subscriber; a model created with log_events=False has none.
+    """
+
+    def __init__(self):
+        self.subscriptions: List[Subscription] = []
+        self._routes: Dict[str, Tuple[Callable, ...]] = {}
+        self._everything: Tuple[Callable, ...] = ()
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[Any], None], actions: Optional[Iterable[str]] = None,
+                  kind: str = 'dict', batch_size: int = 1024,
+                  columns: Optional[List[str]] = None) -> Subscription:
+        """
+        Register a callback for events of the given actions (default: all)
+
+        Args:
+            callback: Called with each event (or each chunk for kind='columns')
+            actions: Action names to receive, e.g. ['Shot', 'Goal']
+            kind: 'dict', 'record' (MatchEvent) or 'columns'
+            batch_size: Events per chunk for columnar subscribers
+            columns: Columns to collect for columnar subscribers
+        """
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {KINDS}")
+        subscription = Subscription(self, callback, tuple(actions) if actions is not None else None,
+                                    kind, batch_size, list(columns or EVENT_COLUMNS))
+        self.subscriptions.append(subscription)
+        self._rebuild()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+            self._rebuild()
+
+    def _rebuild(self):
+        """Precompute the handlers of every action, in subscription order"""
+        self._everything = tuple(s.handle for s in self.subscriptions if s.actions is None)
+        actions = {action for s in self.subscriptions if s.actions is not None for action in s.actions}
+        self._routes = {
+            action: tuple(s.handle for s in self.subscriptions
+                          if s.actions is None or action in s.actions)
+            for action in actions
+        }
+
+    @property
+    def active(self) -> bool:
+        return bool(self.subscriptions)
+
+    def wants(self, action: str) -> bool:
+        """Whether any subscriber receives this action"""
+        return bool(self._everything) or action in self._routes
+
+    def publish(self, event: Dict[str, Any]):
+        """Complete an event with its timestamp and defaults and deliver it"""
+        handlers = self._routes.get(event['action'], self._everything)
+        if not handlers:
+            return
+        if 'timestamp' not in event:
+            event['timestamp'] = datetime.now().isoformat() + 'Z'
+        for field in EVENT_COLUMNS:
+            if field not in event:
+                event[field] = EventLogger.default_value(field)
+        self.published += 1
+        for handle in handlers:
+            handle(event)
+
+    def flush(self):
+        """Deliver the buffered chunks of all columnar subscribers"""
+        for subscription in self.subscriptions:
+            subscription.flush()
+
+
+if __name__ == "__main__":
+    import time
+    from collections import Counter
+    from football_simulation import FootballModel
+
+    def timed(label: str, setup: Callable[[FootballModel], None], log_events: bool = True,
+              matches: int = 5) -> float:
+        start = time.perf_counter()
+        for seed in range(matches):
+            model = FootballModel(match_duration=90, seed=seed, verbose=False, log_events=log_events)
+            setup(model)
+            while model.running:
+                model.step()
+        per_match = (time.perf_counter() - start) / matches
+        print(f"  {label:<40} {per_match * 1000:7.1f} ms/match")
+        return per_match
+
+    shots = Counter()
+    chunks = []
+
+    print("Cost per 90-minute match:")
+    timed("no subscribers", lambda m: None, log_events=False)
+    timed("Shot/Goal records only", lambda m: m.event_bus.subscribe(
+        lambda e: shots.update([(e.team, e.outcome)]), actions=['Shot', 'Goal'], kind='record'),
+        log_events=False)
+    timed("EventLogger (default)", lambda m: None)
+    timed("EventLogger + columnar chunks", lambda m: m.event_bus.subscribe(
+        chunks.append, kind='columns', batch_size=2048, columns=['team', 'action', 'zone']))
+
+    print(f"\nShot outcomes seen by the record subscriber: {dict(shots)}")
+    print(f"Columnar subscriber received {len(chunks)} chunks, "
+          f"{sum(len(c['action']) for c in chunks):,} events")
@@ -0,0 +1,200 @@
+"""
+Expected Threat (xT)
+Zone values solved from per-team zone transition, shot and loss probabilities
+"""
+
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils_logger import columns_of
+
+
+# Actions taken by the player on the ball
+BALL_ACTIONS = ('Pass', 'Dribble', 'Shot', 'Clearance')
+
+# Actions whose success moves the ball to a new location
+MOVE_ACTIONS = ('Pass', 'Dribble')
+
+# Events after which a move has no end zone on the ball
+POSSESSION_BREAKS = ('Goal', 'PossessionStart', 'PossessionEnd')
+
+LOG_FIELDS = ['team', 'action', 'zone', 'outcome']
+
+
+def ball_actions(log) -> List[Tuple[str, str, str, str, Optional[str]]]:
+    """
+    On-ball actions of a match as (team, action, zone, outcome, end zone)
+
+    The log records one zone per event, so the end of a successful move is
+    taken to be the zone of the same team's next on-ball action. A move
+    followed by an opponent action, a goal or a new possession has no end
+    zone and counts as losing the ball.
+    """
+    columns = columns_of(log, LOG_FIELDS)
+    events = list(zip(*(columns[field] for field in LOG_FIELDS)))
+    # One backward pass, carrying the (team, zone) of the next on-ball action,
+    # or None when a goal or possession marker comes first
+    following = None
+    actions = []
+    for team, action, zone, outcome in reversed(events):
+        if action in BALL_ACTIONS:
+            end = None
+            if action in MOVE_ACTIONS and outcome == 'Success' and following is not None:
+                end = following[1] if following[0] == team else None
+            actions.append((team, action, zone, outcome, end))
+            following = (team, zone)
+        elif action in POSSESSION_BREAKS:
+            following = None
+    actions.reverse()
+    return actions
+
+
+class ExpectedThreat:
+    """
+    Expected threat per zone for each team
+
+    From zone z a team shoots with probability s(z), scoring with
+    probability g(z), or completes a move to z' with probability P(z, z');
+    anything else loses the ball. xT solves x = s * g + P x, i.e.
+    (I - P) x = s * g, in one linear solve per team instead of iterating.
+
+    Only counts are stored, so update() folds in new matches without
+    revisiting old ones and partial models merge like PartialAggregate.
+    """
+
+    def __init__(self):
+        self.matches = 0
+        self.actions: Dict[str, Counter] = {}
+        self.shots: Dict[str, Counter] = {}
+        self.goals: Dict[str, Counter] = {}
+        self.moves: Dict[str, Counter] = {}
+        self._solved: Dict[str, pd.Series] = {}
+
+    def _counters(self, team: str) -> Tuple[Counter, Counter, Counter, Counter]:
+        if team not in self.actions:
+            for name in ('actions', 'shots', 'goals', 'moves'):
+                getattr(self, name)[team] = Counter()
+        return self.actions[team], self.shots[team], self.goals[team], self.moves[team]
+
+    def update(self, logs: Iterable[Any]) -> 'ExpectedThreat':
+        """Add the counts of a batch of match logs"""
+        for log in logs:
+            for team, action, zone, outcome, end in ball_actions(log):
+                actions, shots, goals, moves = self._counters(team)
+                actions[zone] += 1
+                if action == 'Shot':
+                    shots[zone] += 1
+                    goals[zone] += outcome == 'Success'
+                elif end is not None:
+                    moves[(zone, end)] += 1
+            self.matches += 1
+        self._solved.clear()
+        return self
+
+    def merge(self, other: 'ExpectedThreat') -> 'ExpectedThreat':
+        """Fold another model's counts into this one"""
+        self.matches += other.matches
+        for team in other.actions:
+            for mine, theirs in zip(self._counters(team), other._counters(team)):
+                mine.update(theirs)
+        self._solved.clear()
+        return self
+
+    @property
+    def teams(self) -> List[str]:
+        return sorted(self.actions)
+
+    def zones(self, team: str) -> List[str]:
+        actions, _, _, moves = self._counters(team)
+        return sorted(set(actions) | {end for _, end in moves})
+
+    def matrices(self, team: str) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """(zones, shot probability, scoring probability, move matrix) for a team"""
+        actions, shots, goals, moves = self._counters(team)
+        zones = self.zones(team)
+        index = {zone: i for i, zone in enumerate(zones)}
+        n_actions = np.array([actions[z] for z in zones], dtype=float)
+        n_shots = np.array([shots[z] for z in zones], dtype=float)
+        n_goals = np.array([goals[z] for z in zones], dtype=float)
+
+        shot_prob = np.divide(n_shots, n_actions, out=np.zeros_like(n_actions), where=n_actions > 0)
+        goal_prob = np.divide(n_goals, n_shots, out=np.zeros_like(n_shots), where=n_shots > 0)
+        move = np.zeros((len(zones), len(zones)))
+        for (start, end), count in moves.items():
+            move[index[start], index[end]] = count
+        move = np.divide(move, n_actions[:, None], out=np.zeros_like(move), where=n_actions[:, None] > 0)
+        return zones, shot_prob, goal_prob, move
+
+    def solve(self, team: str) -> pd.Series:
+        """Expected threat of every zone for a team"""
+        if team not in self._solved:
+            zones, shot_prob, goal_prob, move = self.matrices(team)
+            system = np.eye(len(zones)) - move
+            reward = shot_prob * goal_prob
+            try:
+                values = np.linalg.solve(system, reward)
+            except np.linalg.LinAlgError:
+                values = np.linalg.lstsq(system, reward, rcond=None)[0]
+            self._solved[team] = pd.Series(values, index=zones, name=team)
+        return self._solved[team]
+
+    def grid(self, team: str) -> pd.DataFrame:
+        """xT laid out as rows (A, B, ...) by columns (1, 2, ...)"""
+        values = self.solve(team)
+        cells = {(zone[0], int(zone[1:])): value for zone, value in values.items()
+                 if len(zone) >= 2 and zone[0].isalpha() and zone[1:].isdigit()}
+        if not cells:
+            return pd.DataFrame()
+        rows = sorted({row for row, _ in cells})
+        cols = range(1, max(col for _, col in cells) + 1)
+        return pd.DataFrame([[cells.get((row, col), 0.0) for col in cols] for row in rows],
+                            index=rows, columns=cols)
+
+    def value_actions(self, log) -> pd.DataFrame:
+        """
+        Pass and Dribble events of a match valued by their xT delta
+
+        A completed move is worth xT(end) - xT(start); a move that loses the
+        ball is worth -xT(start).
+        """
+        rows = []
+        for team, action, zone, outcome, end in ball_actions(log):
+            if action not in MOVE_ACTIONS:
+                continue
+            values = self.solve(team)
+            start_value = float(values.get(zone, 0.0))
+            end_value = float(values.get(end, 0.0)) if end is not None else 0.0
+            rows.append({'team': team, 'action': action, 'zone': zone, 'end_zone': end,
+                         'outcome': outcome, 'xt_start': start_value, 'xt_end': end_value,
+                         'xt_delta': end_value - start_value})
+        return pd.DataFrame(rows, columns=['team', 'action', 'zone', 'end_zone', 'outcome',
+                                           'xt_start', 'xt_end', 'xt_delta'])
+
+
+if __name__ == "__main__":
+    from football_simulation import FootballModel
+
+    def play(seeds):
+        for seed in seeds:
+            model = FootballModel(match_duration=90, seed=seed, verbose=False)
+            while model.running:
+                model.step()
+            yield model.event_logger
+
+    xt = ExpectedThreat().update(play(range(10)))
+    print(f"xT after {xt.matches} matches:")
+    for team in xt.teams:
+        print(f"\n{team} (attacking {'D' if team == 'Home' else 'A'}):")
+        print(xt.grid(team).round(3))
+
+    # A new batch only adds its counts
+    new_logs = list(play(range(10, 15)))
+    xt.update(new_logs)
+    print(f"\nUpdated with 5 more matches ({xt.matches} total)")
+
+    valued = xt.value_actions(new_logs[0])
+    print("\nxT added by Pass and Dribble (last match):")
+    print(valued.groupby(['team', 'action'])['xt_delta'].agg(['count', 'sum', 'mean']).round(4))
@@ -4,12 +4,19 @@ Football Simulation Model
 """
 
 import mesa
-import random
+import pickle
 import numpy as np
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
-from player_agent import PlayerAgent, Position
+from player_agent import PlayerAgent, Position, PRESSURE_RADIUS
 from utils_logger import EventLogger
+from team_config import TeamConfig, DEFAULT_HOME_CONFIG, DEFAULT_AWAY_CONFIG
+from decision_trace import DecisionTraceRecorder
+from event_bus import EventBus
+from pitch import DEFAULT_GRID, pitch_grid
+from spatial_hash import SpatialHash
+from time_series import TimeSeriesCollector
+from pass_network import PassNetwork
 
 
 class FootballModel(mesa.Model):
@@ -17,63 +24,78 @@ class FootballModel(mesa.Model):
     Football simulation model with 11v11 players
     """
     
-    def __init__(self, match_duration: int = 90, seed: Optional[int] = None):
+    def __init__(self, match_duration: int = 90, seed: Optional[int] = None, verbose: bool = True,
+                 record_trace: bool = False, event_logger: Optional[EventLogger] = None,
+                 home_config: Optional[TeamConfig] = None, away_config: Optional[TeamConfig] = None,
+                 log_events: bool = True, grid: Tuple[int, int] = DEFAULT_GRID,
+                 continuous: bool = False, collect_interval: Optional[float] = None,
+                 track_passes: bool = False, home_roster: Optional[List[Dict]] = None,
+                 away_roster: Optional[List[Dict]] = None):
         super().__init__(seed=seed)
         
         # Match settings
+        self.seed = seed
+        self.verbose = verbose  # Print match progress to stdout
         self.match_duration = match_duration  # minutes
+        self.home_config = home_config or DEFAULT_HOME_CONFIG
+        self.away_config = away_config or DEFAULT_AWAY_CONFIG
+        self.rosters = {"Home": home_roster, "Away": away_roster}  # Persistent players, by jersey
+        self.grid = tuple(grid)  # (rows, cols) of pitch zones
+        self.pitch = pitch_grid(*self.grid)
+        self.continuous = continuous  # Players have x/y coordinates; zones derive from them
+        self.spaces = self._create_spaces() if continuous else None
+        self.players_by_id: Dict[int, PlayerAgent] = {}
+        self.pass_network = PassNetwork(self.pitch.zones) if track_passes else None
         self.current_minute = 0
         self.home_score = 0
         self.away_score = 0
-        self.match_id = random.randint(1000, 9999)
+        self.match_id = self.random.randint(1000, 9999)
         
         # Game state
         self.possession_team = "Home"  # Team currently in possession
         self.possession_counter = 1
         self.ball_carrier = None  # PlayerAgent who has the ball
+        self.logger_offset = 0  # Match-wide index of the first event held by event_logger
         
-        # Event logging
-        self.event_logger = EventLogger()
+        # Events are published on the bus; the logger is its default subscriber.
+        # In recording mode only a compact decision trace is kept, and with
+        # log_events=False nothing is logged unless something else subscribes
+        self.event_bus = EventBus()
+        if event_logger is None:
+            event_logger = DecisionTraceRecorder() if record_trace else EventLogger()
+        self.event_logger = event_logger
+        if hasattr(self.event_logger, 'bind'):
+            self.event_logger.bind(self)
+        if log_events:
+            self.event_bus.subscribe(self.event_logger.add)
         
         # Initialize teams
         self._create_teams()
         
+        # Optional team time series, sampled every collect_interval minutes
+        self.collector = TimeSeriesCollector(self, collect_interval) if collect_interval else None
+        
         # Start first possession
         self._start_possession()
         
-        print(f"Football match {self.match_id} initialized: {len(self.agents)} players")
+        if self.verbose:
+            print(f"Football match {self.match_id} initialized: {len(self.agents)} players")
     
     def _create_teams(self):
-        """Create both teams with 11 players each"""
-        
-        # Home team formation (4-4-2)
-        home_formation = [
-            (Position.GOALKEEPER, 1),
-            (Position.DEFENDER, 2), (Position.DEFENDER, 3), 
-            (Position.DEFENDER, 4), (Position.DEFENDER, 5),
-            (Position.MIDFIELDER, 6), (Position.MIDFIELDER, 7),
-            (Position.MIDFIELDER, 8), (Position.MIDFIELDER, 9),
-            (Position.FORWARD, 10), (Position.FORWARD, 11)
-        ]
-        
-        # Away team formation (4-3-3)
-        away_formation = [
-            (Position.GOALKEEPER, 1),
-            (Position.DEFENDER, 2), (Position.DEFENDER, 3),
-            (Position.DEFENDER, 4), (Position.DEFENDER, 5),
-            (Position.MIDFIELDER, 6), (Position.MIDFIELDER, 7), (Position.MIDFIELDER, 8),
-            (Position.FORWARD, 9), (Position.FORWARD, 10), (Position.FORWARD, 11)
-        ]
-        
-        # Create home team
-        for position, jersey_num in home_formation:
-            player = PlayerAgent(self, "Home", position, jersey_num)
-            # Players are automatically added to self.agents in Mesa 3.x
-        
-        # Create away team  
-        for position, jersey_num in away_formation:
-            player = PlayerAgent(self, "Away", position, jersey_num)
-            # Players are automatically added to self.agents in Mesa 3.x
+        """Create both teams with 11 players each from their configurations"""
+        for team, config in (("Home", self.home_config), ("Away", self.away_config)):
+            roster = self.rosters[team]
+            for position, jersey_num in config.lineup():
+                player = PlayerAgent(self, team, Position(position), jersey_num, config)
+                # Players are automatically added to self.agents in Mesa 3.x
+                if roster:
+                    player.apply_roster(roster[jersey_num - 1])
+                self.players_by_id[player.unique_id] = player
+    
+    @staticmethod
+    def _create_spaces() -> Dict[str, SpatialHash]:
+        """One spatial hash per team, so opponent and teammate queries need no filtering"""
+        return {team: SpatialHash(cell_size=PRESSURE_RADIUS) for team in ("Home", "Away")}
     
     def _start_possession(self):
         """Start a new possession sequence"""
@@ -87,9 +109,9 @@ class FootballModel(mesa.Model):
             # Prefer midfielders for possession start
             midfielders = [p for p in team_players if p.position == Position.MIDFIELDER]
             if midfielders:
-                self.ball_carrier = random.choice(midfielders)
+                self.ball_carrier = self.random.choice(midfielders)
             else:
-                self.ball_carrier = random.choice(team_players)
+                self.ball_carrier = self.random.choice(team_players)
             
             # Reset all players' ball possession
             for agent in self.agents:
@@ -127,21 +149,22 @@ class FootballModel(mesa.Model):
         else:
             self.away_score += 1
         
-        print(f"GOAL! {scoring_team} scores! Score: Home {self.home_score} - {self.away_score} Away")
+        if self.verbose:
+            print(f"GOAL! {scoring_team} scores! Score: Home {self.home_score} - {self.away_score} Away")
         
         # Log goal
-        event = {
-            'possession_id': f"M{self.match_id}-GOAL{self.home_score + self.away_score:02d}",
-            'team': scoring_team,
-            'player_id': self.ball_carrier.jersey_number if self.ball_carrier else 0,
-            'action': 'Goal',
-            'zone': self.ball_carrier.zone if self.ball_carrier else 'Unknown',
-            'pressure': 0,
-            'team_status': self.get_team_status(),
-            'outcome': 'Success',
-            'xg_change': 1.0
-        }
-        self.event_logger.add(event)
+        if self.event_bus.wants('Goal'):
+            self.event_bus.publish({
+                'possession_id': f"M{self.match_id}-GOAL{self.home_score + self.away_score:02d}",
+                'team': scoring_team,
+                'player_id': self.ball_carrier.jersey_number if self.ball_carrier else 0,
+                'action': 'Goal',
+                'zone': self.ball_carrier.zone if self.ball_carrier else 'Unknown',
+                'pressure': 0,
+                'team_status': self.get_team_status(),
+                'outcome': 'Success',
+                'xg_change': 1.0
+            })
         
         # Restart with kickoff (opposite team gets possession)
         self.possession_team = "Away" if scoring_team == "Home" else "Home"
@@ -158,18 +181,19 @@ class FootballModel(mesa.Model):
     
     def _log_possession_event(self, action: str):
         """Log possession-related events"""
-        event = {
+        if not self.event_bus.wants(action):
+            return
+        self.event_bus.publish({
             'possession_id': f"M{self.match_id}-P{self.possession_counter:03d}",
             'team': self.possession_team,
             'player_id': 0,  # Team-level event
             'action': action,
-            'zone': 'C3',  # Center of field
+            'zone': self.pitch.centre,  # Center of field
             'pressure': 0,
             'team_status': self.get_team_status(),
             'outcome': 'Success',
             'xg_change': 0.0
-        }
-        self.event_logger.add(event)
+        })
     
     def step(self):
         """Execute one step of the simulation"""
@@ -192,6 +216,27 @@ class FootballModel(mesa.Model):
         
         # Update ball carrier reference
         self._update_ball_carrier()
+        
+        if self.collector is not None:
+            self.collector.step()
+    
+    def skip(self, steps: int) -> int:
+        """
+        Advance the clock by whole steps without playing them
+        
+        The step counter and time-series collector move with the clock, as
+        if nothing happened during those steps. The final whistle is never
+        skipped: it still comes from a played step(). Returns the number of
+        steps skipped.
+        """
+        skipped = 0
+        while skipped < steps and self.running and self.current_minute + 0.1 < self.match_duration:
+            self.steps += 1
+            self.current_minute += 0.1
+            if self.collector is not None:
+                self.collector.step()
+            skipped += 1
+        return skipped
     
     def _update_ball_carrier(self):
         """Update who has the ball"""
@@ -208,40 +253,51 @@ class FootballModel(mesa.Model):
         elif len(ball_carriers) == 0:
             # No one has ball - start new possession
             self.ball_carrier = None
-            if random.random() < 0.3:  # 30% chance to change possession
+            if self.random.random() < 0.3:  # 30% chance to change possession
                 self.change_possession()
     
     def _handle_random_events(self):
         """Handle random match events"""
         # Small chance of random events
-        if random.random() < 0.01:  # 1% chance per step
-            event_type = random.choice(['Foul', 'Tackle', 'Interception'])
+        if self.random.random() < 0.01:  # 1% chance per step
+            event_type = self.random.choice(['Foul', 'Tackle', 'Interception'])
             
             # Choose random players
             all_players = [agent for agent in self.agents if isinstance(agent, PlayerAgent)]
             if all_players:
-                player = random.choice(all_players)
+                player = self.random.choice(all_players)
                 
-                event = {
-                    'possession_id': f"M{self.match_id}-P{self.possession_counter:03d}",
-                    'team': player.team,
-                    'player_id': player.jersey_number,
-                    'action': event_type,
-                    'zone': player.zone,
-                    'pressure': random.randint(0, 1),
-                    'team_status': self.get_team_status(),
-                    'outcome': random.choice(['Success', 'Failure']),
-                    'xg_change': random.uniform(-0.05, 0.05)
-                }
-                self.event_logger.add(event)
+                # Draw every value even when unobserved, so the random stream
+                # does not depend on who is subscribed
+                pressure = self.random.randint(0, 1)
+                outcome = self.random.choice(['Success', 'Failure'])
+                xg_change = self.random.uniform(-0.05, 0.05)
+                if self.event_bus.wants(event_type):
+                    self.event_bus.publish({
+                        'possession_id': f"M{self.match_id}-P{self.possession_counter:03d}",
+                        'team': player.team,
+                        'player_id': player.jersey_number,
+                        'action': event_type,
+                        'zone': player.zone,
+                        'pressure': pressure,
+                        'team_status': self.get_team_status(),
+                        'outcome': outcome,
+                        'xg_change': xg_change
+                    })
                 
                 # Handle specific events
-                if event_type in ['Tackle', 'Interception'] and event['outcome'] == 'Success':
+                if event_type in ['Tackle', 'Interception'] and outcome == 'Success':
                     self.change_possession()
     
     def _end_match(self):
         """End the match and generate final statistics"""
         self.running = False
+        self.event_bus.flush()
+        if self.collector is not None:
+            self.collector.finish()
+        
+        if not self.verbose:
+            return
         
         print(f"\n=== MATCH {self.match_id} FINAL ===")
         print(f"Final Score: Home {self.home_score} - {self.away_score} Away")
@@ -254,6 +310,130 @@ class FootballModel(mesa.Model):
         for action, count in summary.get('actions', {}).items():
             print(f"  {action}: {count}")
     
+    # Match state captured by snapshot(); agents, RNGs and the logger are handled separately
+    SNAPSHOT_FIELDS = (
+        'match_duration', 'current_minute', 'home_score', 'away_score', 'match_id',
+        'possession_team', 'possession_counter', 'running', 'steps',
+        'home_config', 'away_config', 'grid', 'continuous'
+    )
+    
+    def _players(self) -> List[PlayerAgent]:
+        """Players in creation order, which is also their order in self.agents"""
+        return sorted((a for a in self.agents if isinstance(a, PlayerAgent)), key=lambda a: a.unique_id)
+    
+    def snapshot(self) -> bytes:
+        """
+        Capture the full match state as a compact byte string
+        
+        Includes every player's state, the ball carrier, scores, clock,
+        possession counter, both RNG states, the number of events logged
+        so far and the pass network and time-series collector when enabled,
+        so restore() continues exactly where the snapshot was taken.
+        """
+        players = self._players()
+        carrier = players.index(self.ball_carrier) if self.ball_carrier in players else -1
+        state = (
+            tuple(getattr(self, field) for field in self.SNAPSHOT_FIELDS),
+            tuple(player.get_state() for player in players),
+            carrier,
+            self.random.getstate(),
+            self.rng.bit_generator.state,
+            self.logger_offset + self.event_logger.get_event_count(),
+            self.pass_network.get_state() if self.pass_network is not None else None,
+            self.collector.get_state() if self.collector is not None else None
+        )
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def restore(self, snapshot: bytes):
+        """
+        Return the match to a state captured by snapshot()
+        
+        When restoring an earlier state of this same match, events logged
+        after the snapshot are discarded; otherwise the logger is cleared and
+        logger_offset records where the continuation's events start. Pass
+        and time-series trackers are rewound with the match; a tracker the
+        snapshot did not record starts afresh from the restored state.
+        """
+        (fields, player_states, carrier, random_state, rng_state, event_count,
+         network_state, collector_state) = pickle.loads(snapshot)
+        
+        players = self._players()
+        if len(players) != len(player_states):
+            raise ValueError(f"Snapshot has {len(player_states)} players, model has {len(players)}")
+        
+        for field, value in zip(self.SNAPSHOT_FIELDS, fields):
+            setattr(self, field, value)
+        self.pitch = pitch_grid(*self.grid)
+        self.spaces = self._create_spaces() if self.continuous else None
+        for player, state in zip(players, player_states):
+            player.set_state(state)
+            player._config = self.home_config if player.team == "Home" else self.away_config
+            if self.spaces is not None:
+                self.spaces[player.team].insert(player.unique_id, player.x, player.y)
+        self.ball_carrier = players[carrier] if carrier >= 0 else None
+        
+        if self.pass_network is not None:
+            self.pass_network = PassNetwork(self.pitch.zones)
+            if network_state is not None:
+                self.pass_network.set_state(network_state)
+        if self.collector is not None:
+            if collector_state is not None:
+                self.collector.set_state(collector_state)
+            else:
+                self.collector.reset()
+        
+        # Restore the generators in place: the AgentSet holds a reference to self.random
+        self.random.setstate(random_state)
+        self.rng.bit_generator.state = rng_state
+        
+        logged = self.logger_offset + self.event_logger.get_event_count()
+        if isinstance(self.event_logger, EventLogger) and self.logger_offset <= event_count <= logged:
+            del self.event_logger.events[event_count - self.logger_offset:]
+        else:
+            self.event_logger.clear()
+            self.logger_offset = event_count
+    
+    @classmethod
+    def from_snapshot(cls, snapshot: bytes, verbose: bool = False, **kwargs) -> 'FootballModel':
+        """Create a new model positioned at a snapshot"""
+        model = cls(seed=0, verbose=verbose, **kwargs)
+        model.event_logger.clear()
+        model.restore(snapshot)
+        return model
+    
+    def reseed(self, seed: int):
+        """Replace both random streams, e.g. to branch a restored match"""
+        self.seed = seed
+        self.reset_randomizer(seed)
+        self.reset_rng(seed)
+    
+    def fork(self, n: int, seeds: Optional[List[int]] = None, workers: int = 1,
+             until: Optional[float] = None) -> List[Dict]:
+        """
+        Play out n continuations of the current match state
+        
+        Args:
+            n: Number of branches
+            seeds: One seed per branch (defaults to 0..n-1)
+            workers: Number of worker processes (1 runs in this process)
+            until: Stop each branch at this minute instead of full time
+        
+        Returns:
+            Final match statistics of each branch, in seed order
+        """
+        seeds = list(range(n)) if seeds is None else list(seeds)
+        if len(seeds) != n:
+            raise ValueError(f"Expected {n} seeds, got {len(seeds)}")
+        
+        snapshot = self.snapshot()
+        jobs = [(snapshot, seed, until) for seed in seeds]
+        if workers <= 1:
+            return [_run_fork(job) for job in jobs]
+        
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_run_fork, jobs, chunksize=max(1, n // (4 * workers))))
+    
     def export_logs(self, base_filename: str = None):
         """Export event logs to CSV and XES files"""
         if base_filename is None:
@@ -272,6 +452,7 @@ class FootballModel(mesa.Model):
         """Get comprehensive match statistics"""
         stats = {
             'match_id': self.match_id,
+            'seed': self.seed,
             'duration_minutes': self.current_minute,
             'home_score': self.home_score,
             'away_score': self.away_score,
@@ -283,7 +464,27 @@ class FootballModel(mesa.Model):
         return stats
 
 
-def run_match(duration: int = 90, seed: Optional[int] = None, export_logs: bool = True) -> FootballModel:
+def _run_fork(args) -> Dict:
+    """Play one branch of FootballModel.fork()"""
+    snapshot, seed, until = args
+    model = FootballModel.from_snapshot(snapshot)
+    model.reseed(seed)
+    
+    end = model.match_duration if until is None else until
+    while model.running and model.current_minute < end - 1e-9:
+        model.step()
+    
+    stats = model.get_match_stats()
+    stats.pop('event_summary', None)
+    stats['seed'] = seed
+    return stats
+
+
+def run_match(duration: int = 90, seed: Optional[int] = None, export_logs: bool = True,
+              archive=None, cache=None, verbose: bool = True,
+              home_config: Optional[TeamConfig] = None,
+              away_config: Optional[TeamConfig] = None,
+              grid: Tuple[int, int] = DEFAULT_GRID) -> FootballModel:
     """
     Run a complete football match simulation
     
@@ -291,15 +492,61 @@ def run_match(duration: int = 90, seed: Optional[int] = None, export_logs: bool
         duration: Match duration in minutes
         seed: Random seed for reproducibility
         export_logs: Whether to export event logs
+        archive: Optional MatchArchive the finished match is appended to
+        cache: Optional ResultCache; seeded matches already in it are not re-simulated
+        verbose: Print match progress
+        home_config: Home team configuration (defaults to a 4-4-2)
+        away_config: Away team configuration (defaults to a 4-3-3)
+        grid: Pitch zones as (rows, cols)
     
     Returns:
-        FootballModel: The completed match model
+        FootballModel: The completed match model (a CachedMatch on a cache hit)
     """
-    print(f"Starting football match simulation...")
-    print(f"Duration: {duration} minutes")
+    config = {'match_duration': duration, 'seed': seed}
+    if home_config is not None:
+        config['home_config'] = home_config.to_dict()
+    if away_config is not None:
+        config['away_config'] = away_config.to_dict()
+    if tuple(grid) != DEFAULT_GRID:
+        config['grid'] = list(grid)
+    model = cache.get(config) if cache is not None and seed is not None else None
+    
+    if model is not None:
+        if verbose:
+            print(f"Loaded match {model.match_id} from cache: Home {model.home_score} - {model.away_score} Away")
+    else:
+        model = _simulate_match(duration, seed, verbose, home_config, away_config, grid)
+        if cache is not None and seed is not None:
+            cache.put(config, model)
+    
+    # Export logs if requested
+    if export_logs:
+        csv_path, xes_path = model.export_logs()
+        if verbose:
+            print(f"\nLogs exported:")
+            print(f"  CSV: {csv_path}")
+            print(f"  XES: {xes_path}")
+    
+    if archive is not None:
+        entry = archive.append_model(model)
+        if verbose:
+            print(f"Match archived as entry {entry}")
+    
+    return model
+
+
+def _simulate_match(duration: int, seed: Optional[int], verbose: bool,
+                    home_config: Optional[TeamConfig] = None,
+                    away_config: Optional[TeamConfig] = None,
+                    grid: Tuple[int, int] = DEFAULT_GRID) -> FootballModel:
+    """Create a model and step it until the match is over"""
+    if verbose:
+        print(f"Starting football match simulation...")
+        print(f"Duration: {duration} minutes")
     
     # Create and run model
-    model = FootballModel(match_duration=duration, seed=seed)
+    model = FootballModel(match_duration=duration, seed=seed, verbose=verbose,
+                          home_config=home_config, away_config=away_config, grid=grid)
     
     # Run simulation
     steps = 0
@@ -310,20 +557,44 @@ def run_match(duration: int = 90, seed: Optional[int] = None, export_logs: bool
         steps += 1
         
         # Progress indicator
-        if steps % 100 == 0:
+        if verbose and steps % 100 == 0:
             minute = int(model.current_minute)
             print(f"Minute {minute}: Home {model.home_score} - {model.away_score} Away")
     
-    # Export logs if requested
-    if export_logs:
-        csv_path, xes_path = model.export_logs()
-        print(f"\nLogs exported:")
-        print(f"  CSV: {csv_path}")
-        print(f"  XES: {xes_path}")
-    
     return model
 
 
+def _run_batch_match(args) -> Dict:
+    """Process-pool worker for run_batch"""
+    duration, seed, cache = args
+    model = run_match(duration=duration, seed=seed, export_logs=False, cache=cache, verbose=False)
+    stats = model.get_match_stats()
+    stats.pop('event_summary', None)
+    return stats
+
+
+def run_batch(seeds: List[int], duration: int = 90, cache=None, workers: int = 1) -> List[Dict]:
+    """
+    Run one match per seed and return their statistics
+    
+    Args:
+        seeds: Seeds to simulate
+        duration: Match duration in minutes
+        cache: Optional ResultCache shared by all workers
+        workers: Number of worker processes (1 runs in this process)
+    
+    Returns:
+        List of match statistics in seed order
+    """
+    jobs = [(duration, seed, cache) for seed in seeds]
+    if workers <= 1:
+        return [_run_batch_match(job) for job in jobs]
+    
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_batch_match, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+
 if __name__ == "__main__":
     # Run a sample match
     model = run_match(duration=5, seed=42)  # Short 5-minute match for testing
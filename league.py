@@ -0,0 +1,310 @@
+"""
+League Simulator
+Persistent teams, double round-robin fixtures and parallel season projections
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from football_simulation import FootballModel
+from team_config import ATTRIBUTES, TeamConfig
+
+# Seeds of a season's fixtures are season_seed * FIXTURE_STRIDE + fixture index
+FIXTURE_STRIDE = 10_000
+
+POINTS = {'win': 3, 'draw': 1, 'loss': 0}
+
+
+@dataclass
+class LeagueTeam:
+    """
+    A club whose players persist from match to match
+
+    The roster holds one attribute dict per jersey number, drawn once from
+    the team's configuration, so every fixture fields the same eleven.
+    """
+    name: str
+    config: TeamConfig = field(default_factory=TeamConfig)
+    roster: List[Dict[str, Any]] = field(default_factory=list)
+
+    @classmethod
+    def generate(cls, name: str, config: Optional[TeamConfig] = None, seed: Optional[int] = None) -> 'LeagueTeam':
+        """Draw a roster the way PlayerAgent draws its attributes"""
+        config = config or TeamConfig()
+        rng = np.random.default_rng(seed)
+        roster = []
+        for position, jersey in config.lineup():
+            player = {'jersey': jersey, 'position': position}
+            for attribute in ATTRIBUTES:
+                base = config.attribute_base(attribute, position)
+                player[attribute] = max(10, min(99, int(rng.normal(base, config.attribute_spread))))
+            player['pressure_tolerance'] = float(rng.uniform(*config.pressure_tolerance_range))
+            player['risk_taking'] = float(rng.uniform(*config.risk_taking_range))
+            roster.append(player)
+        return cls(name, config, roster)
+
+    @property
+    def rating(self) -> float:
+        """Mean outfield attribute, a rough strength indicator"""
+        return float(np.mean([[p[a] for a in ATTRIBUTES] for p in self.roster]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'name': self.name, 'config': self.config.to_dict(), 'roster': self.roster}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'LeagueTeam':
+        return cls(data['name'], TeamConfig.from_dict(data['config']), list(data['roster']))
+
+
+def double_round_robin(n: int) -> List[List[Tuple[int, int]]]:
+    """
+    Rounds of (home, away) team indices in which everyone meets twice
+
+    Circle method: team 0 stays put while the rest rotate, and home
+    advantage alternates round by round. The second half repeats the
+    first with venues swapped. An odd league gets a bye slot.
+    """
+    teams = list(range(n)) + ([None] if n % 2 else [])
+    size = len(teams)
+    first_half = []
+    for r in range(size - 1):
+        pairs = []
+        for i in range(size // 2):
+            a, b = teams[i], teams[size - 1 - i]
+            if a is None or b is None:
+                continue
+            pairs.append((a, b) if (r + i) % 2 == 0 else (b, a))
+        first_half.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return first_half + [[(away, home) for home, away in pairs] for pairs in first_half]
+
+
+def fixtures(n: int) -> List[Tuple[int, int, int]]:
+    """Flat (round, home, away) list of a double round-robin"""
+    return [(r, home, away) for r, pairs in enumerate(double_round_robin(n)) for home, away in pairs]
+
+
+def standings_order(points: np.ndarray, goal_difference: np.ndarray, goals_for: np.ndarray) -> np.ndarray:
+    """Team indices from first to last: points, then goal difference, then goals scored"""
+    # lexsort sorts by the last key first; negate for descending order
+    return np.lexsort((np.arange(len(points)), -goals_for, -goal_difference, -points))
+
+
+@dataclass
+class SeasonResult:
+    """Final table of one simulated season, as per-team arrays"""
+    season: int
+    points: np.ndarray
+    goals_for: np.ndarray
+    goals_against: np.ndarray
+    wins: np.ndarray
+    draws: np.ndarray
+    losses: np.ndarray
+
+    @property
+    def goal_difference(self) -> np.ndarray:
+        return self.goals_for - self.goals_against
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Finishing position (1 = champion) of each team"""
+        order = standings_order(self.points, self.goal_difference, self.goals_for)
+        positions = np.empty(len(order), dtype=np.int64)
+        positions[order] = np.arange(1, len(order) + 1)
+        return positions
+
+    def table(self, names: Sequence[str]) -> pd.DataFrame:
+        frame = pd.DataFrame({
+            'team': list(names), 'played': self.wins + self.draws + self.losses,
+            'won': self.wins, 'drawn': self.draws, 'lost': self.losses,
+            'goals_for': self.goals_for, 'goals_against': self.goals_against,
+            'goal_difference': self.goal_difference, 'points': self.points,
+        })
+        frame.index = self.positions
+        return frame.sort_index().rename_axis('position')
+
+
+def play_season(teams: List[Dict[str, Any]], season: int, match_duration: int = 90,
+                log_dir: Optional[str] = None) -> SeasonResult:
+    """
+    Play every fixture of one season and build its table
+
+    Event logging is switched off unless log_dir is given, in which case
+    each fixture's log is written there as CSV.
+    """
+    n = len(teams)
+    configs = [TeamConfig.from_dict(team['config']) for team in teams]
+    goals_for = np.zeros(n, dtype=np.int64)
+    goals_against = np.zeros(n, dtype=np.int64)
+    wins = np.zeros(n, dtype=np.int64)
+    draws = np.zeros(n, dtype=np.int64)
+    losses = np.zeros(n, dtype=np.int64)
+
+    for index, (round_number, home, away) in enumerate(fixtures(n)):
+        model = FootballModel(match_duration=match_duration, seed=season * FIXTURE_STRIDE + index,
+                              verbose=False, log_events=log_dir is not None,
+                              home_config=configs[home], away_config=configs[away],
+                              home_roster=teams[home]['roster'], away_roster=teams[away]['roster'])
+        while model.running:
+            model.step()
+
+        home_goals, away_goals = model.home_score, model.away_score
+        goals_for[[home, away]] += (home_goals, away_goals)
+        goals_against[[home, away]] += (away_goals, home_goals)
+        if home_goals > away_goals:
+            wins[home] += 1
+            losses[away] += 1
+        elif home_goals < away_goals:
+            wins[away] += 1
+            losses[home] += 1
+        else:
+            draws[[home, away]] += 1
+
+        if log_dir is not None:
+            path = os.path.join(log_dir, f"season{season:05d}_r{round_number + 1:02d}_"
+                                         f"{teams[home]['name']}_v_{teams[away]['name']}.csv")
+            pd.DataFrame(model.event_logger.to_columns()).to_csv(path, index=False)
+
+    points = POINTS['win'] * wins + POINTS['draw'] * draws
+    return SeasonResult(season, points, goals_for, goals_against, wins, draws, losses)
+
+
+def _play_seasons(args) -> List[SeasonResult]:
+    """Process-pool worker: a batch of consecutive seasons"""
+    teams, seasons, match_duration, log_dir = args
+    return [play_season(teams, season, match_duration, log_dir) for season in seasons]
+
+
+class LeagueProjection:
+    """
+    Running totals over simulated seasons
+
+    Only per-team sums and an N x N finishing-position count matrix are
+    kept, so memory does not grow with the number of seasons and partial
+    projections (e.g. from different machines) merge by addition.
+    """
+
+    def __init__(self, names: Sequence[str]):
+        self.names = list(names)
+        n = len(self.names)
+        self.seasons = 0
+        self.position_counts = np.zeros((n, n), dtype=np.int64)
+        self.points = np.zeros(n)
+        self.points_sq = np.zeros(n)
+        self.goal_difference = np.zeros(n)
+        self.goals_for = np.zeros(n)
+
+    def update(self, result: SeasonResult) -> 'LeagueProjection':
+        self.seasons += 1
+        self.position_counts[np.arange(len(self.names)), result.positions - 1] += 1
+        self.points += result.points
+        self.points_sq += result.points.astype(float) ** 2
+        self.goal_difference += result.goal_difference
+        self.goals_for += result.goals_for
+        return self
+
+    def merge(self, other: 'LeagueProjection') -> 'LeagueProjection':
+        if other.names != self.names:
+            raise ValueError("Projections cover different leagues")
+        self.seasons += other.seasons
+        self.position_counts += other.position_counts
+        self.points += other.points
+        self.points_sq += other.points_sq
+        self.goal_difference += other.goal_difference
+        self.goals_for += other.goals_for
+        return self
+
+    def position_distribution(self) -> pd.DataFrame:
+        """Probability of each team finishing in each position"""
+        return pd.DataFrame(self.position_counts / max(1, self.seasons), index=self.names,
+                            columns=range(1, len(self.names) + 1))
+
+    def summary(self, top: int = 1, bottom: int = 1) -> pd.DataFrame:
+        """Expected table with title and bottom-`bottom` probabilities"""
+        seasons = max(1, self.seasons)
+        mean_points = self.points / seasons
+        distribution = self.position_counts / seasons
+        frame = pd.DataFrame({
+            'team': self.names,
+            'points': mean_points,
+            'points_sd': np.sqrt(np.maximum(self.points_sq / seasons - mean_points ** 2, 0)),
+            'goal_difference': self.goal_difference / seasons,
+            'goals_for': self.goals_for / seasons,
+            'mean_position': distribution @ np.arange(1, len(self.names) + 1),
+            f'top_{top}': distribution[:, :top].sum(axis=1),
+            f'bottom_{bottom}': distribution[:, -bottom:].sum(axis=1),
+        })
+        return frame.sort_values('mean_position').reset_index(drop=True)
+
+
+def iter_seasons(teams: List[LeagueTeam], seasons: int, match_duration: int = 90,
+                 workers: Optional[int] = None, first_season: int = 0, batch: int = 1,
+                 log_dir: Optional[str] = None) -> Iterator[SeasonResult]:
+    """Yield season results as a process pool completes them, in season order"""
+    payload = [team.to_dict() for team in teams]
+    numbers = list(range(first_season, first_season + seasons))
+    jobs = [(payload, numbers[i:i + batch], match_duration, log_dir) for i in range(0, len(numbers), batch)]
+    if log_dir is not None:
+        os.makedirs(log_dir, exist_ok=True)
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for job in jobs:
+            yield from _play_seasons(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for results in pool.map(_play_seasons, jobs):
+            yield from results
+
+
+def project_league(teams: List[LeagueTeam], seasons: int, match_duration: int = 90,
+                   workers: Optional[int] = None, first_season: int = 0, batch: int = 1,
+                   log_dir: Optional[str] = None, verbose: bool = True) -> LeagueProjection:
+    """
+    Simulate many seasons of a league and aggregate the tables as they finish
+
+    Args:
+        teams: The league's clubs
+        seasons: Number of seasons to simulate
+        match_duration: Minutes per match
+        workers: Worker processes (defaults to the CPU count)
+        first_season: Season number of the first season; seeds derive from it
+        batch: Seasons per pool task
+        log_dir: Write every fixture's event log here as CSV (off by default)
+        verbose: Print progress
+    """
+    projection = LeagueProjection([team.name for team in teams])
+    start = time.perf_counter()
+    for result in iter_seasons(teams, seasons, match_duration, workers, first_season, batch, log_dir):
+        projection.update(result)
+        if verbose and (projection.seasons % max(1, seasons // 10) == 0 or projection.seasons == seasons):
+            print(f"  {projection.seasons}/{seasons} seasons ({time.perf_counter() - start:.1f}s)")
+    return projection
+
+
+if __name__ == "__main__":
+    formations = ['4-4-2', '4-3-3', '3-5-2', '4-5-1', '5-3-2', '3-4-3']
+    teams = [LeagueTeam.generate(f"Club{i + 1}", TeamConfig(formation=formation, attribute_mean=44 + 3 * i),
+                                 seed=i)
+             for i, formation in enumerate(formations)]
+    for team in teams:
+        print(f"{team.name}: {team.config.formation}, rating {team.rating:.1f}")
+
+    rounds = double_round_robin(len(teams))
+    print(f"\n{len(rounds)} rounds, {sum(len(r) for r in rounds)} fixtures per season")
+
+    first = play_season([team.to_dict() for team in teams], season=0, match_duration=30)
+    print("\nSeason 0 table:")
+    print(first.table([team.name for team in teams]).to_string())
+
+    print("\nProjecting 20 seasons of 30-minute matches:")
+    projection = project_league(teams, seasons=20, match_duration=30, workers=max(2, os.cpu_count() or 1), batch=2)
+    print(projection.summary(top=1, bottom=1).round(3).to_string())
+    print("\nFinishing-position distribution:")
+    print(projection.position_distribution().round(3).to_string())
@@ -0,0 +1,264 @@
+"""
+Live Event Feed
+Asyncio TCP server that streams match events to subscribers as NDJSON
+"""
+
+import asyncio
+import json
+import socket
+import time
+from typing import Dict, List, Any, AsyncIterator, Optional, Set, Union
+
+from football_simulation import FootballModel
+
+
+# Marker sent to every subscriber once all matches have finished
+END_OF_FEED = {'type': 'end'}
+
+POLICIES = ('drop', 'disconnect')
+
+
+class _Subscriber:
+    """One connected client and its bounded queue of pending batches"""
+
+    def __init__(self, writer: asyncio.StreamWriter, queue_size: int):
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.sent_bytes = 0
+        self.task: Optional[asyncio.Task] = None
+
+
+class LiveFeedServer:
+    """
+    Broadcast the events of running matches to any number of TCP clients
+
+    Every tick each match advances one step; the events it published on
+    its event bus are encoded once as newline-delimited JSON and the same
+    bytes are queued for every subscriber, so encoding cost does not grow
+    with the audience.
+    Each subscriber has a bounded queue drained by its own writer task, and
+    send_buffer caps the socket and transport buffers behind it. When a
+    slow client's queue is full the 'drop' policy discards its oldest
+    batch and 'disconnect' closes the connection.
+    """
+
+    def __init__(self, matches: List[Union[FootballModel, Dict[str, Any]]], host: str = '127.0.0.1',
+                 port: int = 0, queue_size: int = 256, policy: str = 'drop',
+                 tick_interval: float = 0.0, backlog: int = 1024,
+                 send_buffer: Optional[int] = 64 * 1024):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.models = [m if isinstance(m, FootballModel) else FootballModel(verbose=False, **m)
+                       for m in matches]
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.policy = policy
+        self.tick_interval = tick_interval
+        self.backlog = backlog  # Room for hundreds of dashboards connecting at once
+        self.send_buffer = send_buffer
+
+        # Events published during the current tick, collected from each match's
+        # bus; the first tick also sends whatever was logged before we subscribed
+        self._pending: List[List[Dict[str, Any]]] = [list(m.event_logger.events) for m in self.models]
+        for model, pending in zip(self.models, self._pending):
+            model.event_bus.subscribe(pending.append)
+        self.subscribers: Set[_Subscriber] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.stats = {'ticks': 0, 'events': 0, 'batches': 0, 'bytes': 0,
+                      'dropped_batches': 0, 'disconnected': 0}
+
+    async def start(self):
+        """Start listening; the bound port is available as self.port"""
+        self._server = await asyncio.start_server(self._accept, self.host, self.port,
+                                                  backlog=self.backlog)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.send_buffer:
+            # Cap what the kernel and transport buffer per client, so a stalled
+            # client backs up into its bounded queue instead of into memory
+            writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.send_buffer)
+            writer.transport.set_write_buffer_limits(high=self.send_buffer)
+        subscriber = _Subscriber(writer, self.queue_size)
+        subscriber.task = asyncio.create_task(self._pump(subscriber))
+        self.subscribers.add(subscriber)
+
+    async def _pump(self, subscriber: _Subscriber):
+        """Write queued batches to one client until it disconnects or the feed ends"""
+        try:
+            while True:
+                batch = await subscriber.queue.get()
+                subscriber.queue.task_done()
+                if batch is None:
+                    break
+                subscriber.writer.write(batch)
+                subscriber.sent_bytes += len(batch)
+                await subscriber.writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            subscriber.writer.close()
+
+    def _disconnect(self, subscriber: _Subscriber):
+        self.subscribers.discard(subscriber)
+        self.stats['disconnected'] += 1
+        if subscriber.task is not None:
+            subscriber.task.cancel()
+
+    def broadcast(self, batch: bytes):
+        """Queue one encoded batch for every subscriber"""
+        self.stats['batches'] += 1
+        self.stats['bytes'] += len(batch)
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(batch)
+            except asyncio.QueueFull:
+                if self.policy == 'disconnect':
+                    self._disconnect(subscriber)
+                    continue
+                subscriber.queue.get_nowait()
+                subscriber.queue.task_done()
+                subscriber.queue.put_nowait(batch)
+                subscriber.dropped += 1
+                self.stats['dropped_batches'] += 1
+
+    def _tick(self) -> bytes:
+        """Step every running match and encode the events logged meanwhile"""
+        lines = []
+        for i, model in enumerate(self.models):
+            if not model.running:
+                continue
+            model.step()
+            pending = self._pending[i]
+            for event in pending:
+                lines.append(json.dumps({'match_id': model.match_id,
+                                         'minute': round(model.current_minute, 1), **event}))
+            pending.clear()
+        self.stats['ticks'] += 1
+        self.stats['events'] += len(lines)
+        return ('\n'.join(lines) + '\n').encode('utf-8') if lines else b''
+
+    async def run_matches(self):
+        """Play all matches to full time, broadcasting once per tick"""
+        while any(model.running for model in self.models):
+            batch = self._tick()
+            if batch:
+                self.broadcast(batch)
+            # Yield to the writer tasks even when not pacing
+            await asyncio.sleep(self.tick_interval)
+        self.broadcast((json.dumps(END_OF_FEED) + '\n').encode('utf-8'))
+
+    async def close(self, timeout: float = 10.0):
+        """Let subscribers drain their queues, then close every connection"""
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                self._disconnect(subscriber)
+        tasks = [s.task for s in list(self.subscribers) if s.task is not None]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def subscribe(host: str, port: int) -> AsyncIterator[Dict[str, Any]]:
+    """Yield events from a live feed until it ends or the connection closes"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            event = json.loads(line)
+            if event == END_OF_FEED:
+                break
+            yield event
+    finally:
+        writer.close()
+
+
+async def _count_events(host: str, port: int, limit: int = 2**20) -> int:
+    reader, writer = await asyncio.open_connection(host, port, limit=limit)
+    count = 0
+    end = (json.dumps(END_OF_FEED) + '\n').encode('utf-8')
+    try:
+        while True:
+            line = await reader.readline()
+            if not line or line == end:
+                break
+            count += 1
+    finally:
+        writer.close()
+    return count
+
+
+async def _stalled_client(host: str, port: int, done: asyncio.Event):
+    """Connect and never read, like a frozen dashboard"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)  # Back-pressure shows up sooner
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (host, port))
+    _, writer = await asyncio.open_connection(sock=sock)
+    await done.wait()
+    writer.close()
+
+
+async def benchmark(clients: int = 200, slow_clients: int = 5, matches: int = 2,
+                    duration: int = 5, queue_size: int = 64, policy: str = 'drop') -> Dict[str, Any]:
+    """
+    Measure event fan-out to many local subscribers
+
+    Runs `matches` matches as fast as possible while `clients` readers and
+    `slow_clients` stalled connections are subscribed.
+    """
+    server = LiveFeedServer([{'match_duration': duration, 'seed': i} for i in range(matches)],
+                            queue_size=queue_size, policy=policy)
+    await server.start()
+
+    readers = [asyncio.create_task(_count_events(server.host, server.port)) for _ in range(clients)]
+    stalled_done = asyncio.Event()
+    stalled = [asyncio.create_task(_stalled_client(server.host, server.port, stalled_done))
+               for _ in range(slow_clients)]
+    while len(server.subscribers) < clients + slow_clients:
+        await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    await server.run_matches()
+    await server.close()
+    received = await asyncio.gather(*readers)
+    elapsed = time.perf_counter() - start
+    stalled_done.set()
+    await asyncio.gather(*stalled)
+
+    complete = sum(1 for count in received if count == server.stats['events'])
+    return {
+        'clients': clients,
+        'slow_clients': slow_clients,
+        'events': server.stats['events'],
+        'ticks': server.stats['ticks'],
+        'elapsed': elapsed,
+        'delivered': sum(received),
+        'fanout_events_per_second': sum(received) / elapsed,
+        'clients_with_full_feed': complete,
+        'dropped_batches': server.stats['dropped_batches'],
+        'disconnected': server.stats['disconnected'],
+    }
+
+
+if __name__ == "__main__":
+    for policy in POLICIES:
+        result = asyncio.run(benchmark(clients=300, slow_clients=5, matches=2, duration=20,
+                                       queue_size=32, policy=policy))
+        print(f"policy={policy}: {result['events']} events in {result['ticks']} ticks to "
+              f"{result['clients']} readers + {result['slow_clients']} stalled clients")
+        print(f"  {result['delivered']:,} events delivered in {result['elapsed']:.2f}s "
+              f"({result['fanout_events_per_second']:,.0f} events/s fan-out)")
+        print(f"  {result['clients_with_full_feed']}/{result['clients']} readers got every event; "
+              f"{result['dropped_batches']} batches dropped, {result['disconnected']} clients disconnected")
@@ -0,0 +1,344 @@
+"""
+Log Merge
+Streams many per-match CSV/XES logs into one multi-match CSV or XES file
+"""
+
+import csv
+import heapq
+import itertools
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+from xml.sax.saxutils import quoteattr
+
+from utils_logger import EVENT_COLUMNS, EVENT_DEFAULTS
+from xes_reader import iter_xes_chunks
+
+ORDERS = ('timestamp', 'match')
+
+# Default case ID rewrite: source file number, then the original possession ID
+CASE_FORMAT = "{index:05d}-{case}"
+
+# Most runs merged at once, kept well under the usual open-file limit
+DEFAULT_FAN_IN = 256
+
+# Fixed-width sort key for timestamps, so keys compare as strings
+TIME_KEY_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+# XES attribute types of the logger's columns; everything else is a string
+XES_TYPES = {
+    'player_id': 'int',
+    'pressure': 'int',
+    'receiver_id': 'int',
+    'xg_change': 'float',
+    'timestamp': 'date',
+}
+
+XES_HEADER = '''<?xml version="1.0" encoding="UTF-8" ?>
+<log xes.version="1.0" xes.features="nested-attributes" openxes.version="1.0RC7">
+  <extension name="Lifecycle" prefix="lifecycle" uri="http://www.xes-standard.org/lifecycle.xesext"/>
+  <extension name="Organizational" prefix="org" uri="http://www.xes-standard.org/org.xesext"/>
+  <extension name="Time" prefix="time" uri="http://www.xes-standard.org/time.xesext"/>
+  <extension name="Concept" prefix="concept" uri="http://www.xes-standard.org/concept.xesext"/>
+  <global scope="trace">
+    <string key="concept:name" value="UNKNOWN"/>
+  </global>
+  <global scope="event">
+    <string key="concept:name" value="UNKNOWN"/>
+    <string key="lifecycle:transition" value="complete"/>
+  </global>
+'''
+
+
+def _log_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in ('.csv', '.xes'):
+        raise ValueError(f"Unsupported log format {extension!r} for {path}; expected .csv or .xes")
+    return extension[1:]
+
+
+def iter_log_events(path: str, chunk_size: int = 10000) -> Iterator[List[Any]]:
+    """
+    Stream the events of a CSV or XES match log as rows in EVENT_COLUMNS order
+
+    Columns a log lacks (e.g. receiver_id in logs written before it existed)
+    get the logger's defaults. Values are passed through as read.
+    """
+    if _log_format(path) == 'xes':
+        for chunk in iter_xes_chunks(path, EVENT_COLUMNS, chunk_size):
+            yield from (list(row) for row in zip(*(chunk[col] for col in EVENT_COLUMNS)))
+        return
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        position = {col: i for i, col in enumerate(header)}
+        layout = [(position.get(col), EVENT_DEFAULTS.get(col, 'Unknown')) for col in EVENT_COLUMNS]
+        for record in reader:
+            yield [default if i is None else record[i] for i, default in layout]
+
+
+def _time_key(timestamp: Any) -> str:
+    """Sortable fixed-width UTC form of an event timestamp"""
+    moment = timestamp if isinstance(timestamp, datetime) else datetime.fromisoformat(str(timestamp))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime(TIME_KEY_FORMAT)
+
+
+class CsvLogWriter:
+    """Writes events as CSV rows under an EVENT_COLUMNS header"""
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EVENT_COLUMNS)
+
+    def write(self, row: List[Any]):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class XesLogWriter:
+    """
+    Writes events as XES, one trace per run of consecutive events of a case
+
+    Events carry every logger column plus the standard concept, time and
+    org keys, so both pm4py and xes_reader read the merged log back.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(XES_HEADER)
+        self._case = None
+        self._case_index = EVENT_COLUMNS.index('possession_id')
+
+    def write(self, row: List[Any]):
+        case = row[self._case_index]
+        if case != self._case:
+            if self._case is not None:
+                self._file.write('  </trace>\n')
+            self._file.write(f'  <trace>\n    <string key="concept:name" value={quoteattr(str(case))}/>\n')
+            self._case = case
+
+        event = dict(zip(EVENT_COLUMNS, row))
+        lines = [
+            f'      <string key="concept:name" value={quoteattr(str(event["action"]))}/>',
+            f'      <date key="time:timestamp" value={quoteattr(str(event["timestamp"]))}/>',
+            f'      <string key="org:resource" value={quoteattr(str(event["player_id"]))}/>',
+        ]
+        lines.extend(f'      <{XES_TYPES.get(col, "string")} key="{col}" value={quoteattr(str(value))}/>'
+                     for col, value in event.items())
+        self._file.write('    <event>\n' + '\n'.join(lines) + '\n    </event>\n')
+
+    def close(self):
+        if self._case is not None:
+            self._file.write('  </trace>\n')
+        self._file.write('</log>\n')
+        self._file.close()
+
+
+WRITERS = {'csv': CsvLogWriter, 'xes': XesLogWriter}
+
+
+def _rewritten(index: int, path: str, case_format: str, chunk_size: int) -> Iterator[List[Any]]:
+    """Events of one source with globally unique case IDs"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    case_index = EVENT_COLUMNS.index('possession_id')
+    cases: Dict[Any, str] = {}
+    for row in iter_log_events(path, chunk_size):
+        case = row[case_index]
+        if case not in cases:
+            cases[case] = case_format.format(index=index, stem=stem, case=case)
+        row[case_index] = cases[case]
+        yield row
+
+
+def _sorted_run(index: int, path: str, case_format: str, chunk_size: int,
+                whole_cases: bool, run_path: str) -> str:
+    """
+    Sort one match log into a temporary run file, each row prefixed by its merge key
+
+    The key is the event's time, or with whole_cases the time its case
+    started, so that every case stays contiguous after merging. Only one
+    match is held in memory.
+    """
+    time_index = EVENT_COLUMNS.index('timestamp')
+    case_index = EVENT_COLUMNS.index('possession_id')
+    rows = list(_rewritten(index, path, case_format, chunk_size))
+    try:
+        times = [_time_key(row[time_index]) for row in rows]
+    except ValueError as error:
+        raise ValueError(f"Cannot merge {path} by timestamp: {error}") from None
+
+    if whole_cases:
+        starts: Dict[Any, str] = {}
+        for row, moment in zip(rows, times):
+            case = row[case_index]
+            if moment < starts.get(case, '~'):
+                starts[case] = moment
+        keys = [f"{starts[row[case_index]]}|{row[case_index]}|{moment}|{seq:09d}"
+                for seq, (row, moment) in enumerate(zip(rows, times))]
+    else:
+        keys = [f"{moment}|{index:09d}|{seq:09d}" for seq, moment in enumerate(times)]
+
+    order = sorted(range(len(rows)), key=keys.__getitem__)
+    with open(run_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerows([keys[i]] + rows[i] for i in order)
+    return run_path
+
+
+def _read_run(path: str) -> Iterator[List[str]]:
+    with open(path, newline='', encoding='utf-8') as f:
+        yield from csv.reader(f)
+
+
+def _merge_runs(paths: List[str]) -> Iterator[List[str]]:
+    """Heap merge of sorted run files on their key column"""
+    return heapq.merge(*(_read_run(path) for path in paths), key=itemgetter(0))
+
+
+def merge_logs(paths: Iterable[str], output: str, order: str = 'timestamp',
+               case_format: str = CASE_FORMAT, fan_in: int = DEFAULT_FAN_IN,
+               chunk_size: int = 10000, temp_dir: Optional[str] = None) -> int:
+    """
+    Merge per-match logs (e.g. from FootballModel.export_logs) into one log
+
+    Inputs are streamed, never concatenated: with order='match' each log is
+    copied through in turn; with order='timestamp' each log is sorted into
+    a temporary run (one match in memory at a time) and the runs are
+    combined by a k-way heap merge, in several passes if there are more
+    than fan_in of them. Peak memory therefore depends on the largest match
+    and fan_in, not on the number of logs.
+
+    Possession IDs only carry a 4-digit match ID, so case IDs are rewritten
+    with case_format, which may use {index} (position of the log in paths),
+    {stem} (its file name without extension) and {case} (the original ID).
+
+    A CSV output is merged event by event. XES groups events into traces,
+    so for an XES output the timestamp merge orders whole cases by their
+    first event and keeps each case's events together.
+
+    Args:
+        paths: Per-match .csv or .xes logs
+        output: Merged log to write; .csv or .xes
+        order: 'timestamp' or 'match'
+        case_format: Format string for the rewritten case IDs
+        fan_in: Most run files merged at once
+        chunk_size: Events per chunk when streaming XES inputs
+        temp_dir: Where to put the runs (defaults to the system temp directory)
+
+    Returns:
+        Number of events written
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}, got {order!r}")
+    if fan_in < 2:
+        raise ValueError("fan_in must be at least 2")
+    paths = list(paths)
+    for path in paths:
+        _log_format(path)
+    writer = WRITERS[_log_format(output)]
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+
+    if order == 'match':
+        events = itertools.chain.from_iterable(
+            _rewritten(index, path, case_format, chunk_size) for index, path in enumerate(paths))
+        return _write(writer(output), events)
+
+    work = tempfile.mkdtemp(prefix='log_merge_', dir=temp_dir)
+    try:
+        whole_cases = writer is XesLogWriter
+        runs = [_sorted_run(index, path, case_format, chunk_size, whole_cases,
+                            os.path.join(work, f"run0_{index:06d}.csv"))
+                for index, path in enumerate(paths)]
+
+        level = 0
+        while len(runs) > fan_in:
+            level += 1
+            merged = []
+            for start in range(0, len(runs), fan_in):
+                group = runs[start:start + fan_in]
+                merged_path = os.path.join(work, f"run{level}_{start // fan_in:06d}.csv")
+                with open(merged_path, 'w', newline='', encoding='utf-8') as f:
+                    csv.writer(f).writerows(_merge_runs(group))
+                for path in group:
+                    os.remove(path)
+                merged.append(merged_path)
+            runs = merged
+
+        return _write(writer(output), (row[1:] for row in _merge_runs(runs)))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+def _write(writer, events: Iterator[List[Any]]) -> int:
+    count = 0
+    try:
+        for row in events:
+            writer.write(row)
+            count += 1
+    finally:
+        writer.close()
+    return count
+
+
+if __name__ == "__main__":
+    import contextlib
+    import io
+    import sys
+    import time
+    import tracemalloc
+    from football_simulation import FootballModel
+
+    if len(sys.argv) > 2:
+        # python log_merge.py OUTPUT INPUT...
+        start = time.perf_counter()
+        count = merge_logs(sys.argv[2:], sys.argv[1])
+        print(f"Merged {len(sys.argv) - 2} logs, {count} events, into {sys.argv[1]} "
+              f"in {time.perf_counter() - start:.1f}s")
+        sys.exit()
+
+    work = tempfile.mkdtemp(prefix='log_merge_demo_')
+    try:
+        # Per-match logs as export_logs writes them, alternating formats
+        inputs = []
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            for seed in range(12):
+                model = FootballModel(match_duration=10, seed=seed, verbose=False)
+                while model.running:
+                    model.step()
+                csv_path, xes_path = model.export_logs(os.path.join(work, f"match_{seed:02d}"))
+                inputs.append(xes_path if seed % 2 else csv_path)
+        total = sum(1 for path in inputs for _ in iter_log_events(path))
+        print(f"{len(inputs)} per-match logs, {total} events")
+
+        for order in ORDERS:
+            for extension in ('csv', 'xes'):
+                output = os.path.join(work, f"merged_{order}.{extension}")
+                tracemalloc.start()
+                start = time.perf_counter()
+                count = merge_logs(inputs, output, order=order, fan_in=4)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                rows = list(iter_log_events(output))
+                assert count == total == len(rows)
+                cases = [row[0] for row in rows]
+                blocks = sum(1 for _ in itertools.groupby(cases))
+                times = [_time_key(row[1]) for row in rows]
+                in_order = all(a <= b for a, b in zip(times, times[1:]))
+                print(f"  {order:>9} -> {extension}: {count} events, {len(set(cases))} cases in "
+                      f"{blocks} blocks, chronological={in_order}, {elapsed:.2f}s, "
+                      f"peak {peak / 1024:.0f} KiB")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
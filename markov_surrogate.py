@@ -0,0 +1,294 @@
+"""
+Markov-Chain Surrogate
+A fast match generator fitted from event logs of the agent model
+"""
+
+import time
+from collections import Counter
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import stats
+
+from football_simulation import FootballModel
+from utils_logger import columns_of
+
+
+# Fields that make up a chain state
+STATE_FIELDS = ('team', 'zone', 'action', 'outcome')
+
+# Off-ball chatter that says nothing about where the ball goes
+DEFAULT_SKIP_ACTIONS = ('SupportRequest',)
+
+# Bookkeeping events that do not count towards a possession's length
+POSSESSION_MARKERS = ('PossessionStart', 'PossessionEnd')
+
+MAX_POSSESSION_LENGTH = 200
+
+
+def match_tokens(log, skip_actions: Sequence[str] = DEFAULT_SKIP_ACTIONS) -> List[Tuple[str, ...]]:
+    """The sequence of chain states in one match log"""
+    columns = columns_of(log, STATE_FIELDS)
+    skip = set(skip_actions)
+    return [state for state in zip(*(columns[field] for field in STATE_FIELDS))
+            if state[2] not in skip]
+
+
+def token_summary(tokens: List[Tuple[str, ...]]) -> Dict[str, Any]:
+    """Goals, possessions and possession lengths (in events) of a token sequence"""
+    goals = Counter(team for team, _, action, _ in tokens if action == 'Goal')
+    lengths, current = [], None
+    for _, _, action, _ in tokens:
+        if action == 'PossessionStart':
+            if current is not None:
+                lengths.append(current)
+            current = 0
+        elif current is not None and action not in POSSESSION_MARKERS:
+            current += 1
+    if current is not None:
+        lengths.append(current)
+    return {'home_goals': goals['Home'], 'away_goals': goals['Away'], 'possession_lengths': lengths}
+
+
+def _alias_tables(probabilities: List[np.ndarray], width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Vose alias tables for rows of different lengths, padded to width"""
+    prob = np.ones((len(probabilities), width))
+    alias = np.zeros((len(probabilities), width), dtype=np.int64)
+    for row, p in enumerate(probabilities):
+        k = len(p)
+        scaled = p * k
+        small = [i for i in range(k) if scaled[i] < 1.0]
+        large = [i for i in range(k) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[row, s] = scaled[s]
+            alias[row, s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            prob[row, i] = 1.0
+            alias[row, i] = i
+    return prob, alias
+
+
+class SurrogateResult:
+    """Scores and possession statistics of a batch of surrogate matches"""
+
+    def __init__(self, home_goals: np.ndarray, away_goals: np.ndarray,
+                 possession_lengths: np.ndarray, elapsed: float):
+        self.home_goals = home_goals
+        self.away_goals = away_goals
+        self.possession_lengths = possession_lengths  # Histogram, index = length in events
+        self.elapsed = elapsed
+
+    @property
+    def matches(self) -> int:
+        return len(self.home_goals)
+
+    @property
+    def matches_per_second(self) -> float:
+        return self.matches / self.elapsed if self.elapsed else float('inf')
+
+    def outcome_probabilities(self) -> Dict[str, float]:
+        return {
+            'home_win': float(np.mean(self.home_goals > self.away_goals)),
+            'draw': float(np.mean(self.home_goals == self.away_goals)),
+            'away_win': float(np.mean(self.home_goals < self.away_goals)),
+        }
+
+
+class MarkovSurrogate:
+    """
+    First-order Markov chain over (team, zone, action, outcome) states
+
+    Transition probabilities are the observed transition frequencies in the
+    fitted logs. A match of a given duration is a walk whose length is drawn
+    from the fitted matches' events-per-minute, so goals, possessions and
+    possession lengths all follow from the chain itself. Walks for many
+    matches advance together as NumPy arrays, sampling each step with alias
+    tables in constant time per match.
+    """
+
+    def __init__(self, states: List[Tuple[str, ...]], counts: np.ndarray, initial: np.ndarray,
+                 events_per_minute: np.ndarray, skip_actions: Sequence[str] = DEFAULT_SKIP_ACTIONS):
+        self.states = states
+        self.counts = counts
+        self.initial = initial
+        self.events_per_minute = events_per_minute
+        self.skip_actions = tuple(skip_actions)
+
+        # Rows never left in the data restart from the kickoff distribution
+        totals = counts.sum(axis=1, keepdims=True)
+        self.transition = np.where(totals > 0, counts / np.maximum(totals, 1), initial)
+
+        successors = [np.flatnonzero(row) for row in self.transition]
+        width = max(len(s) for s in successors)
+        self._degree = np.array([len(s) for s in successors])
+        self._successor = np.zeros((len(states), width), dtype=np.int64)
+        for row, s in enumerate(successors):
+            self._successor[row, :len(s)] = s
+        self._prob, self._alias = _alias_tables(
+            [self.transition[row, s] for row, s in enumerate(successors)], width
+        )
+
+        self._home_goal = np.array([s[0] == 'Home' and s[2] == 'Goal' for s in states])
+        self._away_goal = np.array([s[0] == 'Away' and s[2] == 'Goal' for s in states])
+        self._possession_start = np.array([s[2] == 'PossessionStart' for s in states])
+        self._counted = np.array([s[2] not in POSSESSION_MARKERS for s in states])
+
+    @classmethod
+    def fit(cls, logs: Sequence[Any], durations: Sequence[float],
+            skip_actions: Sequence[str] = DEFAULT_SKIP_ACTIONS) -> 'MarkovSurrogate':
+        """
+        Estimate the chain from match logs
+
+        Args:
+            logs: One log per match: EventLogger, columnar dict or DataFrame
+            durations: Match duration in minutes of each log
+            skip_actions: Actions left out of the chain
+        """
+        sequences = [match_tokens(log, skip_actions) for log in logs]
+        states = sorted({state for tokens in sequences for state in tokens})
+        index = {state: i for i, state in enumerate(states)}
+
+        counts = np.zeros((len(states), len(states)))
+        initial = np.zeros(len(states))
+        rates = []
+        for tokens, duration in zip(sequences, durations):
+            if not tokens:
+                continue
+            codes = np.fromiter((index[t] for t in tokens), dtype=np.int64, count=len(tokens))
+            initial[codes[0]] += 1
+            np.add.at(counts, (codes[:-1], codes[1:]), 1)
+            rates.append(len(codes) / duration)
+
+        return cls(states, counts, initial / initial.sum(), np.array(rates), skip_actions)
+
+    @classmethod
+    def fit_from_simulations(cls, matches: int = 50, duration: int = 90, first_seed: int = 0,
+                             **config) -> 'MarkovSurrogate':
+        """Play matches with the agent model and fit the chain to their logs"""
+        logs = []
+        for seed in range(first_seed, first_seed + matches):
+            model = FootballModel(match_duration=duration, seed=seed, verbose=False, **config)
+            while model.running:
+                model.step()
+            logs.append(model.event_logger)
+        return cls.fit(logs, [duration] * matches)
+
+    def simulate(self, matches: int = 1000, duration: float = 90, seed: Optional[int] = None) -> SurrogateResult:
+        """Sample a batch of matches from the chain"""
+        start = time.perf_counter()
+        rng = np.random.default_rng(seed)
+
+        lengths = np.rint(rng.choice(self.events_per_minute, size=matches) * duration).astype(np.int64)
+        state = rng.choice(len(self.states), size=matches, p=self.initial)
+        home = self._home_goal[state].astype(np.int64)
+        away = self._away_goal[state].astype(np.int64)
+        current = np.where(self._possession_start[state], 0, -1)
+        histogram = np.zeros(MAX_POSSESSION_LENGTH + 1, dtype=np.int64)
+
+        for step in range(1, int(lengths.max(initial=0))):
+            active = lengths > step
+            column = (rng.random(matches) * self._degree[state]).astype(np.int64)
+            keep = rng.random(matches) < self._prob[state, column]
+            choice = np.where(keep, column, self._alias[state, column])
+            state = np.where(active, self._successor[state, choice], state)
+
+            home += active & self._home_goal[state]
+            away += active & self._away_goal[state]
+
+            starts = active & self._possession_start[state]
+            finished = current[starts & (current >= 0)]
+            np.add.at(histogram, np.minimum(finished, MAX_POSSESSION_LENGTH), 1)
+            current = np.where(starts, 0, current + ((current >= 0) & active & self._counted[state]))
+
+        np.add.at(histogram, np.minimum(current[current >= 0], MAX_POSSESSION_LENGTH), 1)
+        return SurrogateResult(home, away, histogram, time.perf_counter() - start)
+
+    def goodness_of_fit(self, reference_logs: Sequence[Any], duration: float = 90,
+                        matches: int = 2000, seed: Optional[int] = None,
+                        alpha: float = 0.05) -> 'FitReport':
+        """
+        Compare surrogate matches with agent-model logs not used for fitting
+
+        Uses two-sample Kolmogorov-Smirnov tests and total variation distance
+        on home goals, away goals, goal difference and possession length.
+        """
+        summaries = [token_summary(match_tokens(log, self.skip_actions)) for log in reference_logs]
+        agent_home = np.array([s['home_goals'] for s in summaries])
+        agent_away = np.array([s['away_goals'] for s in summaries])
+        agent_lengths = np.concatenate([s['possession_lengths'] for s in summaries]).astype(np.int64)
+
+        result = self.simulate(matches, duration, seed)
+        surrogate_lengths = np.repeat(np.arange(len(result.possession_lengths)), result.possession_lengths)
+
+        samples = {
+            'home_goals': (agent_home, result.home_goals),
+            'away_goals': (agent_away, result.away_goals),
+            'goal_difference': (agent_home - agent_away, result.home_goals - result.away_goals),
+            'possession_length': (np.minimum(agent_lengths, MAX_POSSESSION_LENGTH), surrogate_lengths),
+        }
+        return FitReport(samples, alpha, result)
+
+
+def _total_variation(a: np.ndarray, b: np.ndarray) -> float:
+    low = min(a.min(), b.min())
+    high = max(a.max(), b.max())
+    pa = np.bincount(a - low, minlength=high - low + 1) / len(a)
+    pb = np.bincount(b - low, minlength=high - low + 1) / len(b)
+    return float(0.5 * np.abs(pa - pb).sum())
+
+
+class FitReport:
+    """Distribution-level agreement between the surrogate and the agent model"""
+
+    def __init__(self, samples: Dict[str, Tuple[np.ndarray, np.ndarray]], alpha: float,
+                 result: SurrogateResult):
+        self.alpha = alpha
+        self.result = result
+        self.metrics: Dict[str, Dict[str, float]] = {}
+        for name, (agent, surrogate) in samples.items():
+            test = stats.ks_2samp(agent, surrogate)
+            self.metrics[name] = {
+                'agent_mean': float(agent.mean()),
+                'surrogate_mean': float(surrogate.mean()),
+                'tv_distance': _total_variation(agent, surrogate),
+                'ks_statistic': float(test.statistic),
+                'p_value': float(test.pvalue),
+            }
+
+    @property
+    def acceptable(self) -> bool:
+        """True when no metric's distributions differ significantly"""
+        return all(m['p_value'] >= self.alpha for m in self.metrics.values())
+
+    def __str__(self):
+        lines = [f"{'metric':18} {'agent':>8} {'surrogate':>10} {'TV':>6} {'KS':>6} {'p':>7}"]
+        for name, m in self.metrics.items():
+            lines.append(f"{name:18} {m['agent_mean']:8.2f} {m['surrogate_mean']:10.2f} "
+                         f"{m['tv_distance']:6.3f} {m['ks_statistic']:6.3f} {m['p_value']:7.3f}")
+        verdict = "surrogate is adequate" if self.acceptable else "use the full agent model"
+        lines.append(f"At alpha={self.alpha}: {verdict} "
+                     f"({self.result.matches_per_second:,.0f} surrogate matches/s)")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print("Fitting surrogate on 40 agent-model matches...")
+    surrogate = MarkovSurrogate.fit_from_simulations(matches=40, duration=90)
+    print(f"{len(surrogate.states)} states")
+
+    print("\nPlaying 20 held-out agent matches for validation...")
+    reference = []
+    for seed in range(1000, 1020):
+        model = FootballModel(match_duration=90, seed=seed, verbose=False)
+        while model.running:
+            model.step()
+        reference.append(model.event_logger)
+
+    print("\nGoodness of fit:")
+    print(surrogate.goodness_of_fit(reference, duration=90, matches=5000, seed=0))
+
+    result = surrogate.simulate(matches=5000, duration=90, seed=1)
+    print(f"\nSurrogate outcome probabilities: {result.outcome_probabilities()}")
@@ -0,0 +1,359 @@
+"""
+Match Event Archive
+Append-only store for many matches in compressed columnar segments
+"""
+
+import fcntl
+import json
+import os
+import struct
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from utils_logger import EVENT_COLUMNS
+
+
+INDEX_FILE = 'index.jsonl'
+LOCK_FILE = 'archive.lock'
+SEGMENT_TEMPLATE = 'segment-{:05d}.seg'
+
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Fixed-width storage for numeric columns; everything else is dictionary encoded
+NUMERIC_DTYPES = {
+    'player_id': np.int16,
+    'pressure': np.int8,
+    'xg_change': np.float64,
+    'receiver_id': np.int16,
+}
+
+
+def encode_column(column: str, values: List[Any]) -> bytes:
+    """Encode one column of a chunk as compressed bytes"""
+    if column in NUMERIC_DTYPES:
+        payload = np.asarray(values, dtype=NUMERIC_DTYPES[column]).tobytes()
+    else:
+        codes, vocab = dictionary_encode(values)
+        vocab_bytes = json.dumps(vocab).encode('utf-8')
+        payload = struct.pack('<I', len(vocab_bytes)) + vocab_bytes + codes.tobytes()
+    return zlib.compress(payload, 6)
+
+
+def decode_column(column: str, data: bytes, as_codes: bool = False):
+    """
+    Decode bytes written by encode_column
+
+    With as_codes=True, string columns come back as (codes array, vocabulary)
+    instead of a list of strings, which is what index builders want.
+    """
+    payload = zlib.decompress(data)
+    if column in NUMERIC_DTYPES:
+        return np.frombuffer(payload, dtype=NUMERIC_DTYPES[column]).tolist()
+
+    (vocab_len,) = struct.unpack_from('<I', payload)
+    vocab = json.loads(payload[4:4 + vocab_len].decode('utf-8'))
+    codes = np.frombuffer(payload[4 + vocab_len:], dtype=_code_dtype(len(vocab)))
+    if as_codes:
+        return codes, vocab
+    return [vocab[code] for code in codes.tolist()]
+
+
+def dictionary_encode(values: List[Any]) -> Tuple[np.ndarray, List[Any]]:
+    """Map values to integer codes in first-appearance order"""
+    lookup: Dict[Any, int] = {}
+    codes = [lookup.setdefault(value, len(lookup)) for value in values]
+    return np.asarray(codes, dtype=_code_dtype(len(lookup))), list(lookup)
+
+
+def _code_dtype(vocab_size: int):
+    """Smallest unsigned dtype that can hold codes for a vocabulary"""
+    if vocab_size <= 1 << 8:
+        return np.uint8
+    if vocab_size <= 1 << 16:
+        return np.uint16
+    return np.uint32
+
+
+def possession_runs(possession_ids: List[str]) -> Dict[str, List[List[int]]]:
+    """Row ranges [start, stop) covered by each possession, in log order"""
+    runs: Dict[str, List[List[int]]] = {}
+    for row, pid in enumerate(possession_ids):
+        ranges = runs.setdefault(pid, [])
+        if ranges and ranges[-1][1] == row:
+            ranges[-1][1] = row + 1
+        else:
+            ranges.append([row, row + 1])
+    return runs
+
+
+def match_id_from_possession(possession_id: str) -> Optional[int]:
+    """Extract the match id from a possession id such as 'M1234-P045'"""
+    try:
+        return int(possession_id[1:possession_id.index('-')])
+    except ValueError:
+        return None
+
+
+class MatchArchive:
+    """
+    Append-only archive of match event logs
+
+    Each appended match is split into chunks of at most chunk_rows events.
+    Every column of a chunk is compressed separately and written to the
+    current segment file, so a reader can fetch one column of one chunk
+    with a single seek. The sidecar index (one JSON line per match) records
+    where each chunk lives, the row ranges of every possession and the match
+    metadata. Appends take an exclusive lock so several processes can share
+    an archive directory.
+    """
+
+    def __init__(self, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.segment_bytes = segment_bytes
+
+        self.entries: List[Dict[str, Any]] = []
+        self._match_entries: Dict[int, List[int]] = {}
+        self._index_position = 0
+
+        os.makedirs(path, exist_ok=True)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def total_rows(self) -> int:
+        """Number of events stored across all matches"""
+        return sum(entry['rows'] for entry in self.entries)
+
+    def refresh(self):
+        """Load index lines appended since the last refresh"""
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+
+        with open(index_path, 'rb') as f:
+            f.seek(self._index_position)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # Partially written line from an interrupted append
+                self._register(json.loads(line))
+                self._index_position += len(line)
+
+    def _register(self, entry: Dict[str, Any]):
+        self.entries.append(entry)
+        self._match_entries.setdefault(entry['match_id'], []).append(entry['entry'])
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, columns: Dict[str, List[Any]], metadata: Dict[str, Any]) -> int:
+        """
+        Append one match to the archive
+
+        Args:
+            columns: Event log in the layout of EventLogger.to_columns()
+            metadata: Match-level values such as match_id, seed and scores
+
+        Returns:
+            The archive entry number of the new match
+        """
+        column_names = [col for col in EVENT_COLUMNS if col in columns]
+        rows = len(columns[column_names[0]]) if column_names else 0
+
+        # Encode outside the lock; only the file appends are serialised
+        chunks = []
+        for start in range(0, rows, self.chunk_rows):
+            stop = min(start + self.chunk_rows, rows)
+            blobs = [(col, encode_column(col, columns[col][start:stop])) for col in column_names]
+            chunks.append((start, stop - start, blobs))
+
+        runs = possession_runs(columns['possession_id']) if 'possession_id' in columns else {}
+
+        with open(os.path.join(self.path, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                segment = self._writable_segment()
+                segment_path = os.path.join(self.path, segment)
+
+                chunk_index = []
+                with open(segment_path, 'ab') as f:
+                    for start, count, blobs in chunks:
+                        offset = f.tell()
+                        layout = {}
+                        position = 0
+                        for col, blob in blobs:
+                            f.write(blob)
+                            layout[col] = [position, len(blob)]
+                            position += len(blob)
+                        chunk_index.append({
+                            'first_row': start, 'rows': count,
+                            'offset': offset, 'columns': layout
+                        })
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                entry = {
+                    'entry': len(self.entries),
+                    'match_id': metadata.get('match_id'),
+                    'rows': rows,
+                    'segment': segment,
+                    'chunks': chunk_index,
+                    'possessions': runs,
+                    'metadata': metadata,
+                }
+                line = (json.dumps(entry) + '\n').encode('utf-8')
+                with open(os.path.join(self.path, INDEX_FILE), 'ab') as f:
+                    # Drop a torn line left by an interrupted append (refresh()
+                    # stopped in front of it) so the new entry starts a clean line
+                    f.truncate(self._index_position)
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                self._register(entry)
+                self._index_position += len(line)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+        return entry['entry']
+
+    def append_model(self, model) -> int:
+        """Append a finished FootballModel's event log and match statistics"""
+        stats = model.get_match_stats()
+        stats.pop('event_summary', None)
+        return self.append(model.event_logger.to_columns(), stats)
+
+    def _writable_segment(self) -> str:
+        """Name of the segment new chunks go to, rolling over when it is full"""
+        if not self.entries:
+            return SEGMENT_TEMPLATE.format(0)
+
+        segment = self.entries[-1]['segment']
+        if os.path.getsize(os.path.join(self.path, segment)) < self.segment_bytes:
+            return segment
+        number = int(segment[len('segment-'):-len('.seg')])
+        return SEGMENT_TEMPLATE.format(number + 1)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def find(self, match_id: int) -> List[int]:
+        """Archive entries holding the given match id (ids can repeat)"""
+        return list(self._match_entries.get(match_id, []))
+
+    def metadata(self, entry: int) -> Dict[str, Any]:
+        """Match-level metadata stored with an entry"""
+        return self.entries[entry]['metadata']
+
+    def read_match(self, match_id: int, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Read the most recently archived match with the given id"""
+        entries = self.find(match_id)
+        if not entries:
+            raise KeyError(f"Match {match_id} is not in the archive")
+        return self.read_entry(entries[-1], columns)
+
+    def read_entry(self, entry: int, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Read every event of an archive entry"""
+        return self.read_rows(entry, 0, self.entries[entry]['rows'], columns)
+
+    def read_possession(self, possession_id: str, entry: Optional[int] = None,
+                        columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """
+        Read the events of one possession
+
+        Only the chunks overlapping the possession are decoded. When entry is
+        omitted, the latest match whose id matches the possession id is used.
+        """
+        if entry is None:
+            entries = self.find(match_id_from_possession(possession_id))
+            entries = [e for e in entries if possession_id in self.entries[e]['possessions']]
+            if not entries:
+                raise KeyError(f"Possession {possession_id} is not in the archive")
+            entry = entries[-1]
+
+        columns = self._columns(entry, columns)
+        result = {col: [] for col in columns}
+        for start, stop in self.entries[entry]['possessions'][possession_id]:
+            rows = self.read_rows(entry, start, stop, columns)
+            for col in columns:
+                result[col].extend(rows[col])
+        return result
+
+    def read_rows(self, entry: int, start: int, stop: int,
+                  columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Read rows [start, stop) of an entry, decoding only overlapping chunks"""
+        columns = self._columns(entry, columns)
+        result = {col: [] for col in columns}
+
+        for chunk in self.entries[entry]['chunks']:
+            first = chunk['first_row']
+            last = first + chunk['rows']
+            if last <= start or first >= stop:
+                continue
+            lo, hi = max(start, first) - first, min(stop, last) - first
+            for col in columns:
+                result[col].extend(self.read_chunk_column(entry, chunk, col)[lo:hi])
+
+        return result
+
+    def read_chunk_column(self, entry: int, chunk: Dict[str, Any], column: str,
+                          as_codes: bool = False):
+        """Seek to and decode a single column of one chunk"""
+        position, length = chunk['columns'][column]
+        segment_path = os.path.join(self.path, self.entries[entry]['segment'])
+        with open(segment_path, 'rb') as f:
+            f.seek(chunk['offset'] + position)
+            data = f.read(length)
+        return decode_column(column, data, as_codes=as_codes)
+
+    def _columns(self, entry: int, columns: Optional[List[str]]) -> List[str]:
+        chunks = self.entries[entry]['chunks']
+        stored = list(chunks[0]['columns']) if chunks else list(EVENT_COLUMNS)
+        if columns is None:
+            return stored
+        missing = [col for col in columns if col not in stored]
+        if missing:
+            raise KeyError(f"Columns not stored in the archive: {missing}")
+        return list(columns)
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+    from football_simulation import FootballModel
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = MatchArchive(directory, chunk_rows=1024)
+
+        csv_bytes = 0
+        for seed in range(5):
+            model = FootballModel(match_duration=30, seed=seed)
+            while model.running:
+                model.step()
+            archive.append_model(model)
+            csv_path = os.path.join(directory, f"match_{seed}.csv")
+            model.event_logger.dump_csv(csv_path)
+            csv_bytes += os.path.getsize(csv_path)
+
+        archive_bytes = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in os.listdir(directory) if name.endswith('.seg')
+        )
+        print(f"\nArchived {len(archive)} matches, {archive.total_rows} events")
+        print(f"Segment size: {archive_bytes / 1024:.1f} KiB (CSV: {csv_bytes / 1024:.1f} KiB)")
+
+        entry = archive.entries[-1]
+        possession_id = next(iter(entry['possessions']))
+        start = time.perf_counter()
+        events = archive.read_possession(possession_id, entry=entry['entry'])
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"Read possession {possession_id}: {len(events['action'])} events in {elapsed:.2f} ms")
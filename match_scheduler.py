@@ -0,0 +1,160 @@
+"""
+Paced Match Scheduler
+Many matches at wall-clock or accelerated pace, interleaved on one asyncio event loop
+"""
+
+import asyncio
+import heapq
+from typing import Callable, Dict, List, Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from football_simulation import FootballModel
+
+
+# Match time covered by one FootballModel.step()
+MINUTES_PER_STEP = 0.1
+
+POLICIES = ('skip', 'catchup')
+
+
+class PacedScheduler:
+    """
+    Run matches so that every step lands on a wall-clock deadline
+
+    One step covers 6 match seconds, so at speed N a match ticks every
+    6 / N seconds. Deadlines are absolute (start + k * period), so lateness
+    never accumulates as drift, and all matches share one heap of deadlines
+    served by a single coroutine instead of a thread or task per match.
+    Matches are staggered across the first period to spread the load.
+
+    When the process cannot keep up, 'skip' jumps a late match forward to
+    real time: its clock advances past the missed ticks without simulating
+    them. 'catchup' instead plays up to max_catchup missed steps at once.
+
+    Args:
+        matches: FootballModels or FootballModel keyword dicts
+        speed: Match seconds per wall-clock second (1 = real time)
+        policy: 'skip' or 'catchup' for matches that fall behind
+        max_lag: Lateness in seconds tolerated before the policy applies
+            (defaults to one tick period)
+        max_catchup: Steps played back-to-back per tick under 'catchup'
+        on_events: Called as on_events(model, events) after each tick
+    """
+
+    def __init__(self, matches: List[Union[FootballModel, Dict[str, Any]]], speed: float = 1.0,
+                 policy: str = 'skip', max_lag: Optional[float] = None, max_catchup: int = 5,
+                 on_events: Optional[Callable[[FootballModel, List[Dict[str, Any]]], None]] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.models = [m if isinstance(m, FootballModel) else FootballModel(verbose=False, **m)
+                       for m in matches]
+        self.period = MINUTES_PER_STEP * 60 / speed
+        self.speed = speed
+        self.policy = policy
+        self.max_lag = self.period if max_lag is None else max_lag
+        self.max_catchup = max_catchup
+        self.on_events = on_events
+
+        self.lags: List[List[float]] = [[] for _ in self.models]
+        self.skipped = [0] * len(self.models)
+        self.ticks = [0] * len(self.models)
+        self._pending: List[List[Dict[str, Any]]] = [list(m.event_logger.events) for m in self.models]
+        if on_events is not None:
+            # Events reach the callback through each match's bus, so this
+            # works whether or not the match keeps an event log; events
+            # logged before the scheduler subscribed go out with the first tick
+            for model, pending in zip(self.models, self._pending):
+                model.event_bus.subscribe(pending.append)
+
+    def _advance(self, i: int, steps: int):
+        model = self.models[i]
+        for _ in range(steps):
+            if not model.running:
+                break
+            model.step()
+            self.ticks[i] += 1
+        if self.on_events is not None:
+            events = list(self._pending[i])
+            self._pending[i].clear()
+            self.on_events(model, events)
+
+    def _skip(self, i: int, missed: int):
+        """Jump a match's clock past ticks it had no time to play"""
+        self.skipped[i] += self.models[i].skip(missed)
+
+    async def run(self) -> pd.DataFrame:
+        """Play every match to full time and return the per-match timing report"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        count = len(self.models)
+        heap = [(start + self.period * i / count, i) for i in range(count)]
+        heapq.heapify(heap)
+
+        while heap:
+            deadline, i = heapq.heappop(heap)
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                await asyncio.sleep(0)  # Let consumers run even when behind
+
+            lag = loop.time() - deadline
+            self.lags[i].append(lag)
+
+            steps = 1
+            if lag > self.max_lag:
+                missed = int(lag // self.period)
+                if self.policy == 'skip':
+                    self._skip(i, missed)
+                else:
+                    steps += min(missed, self.max_catchup - 1)
+                deadline += missed * self.period if self.policy == 'skip' else (steps - 1) * self.period
+
+            self._advance(i, steps)
+            if self.models[i].running:
+                heapq.heappush(heap, (deadline + self.period, i))
+
+        self.elapsed = loop.time() - start
+        return self.report()
+
+    def report(self) -> pd.DataFrame:
+        """Lag (lateness of each tick versus its deadline) and jitter per match"""
+        rows = []
+        for i, model in enumerate(self.models):
+            lags = np.array(self.lags[i]) * 1000
+            rows.append({
+                'match_id': model.match_id,
+                'ticks': self.ticks[i],
+                'skipped': self.skipped[i],
+                'lag_mean_ms': lags.mean() if len(lags) else 0.0,
+                'lag_p95_ms': np.percentile(lags, 95) if len(lags) else 0.0,
+                'lag_max_ms': lags.max() if len(lags) else 0.0,
+                'jitter_ms': lags.std() if len(lags) else 0.0,
+                'score': f"{model.home_score}-{model.away_score}",
+            })
+        return pd.DataFrame(rows)
+
+
+def run_paced(matches: List[Union[FootballModel, Dict[str, Any]]], speed: float = 1.0,
+              **kwargs) -> pd.DataFrame:
+    """Run a PacedScheduler to completion and return its report"""
+    return asyncio.run(PacedScheduler(matches, speed, **kwargs).run())
+
+
+if __name__ == "__main__":
+    def summarize(label: str, scheduler: PacedScheduler, report: pd.DataFrame):
+        print(f"{label}: {len(report)} matches, {scheduler.period * 1000:.1f}ms tick period, "
+              f"{scheduler.elapsed:.1f}s wall clock")
+        print(f"  lag mean {report.lag_mean_ms.mean():.2f}ms, p95 {report.lag_p95_ms.mean():.2f}ms, "
+              f"max {report.lag_max_ms.max():.2f}ms, jitter {report.jitter_ms.mean():.2f}ms")
+        print(f"  {report.ticks.sum()} ticks played, {report.skipped.sum()} skipped to stay on real time")
+
+    # 200 five-minute matches at 60x (a tick every 100ms): comfortably within budget
+    scheduler = PacedScheduler([{'match_duration': 5, 'seed': i} for i in range(200)], speed=60)
+    summarize("60x", scheduler, asyncio.run(scheduler.run()))
+
+    # The same load at 1200x (a tick every 5ms) is CPU-bound: late matches skip ahead
+    scheduler = PacedScheduler([{'match_duration': 5, 'seed': i} for i in range(200)], speed=1200)
+    summarize("1200x", scheduler, asyncio.run(scheduler.run()))
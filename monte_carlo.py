@@ -0,0 +1,257 @@
+"""
+Monte Carlo Outcome Estimation
+Adaptive estimation of match outcome probabilities and goal distributions
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from football_simulation import FootballModel
+
+
+OUTCOMES = ['home_win', 'draw', 'away_win']
+
+# Seeds for the second configuration of an unpaired comparison
+UNPAIRED_SEED_OFFSET = 1_000_000_000
+
+
+def simulate_score(args: Tuple[Dict[str, Any], int]) -> Tuple[int, int]:
+    """Play one quiet match and return (home goals, away goals)"""
+    config, seed = args
+    # Only the score is needed, so nothing subscribes to the event bus
+    model = FootballModel(seed=seed, verbose=False, **{'log_events': False, **config})
+    while model.running:
+        model.step()
+    return model.home_score, model.away_score
+
+
+def _z_value(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes: int, n: int, z: float) -> Tuple[float, float]:
+    """Wilson score interval for a binomial proportion"""
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denominator
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def mean_interval(values: np.ndarray, z: float) -> Tuple[float, float, float]:
+    """Mean and normal-approximation confidence interval"""
+    n = len(values)
+    mean = float(values.mean()) if n else 0.0
+    half = z * float(values.std(ddof=1)) / np.sqrt(n) if n > 1 else float('inf')
+    return mean, mean - half, mean + half
+
+
+class OutcomeEstimate:
+    """Outcome probabilities and goal statistics with confidence intervals"""
+
+    def __init__(self, scores: np.ndarray, confidence: float, converged: bool, elapsed: float):
+        z = _z_value(confidence)
+        self.matches = len(scores)
+        self.confidence = confidence
+        self.converged = converged
+        self.elapsed = elapsed
+
+        home, away = scores[:, 0], scores[:, 1]
+        counts = {
+            'home_win': int((home > away).sum()),
+            'draw': int((home == away).sum()),
+            'away_win': int((home < away).sum()),
+        }
+        self.probabilities = {k: v / self.matches for k, v in counts.items()}
+        self.intervals = {k: wilson_interval(v, self.matches, z) for k, v in counts.items()}
+
+        self.home_goals = mean_interval(home.astype(float), z)
+        self.away_goals = mean_interval(away.astype(float), z)
+        self.scorelines = Counter(zip(home.tolist(), away.tolist()))
+
+    @property
+    def half_width(self) -> float:
+        """Largest half-width among the outcome probability intervals"""
+        return max((hi - lo) / 2 for lo, hi in self.intervals.values())
+
+    def __str__(self):
+        lines = [f"{self.matches} matches in {self.elapsed:.1f}s "
+                 f"({'converged' if self.converged else 'not converged'}, "
+                 f"{self.confidence:.0%} intervals)"]
+        for outcome in OUTCOMES:
+            lo, hi = self.intervals[outcome]
+            lines.append(f"  P({outcome:8}) = {self.probabilities[outcome]:.3f}  [{lo:.3f}, {hi:.3f}]")
+        for team, (mean, lo, hi) in (('Home', self.home_goals), ('Away', self.away_goals)):
+            lines.append(f"  {team} goals   = {mean:.2f}  [{lo:.2f}, {hi:.2f}]")
+        return "\n".join(lines)
+
+
+class ComparisonEstimate:
+    """Differences (A - B) in outcome probabilities and mean goals"""
+
+    def __init__(self, scores_a: np.ndarray, scores_b: np.ndarray, paired: bool,
+                 confidence: float, converged: bool, elapsed: float):
+        z = _z_value(confidence)
+        self.matches = len(scores_a)
+        self.paired = paired
+        self.confidence = confidence
+        self.converged = converged
+        self.elapsed = elapsed
+
+        metrics_a, metrics_b = _metrics(scores_a), _metrics(scores_b)
+        self.differences: Dict[str, Tuple[float, float, float]] = {}
+        for name in metrics_a:
+            a, b = metrics_a[name], metrics_b[name]
+            diff = float(a.mean() - b.mean())
+            if paired:
+                # Common random numbers: the variance of the per-seed differences
+                variance = (a - b).var(ddof=1)
+            else:
+                variance = a.var(ddof=1) + b.var(ddof=1)
+            half = z * float(np.sqrt(variance / self.matches)) if self.matches > 1 else float('inf')
+            self.differences[name] = (diff, diff - half, diff + half)
+
+    @property
+    def half_width(self) -> float:
+        """Largest half-width among the outcome probability differences"""
+        return max((hi - lo) / 2 for name, (_, lo, hi) in self.differences.items() if name in OUTCOMES)
+
+    def __str__(self):
+        lines = [f"{self.matches} {'paired' if self.paired else 'independent'} matches per config "
+                 f"in {self.elapsed:.1f}s ({'converged' if self.converged else 'not converged'})"]
+        for name, (diff, lo, hi) in self.differences.items():
+            lines.append(f"  Δ {name:10} = {diff:+.3f}  [{lo:+.3f}, {hi:+.3f}]")
+        return "\n".join(lines)
+
+
+def _metrics(scores: np.ndarray) -> Dict[str, np.ndarray]:
+    home, away = scores[:, 0], scores[:, 1]
+    return {
+        'home_win': (home > away).astype(float),
+        'draw': (home == away).astype(float),
+        'away_win': (home < away).astype(float),
+        'home_goals': home.astype(float),
+        'away_goals': away.astype(float),
+    }
+
+
+def _run_batch(pool: Optional[Executor], jobs: List[Tuple[Dict[str, Any], int]],
+               workers: int) -> np.ndarray:
+    if pool is None:
+        results = [simulate_score(job) for job in jobs]
+    else:
+        results = list(pool.map(simulate_score, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    return np.asarray(results, dtype=np.int64).reshape(-1, 2)
+
+
+def estimate_outcomes(config: Optional[Dict[str, Any]] = None, precision: float = 0.02,
+                      confidence: float = 0.95, batch_size: Optional[int] = None,
+                      min_matches: int = 50, max_matches: int = 20000,
+                      workers: Optional[int] = None, first_seed: int = 0,
+                      verbose: bool = True) -> OutcomeEstimate:
+    """
+    Estimate P(home win / draw / away win) and expected goals for a setup
+
+    Matches run in parallel batches until every outcome probability's
+    confidence interval has a half-width of at most precision.
+
+    Args:
+        config: FootballModel keyword arguments (e.g. match_duration)
+        precision: Target half-width for the outcome probability intervals
+        confidence: Confidence level of the intervals
+        batch_size: Matches per batch (defaults to 8 per worker)
+        min_matches: Never stop before this many matches
+        max_matches: Stop here even if the precision is not reached
+        workers: Worker processes (defaults to the CPU count; 1 runs inline)
+        first_seed: Seed of the first match; match i uses first_seed + i
+        verbose: Print progress after each batch
+    """
+    config = dict(config or {})
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or 8 * workers
+
+    start = time.perf_counter()
+    scores = np.zeros((0, 2), dtype=np.int64)
+    estimate = None
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while len(scores) < max_matches:
+            count = min(batch_size, max_matches - len(scores))
+            seeds = range(first_seed + len(scores), first_seed + len(scores) + count)
+            scores = np.vstack([scores, _run_batch(pool, [(config, s) for s in seeds], workers)])
+
+            estimate = OutcomeEstimate(scores, confidence, False, time.perf_counter() - start)
+            if verbose:
+                print(f"{len(scores):6d} matches: half-width {estimate.half_width:.4f}")
+            if len(scores) >= min_matches and estimate.half_width <= precision:
+                estimate.converged = True
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return estimate
+
+
+def compare_configurations(config_a: Dict[str, Any], config_b: Dict[str, Any],
+                           paired: bool = True, precision: float = 0.02,
+                           confidence: float = 0.95, batch_size: Optional[int] = None,
+                           min_matches: int = 50, max_matches: int = 20000,
+                           workers: Optional[int] = None, first_seed: int = 0,
+                           verbose: bool = True) -> ComparisonEstimate:
+    """
+    Estimate how two configurations differ in outcome probabilities and goals
+
+    With paired=True both configurations are run on the same seeds (common
+    random numbers), so shared randomness cancels in the per-seed differences
+    and the intervals tighten with far fewer matches. Stops once every
+    outcome-probability difference has a half-width of at most precision.
+    """
+    config_a, config_b = dict(config_a), dict(config_b)
+    workers = workers or os.cpu_count() or 1
+    batch_size = batch_size or 8 * workers
+    offset_b = 0 if paired else UNPAIRED_SEED_OFFSET
+
+    start = time.perf_counter()
+    scores_a = np.zeros((0, 2), dtype=np.int64)
+    scores_b = np.zeros((0, 2), dtype=np.int64)
+    estimate = None
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while len(scores_a) < max_matches:
+            count = min(batch_size, max_matches - len(scores_a))
+            seeds = list(range(first_seed + len(scores_a), first_seed + len(scores_a) + count))
+            jobs = [(config_a, s) for s in seeds] + [(config_b, s + offset_b) for s in seeds]
+            batch = _run_batch(pool, jobs, workers)
+            scores_a = np.vstack([scores_a, batch[:count]])
+            scores_b = np.vstack([scores_b, batch[count:]])
+
+            estimate = ComparisonEstimate(scores_a, scores_b, paired, confidence, False,
+                                          time.perf_counter() - start)
+            if verbose:
+                print(f"{len(scores_a):6d} matches: half-width {estimate.half_width:.4f}")
+            if len(scores_a) >= min_matches and estimate.half_width <= precision:
+                estimate.converged = True
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return estimate
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("MONTE CARLO OUTCOME ESTIMATE (30-minute matches)")
+    print("="*60)
+    print(estimate_outcomes({'match_duration': 30}, precision=0.05, max_matches=400))
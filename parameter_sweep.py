@@ -0,0 +1,270 @@
+"""
+Parameter Sweep
+Grid and random designs over team configurations, run as resumable parallel jobs
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Any, Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from football_simulation import FootballModel
+from team_config import TeamConfig, DEFAULT_HOME_CONFIG, DEFAULT_AWAY_CONFIG
+
+
+# Outcome columns written for every (config, replicate) row
+RESULT_COLUMNS = [
+    'home_score', 'away_score', 'goal_difference', 'result',
+    'home_xg', 'away_xg', 'total_events', 'possessions', 'sim_seconds'
+]
+
+TEAM_PREFIXES = ('home', 'away', 'teams')
+
+
+def model_kwargs(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a flat sweep configuration into FootballModel keyword arguments
+
+    Keys are either model arguments ('match_duration') or dotted team
+    settings: 'home.formation', 'away.attribute_mean',
+    'teams.attribute_spread' (both sides) or
+    'home.attribute_means.passing' for a single attribute.
+    """
+    teams = {'home': DEFAULT_HOME_CONFIG.to_dict(), 'away': DEFAULT_AWAY_CONFIG.to_dict()}
+    kwargs = {}
+    for key, value in config.items():
+        prefix, _, rest = key.partition('.')
+        if prefix not in TEAM_PREFIXES or not rest:
+            kwargs[key] = value
+            continue
+        for side in (('home', 'away') if prefix == 'teams' else (prefix,)):
+            target = teams[side]
+            *parents, name = rest.split('.')
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[name] = value
+    kwargs['home_config'] = TeamConfig.from_dict(teams['home'])
+    kwargs['away_config'] = TeamConfig.from_dict(teams['away'])
+    return kwargs
+
+
+def config_id(config: Dict[str, Any]) -> str:
+    """Stable short identifier of a sweep configuration"""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def grid_design(parameters: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Full factorial design: every combination of the listed values"""
+    names = list(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*parameters.values())]
+
+
+def random_design(parameters: Dict[str, Union[Tuple[float, float], Sequence[Any]]], n: int,
+                  seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Random design of n configurations
+
+    A (low, high) tuple is sampled uniformly (as integers when both bounds are
+    ints); a list is sampled as a categorical choice.
+    """
+    rng = np.random.default_rng(seed)
+    design = []
+    for _ in range(n):
+        config = {}
+        for name, spec in parameters.items():
+            if isinstance(spec, tuple) and len(spec) == 2:
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = int(rng.integers(low, high + 1))
+                else:
+                    config[name] = float(rng.uniform(low, high))
+            else:
+                config[name] = spec[int(rng.integers(len(spec)))]
+        design.append(config)
+    return design
+
+
+def _run_job(job: Tuple[Dict[str, Any], str, int, int]) -> Dict[str, Any]:
+    """Play one (config, replicate) job and return its tidy row (runs in worker processes)"""
+    config, cid, replicate, seed = job
+    start = time.perf_counter()
+    model = FootballModel(seed=seed, verbose=False, **model_kwargs(config))
+    while model.running:
+        model.step()
+
+    xg = {'Home': 0.0, 'Away': 0.0}
+    for event in model.event_logger.events:
+        xg[event['team']] = xg.get(event['team'], 0.0) + event['xg_change']
+
+    difference = model.home_score - model.away_score
+    row = {'config_id': cid, 'replicate': replicate, 'seed': seed}
+    row.update(config)
+    row.update({
+        'home_score': model.home_score,
+        'away_score': model.away_score,
+        'goal_difference': difference,
+        'result': 'home_win' if difference > 0 else 'away_win' if difference < 0 else 'draw',
+        'home_xg': round(xg['Home'], 4),
+        'away_xg': round(xg['Away'], 4),
+        'total_events': model.event_logger.get_event_count(),
+        'possessions': model.possession_counter,
+        'sim_seconds': round(time.perf_counter() - start, 4),
+    })
+    return row
+
+
+def _completed_jobs(path: str, header: List[str]) -> set:
+    """(config_id, replicate) pairs already stored, dropping a torn final line"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            # Interrupted mid-write: cut back to the last complete row
+            f.truncate(data.rfind(b'\n') + 1)
+
+    done = set()
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        existing = next(reader, None)
+        if existing is None:
+            return done
+        if existing != header:
+            raise ValueError(f"{path} holds a different sweep (columns {existing})")
+        for row in reader:
+            if len(row) == len(header):
+                done.add((row[0], int(row[1])))
+    return done
+
+
+def run_sweep(design: List[Dict[str, Any]], replicates: int = 10,
+              results_path: Optional[str] = None, workers: Optional[int] = None,
+              first_seed: int = 0, max_pending: Optional[int] = None,
+              verbose: bool = True) -> pd.DataFrame:
+    """
+    Run every (configuration × replicate) job and collect one row per match
+
+    Replicate r of every configuration uses seed first_seed + r, so
+    configurations are compared on common random numbers. With results_path
+    each row is appended to a CSV as soon as its job completes; running the
+    same sweep again skips jobs already in the file, so an interrupted sweep
+    resumes where it stopped.
+
+    Args:
+        design: List of flat configurations (see model_kwargs for the keys)
+        replicates: Matches per configuration
+        results_path: CSV file the tidy results are stored in
+        workers: Worker processes (defaults to the CPU count; 1 runs inline)
+        first_seed: Seed of replicate 0
+        max_pending: Jobs submitted ahead of completion (defaults to 4 per worker)
+        verbose: Print progress as jobs complete
+
+    Returns:
+        DataFrame with one row per (config_id, replicate)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or 4 * workers
+    parameters = sorted({name for config in design for name in config})
+    header = ['config_id', 'replicate', 'seed'] + parameters + RESULT_COLUMNS
+
+    done = set()
+    if results_path is not None and os.path.exists(results_path):
+        done = _completed_jobs(results_path, header)
+
+    jobs = [
+        (config, cid, replicate, first_seed + replicate)
+        for config, cid in ((config, config_id(config)) for config in design)
+        for replicate in range(replicates)
+        if (cid, replicate) not in done
+    ]
+    if verbose:
+        print(f"Sweep: {len(design)} configs x {replicates} replicates, "
+              f"{len(done)} done, {len(jobs)} to run")
+
+    rows = []
+    out = None
+    if results_path is not None:
+        new_file = not os.path.exists(results_path) or os.path.getsize(results_path) == 0
+        out = open(results_path, 'a', newline='')
+        writer = csv.DictWriter(out, fieldnames=header, restval='')
+        if new_file:
+            writer.writeheader()
+            out.flush()
+
+    start = time.perf_counter()
+    try:
+        for count, row in enumerate(_iter_results(jobs, workers, max_pending), start=1):
+            if out is not None:
+                writer.writerow(row)
+                out.flush()
+            else:
+                rows.append(row)
+            if verbose and count % 50 == 0:
+                print(f"  {count}/{len(jobs)} jobs complete")
+    finally:
+        if out is not None:
+            out.close()
+
+    if verbose:
+        print(f"Ran {len(jobs)} jobs in {time.perf_counter() - start:.1f}s")
+
+    if results_path is not None:
+        return pd.read_csv(results_path)
+    return pd.DataFrame(rows, columns=header)
+
+
+def _iter_results(jobs: List[Tuple], workers: int, max_pending: int) -> Iterator[Dict[str, Any]]:
+    """Yield job rows in completion order with at most max_pending jobs in flight"""
+    if workers <= 1:
+        for job in jobs:
+            yield _run_job(job)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for job in jobs:
+            pending.add(pool.submit(_run_job, job))
+            if len(pending) >= max_pending:
+                finished = next(as_completed(pending))
+                pending.remove(finished)
+                yield finished.result()
+        for finished in as_completed(pending):
+            yield finished.result()
+
+
+def summarize_sweep(results: pd.DataFrame) -> pd.DataFrame:
+    """Mean goals, xG and outcome rates per configuration"""
+    parameters = [col for col in results.columns
+                  if col not in RESULT_COLUMNS and col not in ('config_id', 'replicate', 'seed')]
+    grouped = results.assign(
+        home_win=results['result'] == 'home_win',
+        draw=results['result'] == 'draw',
+        away_win=results['result'] == 'away_win',
+    ).groupby(['config_id'] + parameters, dropna=False)
+    return grouped.agg(
+        matches=('replicate', 'size'),
+        home_goals=('home_score', 'mean'),
+        away_goals=('away_score', 'mean'),
+        home_xg=('home_xg', 'mean'),
+        away_xg=('away_xg', 'mean'),
+        home_win=('home_win', 'mean'),
+        draw=('draw', 'mean'),
+        away_win=('away_win', 'mean'),
+    ).reset_index()
+
+
+if __name__ == "__main__":
+    design = grid_design({
+        'home.formation': ['4-4-2', '4-3-3', '3-5-2'],
+        'home.attribute_mean': [45, 55],
+        'match_duration': [20],
+    })
+    results = run_sweep(design, replicates=4, results_path='sweep_results.csv')
+    print("\nPer-configuration summary:")
+    print(summarize_sweep(results).round(3).to_string(index=False))
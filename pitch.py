@@ -0,0 +1,182 @@
+"""
+Pitch Grid
+Zone layout of the pitch with spatial lookup tables precomputed in NumPy
+"""
+
+import string
+from functools import lru_cache
+from typing import Dict, List, Any, Iterable, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# The original layout: rows A (Home goal) to D (Away goal), columns 1-5 left to right
+BASE_ROWS, BASE_COLS = 4, 5
+DEFAULT_GRID = (BASE_ROWS, BASE_COLS)
+
+ROW_LABELS = string.ascii_uppercase
+
+# Shot xG from each zone of the 4x5 layout when attacking towards row D
+BASE_XG = np.array([
+    [0.01, 0.01, 0.02, 0.01, 0.01],  # A
+    [0.03, 0.05, 0.07, 0.05, 0.03],  # B
+    [0.08, 0.12, 0.18, 0.12, 0.08],  # C
+    [0.15, 0.25, 0.35, 0.25, 0.15],  # D
+])
+
+# Zones within this Manhattan distance (in 4x5 zone widths) are nearby
+NEARBY_RADIUS = 2.0
+
+# Pitch size in metres for continuous positions: x runs along the length
+# from the Home goal line (row A) to the Away goal line, y across the width
+PITCH_LENGTH = 105.0
+PITCH_WIDTH = 68.0
+
+
+class PitchGrid:
+    """
+    A rows x cols grid of zones labelled 'A1' upwards
+
+    Distances are measured in units of the original 4x5 zone, so the
+    nearby radius, the distance a dribble advances and the xG surface keep
+    their physical meaning at any resolution; the 4x5 grid reproduces the
+    original tables exactly. Everything is computed once per grid shape
+    (see pitch_grid()), and per-step lookups are plain list indexing, so a
+    player's decision costs the same on a 24x16 grid as on a 4x5 one.
+    """
+
+    def __init__(self, rows: int = BASE_ROWS, cols: int = BASE_COLS):
+        if not 1 <= rows <= len(ROW_LABELS) or cols < 1:
+            raise ValueError(f"Grid must have 1-{len(ROW_LABELS)} rows and at least 1 column, "
+                             f"got {rows}x{cols}")
+        self.rows = rows
+        self.cols = cols
+        self.shape = (rows, cols)
+        self.zones = [f"{ROW_LABELS[r]}{c + 1}" for r in range(rows) for c in range(cols)]
+        self.index = {zone: i for i, zone in enumerate(self.zones)}
+
+        row, col = np.divmod(np.arange(rows * cols), cols)
+        self.row_of = row
+        self.col_of = col
+
+        # Cell centres in 4x5-zone units
+        y = (row + 0.5) * BASE_ROWS / rows
+        x = (col + 0.5) * BASE_COLS / cols
+        self.centres = np.column_stack([y, x])
+        self.distance = np.abs(y[:, None] - y[None, :]) + np.abs(x[:, None] - x[None, :])
+        self.nearby = self.distance <= NEARBY_RADIUS + 1e-9
+
+        # A dribble advances one original zone length towards the opponent's goal
+        step = max(1, round(rows / BASE_ROWS))
+        self.advance = {
+            'Home': np.minimum(row + step, rows - 1) * cols + col,
+            'Away': np.maximum(row - step, 0) * cols + col,
+        }
+        self.attacking = {
+            'Home': row >= (rows + 1) // 2,
+            'Away': row < rows // 2,
+        }
+
+        # Bilinear interpolation of the 4x5 table at the cell centres; the
+        # Away team attacks row A, so its surface is flipped
+        base_y = np.arange(BASE_ROWS) + 0.5
+        base_x = np.arange(BASE_COLS) + 0.5
+        by_col = np.array([np.interp(x[:cols], base_x, values) for values in BASE_XG])
+        surface = np.array([np.interp(y[::cols], base_y, by_col[:, c]) for c in range(cols)]).T
+        self.xg_surface = {'Home': surface, 'Away': surface[::-1]}
+
+        # Python-level views for the per-step scalar lookups
+        self._nearby = self.nearby.tolist()
+        self._nearby_zones = [[self.zones[j] for j in np.flatnonzero(mask)] for mask in self.nearby]
+        self._advance = {team: [self.zones[j] for j in table] for team, table in self.advance.items()}
+        self._attacking = {team: mask.tolist() for team, mask in self.attacking.items()}
+        self._xg = {team: values.ravel().tolist() for team, values in self.xg_surface.items()}
+
+        self.centre = self.from_base('C3')
+
+    def __repr__(self) -> str:
+        return f"PitchGrid({self.rows}, {self.cols})"
+
+    def from_base(self, zone: str) -> str:
+        """Zone of this grid containing the centre of a 4x5 zone"""
+        row = int((ROW_LABELS.index(zone[0]) + 0.5) * self.rows / BASE_ROWS)
+        col = int((int(zone[1:]) - 0.5) * self.cols / BASE_COLS)
+        return self.zones[row * self.cols + col]
+
+    def zone_at(self, x: float, y: float) -> str:
+        """Zone containing a point in metres"""
+        row = min(self.rows - 1, max(0, int(x * self.rows / PITCH_LENGTH)))
+        col = min(self.cols - 1, max(0, int(y * self.cols / PITCH_WIDTH)))
+        return self.zones[row * self.cols + col]
+
+    def zone_centre(self, zone: str) -> Tuple[float, float]:
+        """Centre of a zone in metres"""
+        i = self.index[zone]
+        return (float(self.row_of[i] + 0.5) * PITCH_LENGTH / self.rows,
+                float(self.col_of[i] + 0.5) * PITCH_WIDTH / self.cols)
+
+    @property
+    def zone_size(self) -> Tuple[float, float]:
+        """Length and width of one zone in metres"""
+        return PITCH_LENGTH / self.rows, PITCH_WIDTH / self.cols
+
+    def is_nearby(self, zone: str, other: str) -> bool:
+        other_index = self.index.get(other)
+        return other_index is not None and self._nearby[self.index[zone]][other_index]
+
+    def nearby_mask(self, zone: str) -> List[bool]:
+        """Row of the nearby matrix for a zone, indexed by zone index"""
+        return self._nearby[self.index[zone]]
+
+    def nearby_zones(self, zone: str) -> List[str]:
+        return self._nearby_zones[self.index[zone]]
+
+    def advanced_zone(self, zone: str, team: str) -> str:
+        return self._advance[team][self.index[zone]]
+
+    def is_attacking(self, zone: str, team: str) -> bool:
+        return self._attacking[team][self.index[zone]]
+
+    def xg(self, zone: str, team: str) -> float:
+        return self._xg[team][self.index[zone]]
+
+    def heatmap(self, zones: Iterable[str]) -> pd.DataFrame:
+        """Count zone labels into a rows x cols frame; unknown labels are ignored"""
+        codes = [self.index[zone] for zone in zones if zone in self.index]
+        counts = np.bincount(np.array(codes, dtype=np.int64), minlength=self.rows * self.cols)
+        return pd.DataFrame(counts.reshape(self.shape), index=list(ROW_LABELS[:self.rows]),
+                            columns=range(1, self.cols + 1))
+
+
+@lru_cache(maxsize=None)
+def pitch_grid(rows: int = BASE_ROWS, cols: int = BASE_COLS) -> PitchGrid:
+    """Shared PitchGrid for a shape, built on first use"""
+    return PitchGrid(rows, cols)
+
+
+if __name__ == "__main__":
+    import time
+    from football_simulation import FootballModel
+
+    print("Grid build and 90-minute match cost by resolution:")
+    for shape in [(4, 5), (12, 8), (24, 16), (26, 40)]:
+        start = time.perf_counter()
+        pitch = PitchGrid(*shape)
+        build = time.perf_counter() - start
+
+        steps = 0
+        start = time.perf_counter()
+        for seed in range(3):
+            model = FootballModel(match_duration=90, seed=seed, verbose=False, grid=shape)
+            while model.running:
+                model.step()
+                steps += 1
+        per_step = (time.perf_counter() - start) / steps
+        print(f"  {shape[0]:2d}x{shape[1]:<2d} ({len(pitch.zones):4d} zones): tables built in "
+              f"{build * 1000:6.1f} ms, {per_step * 1e6:6.1f} us/step")
+
+    pitch = pitch_grid(12, 8)
+    print("\nxG surface on a 12x8 grid (Home attacking the bottom row):")
+    print(pd.DataFrame(pitch.xg_surface['Home'], index=list(ROW_LABELS[:12]),
+                       columns=range(1, 9)).round(3))
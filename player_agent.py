@@ -7,7 +7,18 @@ import mesa
 import numpy as np
 from typing import Dict, List, Tuple, Optional
 from enum import Enum
-import random
+from team_config import TeamConfig
+from pitch import BASE_ROWS, BASE_COLS, PITCH_LENGTH, PITCH_WIDTH
+
+
+# Continuous-position mode, in metres
+PRESSURE_RADIUS = 12.0  # Opponents this close put the ball carrier under pressure
+MAX_PASS_DISTANCE = 40.0  # Longest pass considered
+LANE_WIDTH = 2.5  # An opponent this close to the ball's path blocks the lane
+
+# Attributes that define a persistent player (see apply_roster)
+ROSTER_FIELDS = ('speed', 'passing', 'shooting', 'defending', 'dribbling', 'positioning',
+                 'pressure_tolerance', 'risk_taking')
 
 
 class Position(Enum):
@@ -23,16 +34,19 @@ class PlayerAgent(mesa.Agent):
     A football player agent with position-specific behaviors
     """
     
-    def __init__(self, model, team: str, position: Position, jersey_number: int):
+    def __init__(self, model, team: str, position: Position, jersey_number: int,
+                 config: Optional[TeamConfig] = None):
         super().__init__(model)
         
         # Basic attributes
         self.team = team
         self.position = position
         self.jersey_number = jersey_number
+        config = config or TeamConfig()
+        self._config = config
         
         # Physical attributes (0-100 scale)
-        self.speed = self._generate_attribute()
+        self.speed = self._generate_attribute(config.attribute_base('speed', position.value))
         self.passing = self._generate_attribute_by_position('passing')
         self.shooting = self._generate_attribute_by_position('shooting')
         self.defending = self._generate_attribute_by_position('defending')
@@ -45,60 +59,57 @@ class PlayerAgent(mesa.Agent):
         self.last_action = None
         self.zone = self._get_starting_zone()
         
-        # Tactical attributes
-        self.pressure_tolerance = random.uniform(0.3, 0.9)
-        self.risk_taking = random.uniform(0.2, 0.8)
+        # Coordinates in metres, only used when the model has continuous positions
+        self.x = self.y = None
+        if model.spaces is not None:
+            length, width = model.pitch.zone_size
+            centre_x, centre_y = model.pitch.zone_centre(self.zone)
+            self._set_position(centre_x + self.random.uniform(-length, length) / 2,
+                               centre_y + self.random.uniform(-width, width) / 2)
         
-    def _generate_attribute(self, base: int = 50) -> int:
+        # Tactical attributes
+        self.pressure_tolerance = self.random.uniform(*config.pressure_tolerance_range)
+        self.risk_taking = self.random.uniform(*config.risk_taking_range)
+        
+    def apply_roster(self, attributes: Dict[str, float]):
+        """Replace the drawn attributes with those of a persistent player"""
+        for name in ROSTER_FIELDS:
+            if name in attributes:
+                setattr(self, name, attributes[name])
+    
+    def _generate_attribute(self, base: float = 50) -> int:
         """Generate a random attribute with normal distribution"""
-        return max(10, min(99, int(np.random.normal(base, 15))))
+        return max(10, min(99, int(self.model.rng.normal(base, self._config.attribute_spread))))
     
     def _generate_attribute_by_position(self, attribute: str) -> int:
         """Generate attribute based on position"""
-        position_bonuses = {
-            Position.GOALKEEPER: {
-                'passing': -10, 'shooting': -20, 'defending': 20, 
-                'dribbling': -10, 'positioning': 15
-            },
-            Position.DEFENDER: {
-                'passing': 5, 'shooting': -15, 'defending': 25, 
-                'dribbling': -5, 'positioning': 10
-            },
-            Position.MIDFIELDER: {
-                'passing': 20, 'shooting': 0, 'defending': 5, 
-                'dribbling': 10, 'positioning': 5
-            },
-            Position.FORWARD: {
-                'passing': 0, 'shooting': 25, 'defending': -15, 
-                'dribbling': 15, 'positioning': 10
-            }
-        }
-        
-        base = 50
-        bonus = position_bonuses.get(self.position, {}).get(attribute, 0)
-        return self._generate_attribute(base + bonus)
+        return self._generate_attribute(self._config.attribute_base(attribute, self.position.value))
     
     def _get_starting_zone(self) -> str:
         """Get starting zone based on position and team"""
+        return self.model.pitch.from_base(self._get_base_starting_zone())
+    
+    def _get_base_starting_zone(self) -> str:
+        """Starting zone on the 4x5 layout, mapped onto the model's grid by the caller"""
         # Zones are A1-D5 (A=defense, D=attack, 1-5=left to right)
         if self.team == "Home":
             if self.position == Position.GOALKEEPER:
                 return "A3"
             elif self.position == Position.DEFENDER:
-                return random.choice(["A1", "A2", "A4", "A5", "B2", "B4"])
+                return self.random.choice(["A1", "A2", "A4", "A5", "B2", "B4"])
             elif self.position == Position.MIDFIELDER:
-                return random.choice(["B1", "B3", "B5", "C1", "C3", "C5"])
+                return self.random.choice(["B1", "B3", "B5", "C1", "C3", "C5"])
             else:  # Forward
-                return random.choice(["C2", "C4", "D1", "D3", "D5"])
+                return self.random.choice(["C2", "C4", "D1", "D3", "D5"])
         else:  # Away team (flipped)
             if self.position == Position.GOALKEEPER:
                 return "D3"
             elif self.position == Position.DEFENDER:
-                return random.choice(["D1", "D2", "D4", "D5", "C2", "C4"])
+                return self.random.choice(["D1", "D2", "D4", "D5", "C2", "C4"])
             elif self.position == Position.MIDFIELDER:
-                return random.choice(["C1", "C3", "C5", "B1", "B3", "B5"])
+                return self.random.choice(["C1", "C3", "C5", "B1", "B3", "B5"])
             else:  # Forward
-                return random.choice(["B2", "B4", "A1", "A3", "A5"])
+                return self.random.choice(["B2", "B4", "A1", "A3", "A5"])
     
     def step(self):
         """Execute one step of the agent's behavior"""
@@ -106,7 +117,7 @@ class PlayerAgent(mesa.Agent):
             return
         
         # Decrease stamina slightly
-        self.stamina = max(0, self.stamina - 0.1)
+        self.stamina = max(0, self.stamina - self._config.stamina_decay)
         
         # If this player has the ball, make a decision
         if self.has_ball:
@@ -135,9 +146,9 @@ class PlayerAgent(mesa.Agent):
         actions = ['Move', 'SupportRequest', 'Pressure']
         
         # Simple probability-based selection
-        if random.random() < 0.1:  # 10% chance of support request
+        if self.random.random() < 0.1:  # 10% chance of support request
             self._log_event('SupportRequest', 'Success', 0.0)
-        elif random.random() < 0.3:  # 30% chance of movement
+        elif self.random.random() < 0.3:  # 30% chance of movement
             self._move_to_better_position()
     
     def _get_available_actions(self) -> List[str]:
@@ -174,9 +185,9 @@ class PlayerAgent(mesa.Agent):
         """Choose action based on weights"""
         total = sum(weights.values())
         if total == 0:
-            return random.choice(list(weights.keys()))
+            return self.random.choice(list(weights.keys()))
         
-        r = random.uniform(0, total)
+        r = self.random.uniform(0, total)
         upto = 0
         for action, weight in weights.items():
             if upto + weight >= r:
@@ -188,9 +199,10 @@ class PlayerAgent(mesa.Agent):
     def _execute_action(self, action: str, pressure: float):
         """Execute the chosen action"""
         success_rate = self._calculate_success_rate(action, pressure)
-        outcome = 'Success' if random.random() < success_rate else 'Failure'
+        outcome = 'Success' if self.random.random() < success_rate else 'Failure'
         
         xg_change = 0.0
+        self._receiver = None  # Set by _execute_pass
         
         if action == 'Pass':
             xg_change = self._execute_pass(outcome)
@@ -201,7 +213,8 @@ class PlayerAgent(mesa.Agent):
         elif action == 'Clearance':
             xg_change = self._execute_clearance(outcome)
         
-        self._log_event(action, outcome, xg_change, pressure)
+        receiver_id = self._receiver.jersey_number if self._receiver is not None else 0
+        self._log_event(action, outcome, xg_change, pressure, receiver_id)
     
     def _execute_pass(self, outcome: str) -> float:
         """Execute a pass action"""
@@ -211,9 +224,22 @@ class PlayerAgent(mesa.Agent):
             if teammate:
                 self.has_ball = False
                 teammate.has_ball = True
-                teammate.zone = self._get_nearby_zone(self.zone)
+                if self.model.spaces is None:
+                    teammate.zone = self._get_nearby_zone(self.zone)
+                self._receiver = teammate
+                if self.model.pass_network is not None:
+                    self.model.pass_network.record_pass(self.team, self.jersey_number, teammate.jersey_number,
+                                                        True, self.zone, teammate.zone)
                 return 0.02  # Small positive xG change for successful pass
         else:
+            # The intended receiver comes from the NumPy generator, which
+            # nothing else draws from during play, so recording it leaves
+            # the match itself unchanged
+            self._receiver = self._find_pass_target(choose=self._numpy_choice)
+            if self._receiver is not None and self.model.pass_network is not None:
+                self.model.pass_network.record_pass(self.team, self.jersey_number,
+                                                    self._receiver.jersey_number, False)
+            
             # Pass intercepted - lose possession
             self._lose_possession()
             return -0.05  # Negative xG change for losing possession
@@ -224,7 +250,14 @@ class PlayerAgent(mesa.Agent):
         """Execute a dribble action"""
         if outcome == 'Success':
             # Move forward with ball
-            self.zone = self._get_advanced_zone(self.zone)
+            start_zone = self.zone
+            if self.model.spaces is not None:
+                # One original zone length, as on the grid
+                self._set_position(self.x + (1 if self.team == "Home" else -1) * PITCH_LENGTH / BASE_ROWS, self.y)
+            else:
+                self.zone = self._get_advanced_zone(self.zone)
+            if self.model.pass_network is not None:
+                self.model.pass_network.record_move(self.team, start_zone, self.zone)
             return 0.03  # Positive xG change for successful dribble
         else:
             # Lose possession
@@ -273,37 +306,35 @@ class PlayerAgent(mesa.Agent):
     
     def _calculate_pressure(self) -> float:
         """Calculate pressure from opposing players"""
+        if self.model.spaces is not None:
+            opponents = self.model.spaces["Away" if self.team == "Home" else "Home"]
+            return min(1.0, len(opponents.query_radius(self.x, self.y, PRESSURE_RADIUS)) * 0.3)
+        
         # Simple pressure calculation based on nearby opponents
-        opponents_nearby = len([agent for agent in self.model.agents 
-                               if isinstance(agent, PlayerAgent) 
-                               and agent.team != self.team 
-                               and self._is_nearby(agent.zone)])
+        pitch = self.model.pitch
+        nearby = pitch.nearby_mask(self.zone)
+        index = pitch.index
+        opponents_nearby = sum(1 for agent in self.model.agents
+                               if isinstance(agent, PlayerAgent)
+                               and agent.team != self.team
+                               and nearby[index[agent.zone]])
         
         return min(1.0, opponents_nearby * 0.3)
     
     def _calculate_xg(self) -> float:
         """Calculate expected goals value for current position"""
-        zone_xg_values = {
-            'D1': 0.15, 'D2': 0.25, 'D3': 0.35, 'D4': 0.25, 'D5': 0.15,
-            'C1': 0.08, 'C2': 0.12, 'C3': 0.18, 'C4': 0.12, 'C5': 0.08,
-            'B1': 0.03, 'B2': 0.05, 'B3': 0.07, 'B4': 0.05, 'B5': 0.03,
-            'A1': 0.01, 'A2': 0.01, 'A3': 0.02, 'A4': 0.01, 'A5': 0.01
-        }
-        
-        # Adjust for away team (flip zones)
-        if self.team == "Away":
-            flipped_zones = {
-                'D': 'A', 'C': 'B', 'B': 'C', 'A': 'D'
-            }
-            original_row = self.zone[0]
-            if original_row in flipped_zones:
-                flipped_zone = flipped_zones[original_row] + self.zone[1]
-                return zone_xg_values.get(flipped_zone, 0.05)
-        
-        return zone_xg_values.get(self.zone, 0.05)
+        # The pitch's xG surface is already flipped for the Away team
+        return self.model.pitch.xg(self.zone, self.team)
     
-    def _find_pass_target(self) -> Optional['PlayerAgent']:
-        """Find a teammate to pass to"""
+    def _numpy_choice(self, options: List):
+        return options[int(self.model.rng.integers(len(options)))]
+    
+    def _find_pass_target(self, choose=None) -> Optional['PlayerAgent']:
+        """Find a teammate to pass to, picking among candidates with choose (default self.random.choice)"""
+        choose = choose or self.random.choice
+        if self.model.spaces is not None:
+            return self._find_open_teammate(choose)
+        
         teammates = [agent for agent in self.model.agents 
                     if isinstance(agent, PlayerAgent) 
                     and agent.team == self.team 
@@ -312,10 +343,33 @@ class PlayerAgent(mesa.Agent):
         
         if teammates:
             # Prefer teammates in advanced positions
-            return random.choice(teammates)
+            return choose(teammates)
         
         return None
     
+    def _find_open_teammate(self, choose) -> Optional['PlayerAgent']:
+        """Pick a teammate in range with an unblocked passing lane, else the nearest one"""
+        players = self.model.players_by_id
+        teammates = self.model.spaces[self.team]
+        opponents = self.model.spaces["Away" if self.team == "Home" else "Home"]
+        available = lambda key: key != self.unique_id and not players[key].has_ball
+        
+        candidates = teammates.query_radius(self.x, self.y, MAX_PASS_DISTANCE, where=available)
+        open_lanes = [key for key in candidates
+                      if not opponents.query_segment(self.x, self.y, *teammates.positions[key], LANE_WIDTH)]
+        if open_lanes:
+            return players[choose(open_lanes)]
+        
+        nearest = teammates.nearest(self.x, self.y, where=available)
+        return players[nearest] if nearest is not None else None
+    
+    def _set_position(self, x: float, y: float):
+        """Move to a point (kept on the pitch), updating the spatial index and zone"""
+        self.x = min(PITCH_LENGTH, max(0.0, x))
+        self.y = min(PITCH_WIDTH, max(0.0, y))
+        self.zone = self.model.pitch.zone_at(self.x, self.y)
+        self.model.spaces[self.team].insert(self.unique_id, self.x, self.y)
+    
     def _lose_possession(self):
         """Lose possession of the ball"""
         self.has_ball = False
@@ -323,60 +377,20 @@ class PlayerAgent(mesa.Agent):
     
     def _is_in_attacking_zone(self) -> bool:
         """Check if player is in attacking zone"""
-        if self.team == "Home":
-            return self.zone.startswith('C') or self.zone.startswith('D')
-        else:
-            return self.zone.startswith('A') or self.zone.startswith('B')
+        return self.model.pitch.is_attacking(self.zone, self.team)
     
     def _is_nearby(self, other_zone: str) -> bool:
         """Check if another zone is nearby"""
-        # Simple distance calculation
-        if not other_zone or len(other_zone) < 2:
-            return False
-        
-        try:
-            row1, col1 = ord(self.zone[0]) - ord('A'), int(self.zone[1])
-            row2, col2 = ord(other_zone[0]) - ord('A'), int(other_zone[1])
-            distance = abs(row1 - row2) + abs(col1 - col2)
-            return distance <= 2
-        except (ValueError, IndexError):
-            return False
+        return self.model.pitch.is_nearby(self.zone, other_zone)
     
     def _get_nearby_zone(self, current_zone: str) -> str:
         """Get a nearby zone"""
-        zones = ['A1', 'A2', 'A3', 'A4', 'A5',
-                'B1', 'B2', 'B3', 'B4', 'B5',
-                'C1', 'C2', 'C3', 'C4', 'C5',
-                'D1', 'D2', 'D3', 'D4', 'D5']
-        
-        nearby = [zone for zone in zones if self._is_nearby(zone)]
-        return random.choice(nearby) if nearby else current_zone
+        nearby = self.model.pitch.nearby_zones(current_zone)
+        return self.random.choice(nearby) if nearby else current_zone
     
     def _get_advanced_zone(self, current_zone: str) -> str:
         """Get a more advanced zone (closer to opponent goal)"""
-        try:
-            row, col = current_zone[0], current_zone[1]
-            
-            if self.team == "Home":
-                # Advance toward D zones
-                if row == 'A':
-                    return 'B' + col
-                elif row == 'B':
-                    return 'C' + col
-                elif row == 'C':
-                    return 'D' + col
-            else:
-                # Advance toward A zones
-                if row == 'D':
-                    return 'C' + col
-                elif row == 'C':
-                    return 'B' + col
-                elif row == 'B':
-                    return 'A' + col
-            
-            return current_zone
-        except (IndexError, ValueError):
-            return current_zone
+        return self.model.pitch.advanced_zone(current_zone, self.team)
     
     def _get_shooting_modifier(self) -> float:
         """Get shooting modifier based on position and zone"""
@@ -397,14 +411,24 @@ class PlayerAgent(mesa.Agent):
     def _move_to_better_position(self):
         """Move to a better tactical position"""
         # Simple tactical movement
+        if self.model.spaces is not None:
+            # Up to one original zone in each direction, reflected off the
+            # touchlines so players spread over the pitch rather than pile up there
+            length, width = PITCH_LENGTH / BASE_ROWS, PITCH_WIDTH / BASE_COLS
+            x = abs(self.x + self.random.uniform(-length, length))
+            y = abs(self.y + self.random.uniform(-width, width))
+            self._set_position(PITCH_LENGTH - abs(PITCH_LENGTH - x), PITCH_WIDTH - abs(PITCH_WIDTH - y))
+            return
         new_zone = self._get_nearby_zone(self.zone)
         if new_zone != self.zone:
             self.zone = new_zone
     
-    def _log_event(self, action: str, outcome: str, xg_change: float, pressure: float = 0.0):
-        """Log an event to the model's event logger"""
-        if hasattr(self.model, 'event_logger'):
-            event = {
+    def _log_event(self, action: str, outcome: str, xg_change: float, pressure: float = 0.0,
+                   receiver_id: int = 0):
+        """Publish an event on the model's event bus"""
+        bus = self.model.event_bus
+        if bus.wants(action):
+            bus.publish({
                 'possession_id': f"M{self.model.match_id}-P{self.model.possession_counter:03d}",
                 'team': self.team,
                 'player_id': self.jersey_number,
@@ -413,9 +437,9 @@ class PlayerAgent(mesa.Agent):
                 'pressure': int(pressure > 0.5),  # Binary pressure indicator
                 'team_status': self.model.get_team_status(),
                 'outcome': outcome,
-                'xg_change': round(xg_change, 3)
-            }
-            self.model.event_logger.add(event)
+                'xg_change': round(xg_change, 3),
+                'receiver_id': receiver_id
+            })
     
     def receive_ball(self):
         """Receive the ball"""
@@ -423,5 +447,22 @@ class PlayerAgent(mesa.Agent):
         # Log ball recovery
         self._log_event('BallRecovery', 'Success', 0.01)
     
+    # Attributes captured by get_state(); identity (team, position, jersey) included
+    STATE_FIELDS = (
+        'team', 'jersey_number', 'speed', 'passing', 'shooting', 'defending',
+        'dribbling', 'positioning', 'has_ball', 'stamina', 'last_action', 'zone',
+        'pressure_tolerance', 'risk_taking', 'x', 'y'
+    )
+    
+    def get_state(self) -> Tuple:
+        """Return the player's mutable state as a plain tuple"""
+        return (self.position.value,) + tuple(getattr(self, field) for field in self.STATE_FIELDS)
+    
+    def set_state(self, state: Tuple):
+        """Restore state produced by get_state()"""
+        self.position = Position(state[0])
+        for field, value in zip(self.STATE_FIELDS, state[1:]):
+            setattr(self, field, value)
+    
     def __str__(self):
         return f"{self.team} #{self.jersey_number} ({self.position.value}) at {self.zone}"
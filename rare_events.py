@@ -0,0 +1,292 @@
+"""
+Rare-Event Estimation
+Multilevel importance splitting of match states for extreme scorelines
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor
+from statistics import NormalDist
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from football_simulation import FootballModel
+
+
+class RareEvent(ABC):
+    """
+    A match property to estimate, plus an importance function to split on
+
+    Subclasses keep whatever they need to track in a small picklable state
+    that travels with snapshots of the match. importance() should grow as a
+    match gets closer to the event; occurred() decides at full time. Both
+    are abstract, so an incomplete subclass fails when instantiated.
+    """
+
+    def start(self, model: FootballModel) -> Any:
+        return None
+
+    def update(self, model: FootballModel, state: Any) -> Any:
+        return state
+
+    @abstractmethod
+    def importance(self, model: FootballModel, state: Any) -> float:
+        """Progress towards the event; splitting levels are thresholds on it"""
+
+    @abstractmethod
+    def occurred(self, model: FootballModel, state: Any) -> bool:
+        """Whether the event happened, checked at full time"""
+
+
+class TeamGoals(RareEvent):
+    """A team scores at least `goals` goals"""
+
+    def __init__(self, team: str = 'Home', goals: int = 10):
+        self.team = team
+        self.goals = goals
+
+    def importance(self, model, state):
+        return model.home_score if self.team == 'Home' else model.away_score
+
+    def occurred(self, model, state):
+        return self.importance(model, state) >= self.goals
+
+    def __repr__(self):
+        return f"TeamGoals({self.team!r}, {self.goals})"
+
+
+class GoalMargin(RareEvent):
+    """A team wins by at least `margin` goals"""
+
+    def __init__(self, team: str = 'Home', margin: int = 5):
+        self.team = team
+        self.margin = margin
+
+    def importance(self, model, state):
+        lead = model.home_score - model.away_score
+        return lead if self.team == 'Home' else -lead
+
+    def occurred(self, model, state):
+        return self.importance(model, state) >= self.margin
+
+    def __repr__(self):
+        return f"GoalMargin({self.team!r}, {self.margin})"
+
+
+class GoallessStreak(RareEvent):
+    """Some spell of at least `minutes` minutes passes without a goal"""
+
+    def __init__(self, minutes: float = 30):
+        self.minutes = minutes
+
+    def start(self, model):
+        # (minute of the last goal, goals so far, longest streak so far)
+        return model.current_minute, model.home_score + model.away_score, 0.0
+
+    def update(self, model, state):
+        last_goal, goals, longest = state
+        total = model.home_score + model.away_score
+        if total != goals:
+            return model.current_minute, total, longest
+        return last_goal, goals, max(longest, model.current_minute - last_goal)
+
+    def importance(self, model, state):
+        return state[2]
+
+    def occurred(self, model, state):
+        return state[2] >= self.minutes
+
+    def __repr__(self):
+        return f"GoallessStreak({self.minutes})"
+
+
+def _run_trajectory(args) -> Tuple[bool, Optional[bytes], Any, float]:
+    """
+    Play one trajectory until it reaches the next level or the match ends
+
+    Runs in worker processes. Returns (success, snapshot at the level
+    crossing, event state, simulated minutes). With level None the
+    trajectory runs to full time and success means the event occurred.
+    """
+    config, event, snapshot, state, seed, level = args
+    if snapshot is None:
+        model = FootballModel(seed=seed, verbose=False, **config)
+        state = event.start(model)
+    else:
+        model = FootballModel.from_snapshot(snapshot)
+        model.reseed(seed)
+    start_minute = model.current_minute
+
+    while True:
+        if level is not None and event.importance(model, state) >= level:
+            return True, model.snapshot(), state, model.current_minute - start_minute
+        if not model.running:
+            break
+        model.step()
+        state = event.update(model, state)
+
+    return (level is None and event.occurred(model, state)), None, state, model.current_minute - start_minute
+
+
+class SplittingEstimate:
+    """Probability of a rare event with its variance and simulation cost"""
+
+    def __init__(self, event: RareEvent, levels: List[float], repetitions: List[Dict[str, Any]],
+                 match_duration: float, confidence: float, elapsed: float):
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.event = event
+        self.levels = levels
+        self.confidence = confidence
+        self.elapsed = elapsed
+        self.repetitions = len(repetitions)
+
+        estimates = np.array([rep['probability'] for rep in repetitions])
+        self.probability = float(estimates.mean())
+        self.stage_probabilities = np.mean([rep['stages'] for rep in repetitions], axis=0).tolist()
+        self.simulated_minutes = float(sum(rep['minutes'] for rep in repetitions))
+        trajectories = repetitions[0]['trajectories']
+
+        # Relative variance of one run, treating stages as independent binomials
+        stages = np.array(self.stage_probabilities)
+        if np.all(stages > 0):
+            self.relative_variance = float(np.sum((1 - stages) / (trajectories * stages)))
+        else:
+            self.relative_variance = float('inf')
+        if self.repetitions > 1:
+            # Independent repetitions give an assumption-free variance of the mean
+            self.variance = float(estimates.var(ddof=1) / self.repetitions)
+        else:
+            self.variance = self.relative_variance * self.probability ** 2
+        self.std_error = float(np.sqrt(self.variance))
+        self.interval = (max(0.0, self.probability - z * self.std_error), self.probability + z * self.std_error)
+
+        # Full matches plain Monte Carlo would need for the same standard error
+        if self.probability > 0 and self.variance > 0:
+            naive_matches = self.probability * (1 - self.probability) / self.variance
+            self.naive_minutes = float(naive_matches * match_duration)
+        else:
+            self.naive_minutes = float('inf')
+
+    @property
+    def speedup(self) -> float:
+        """Naive simulated minutes per splitting minute at equal precision"""
+        return self.naive_minutes / self.simulated_minutes if self.simulated_minutes else float('inf')
+
+    def __str__(self):
+        lo, hi = self.interval
+        lines = [f"P({self.event!r}) = {self.probability:.3e}  [{lo:.3e}, {hi:.3e}]",
+                 f"  std error {self.std_error:.2e}, relative variance {self.relative_variance:.3f}, "
+                 f"{self.repetitions} repetition(s) in {self.elapsed:.1f}s",
+                 f"  stage probabilities: " + ", ".join(f"{p:.3f}" for p in self.stage_probabilities),
+                 f"  simulated minutes {self.simulated_minutes:,.0f} vs ~{self.naive_minutes:,.0f} "
+                 f"for plain Monte Carlo ({self.speedup:.1f}x)"]
+        return "\n".join(lines)
+
+
+def _map(pool: Optional[Executor], jobs: List[Tuple], workers: int) -> List[Tuple]:
+    if pool is None:
+        return [_run_trajectory(job) for job in jobs]
+    return list(pool.map(_run_trajectory, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+
+
+def _split_once(event: RareEvent, levels: List[float], config: Dict[str, Any], trajectories: int,
+                rng: np.random.Generator, pool: Optional[Executor], workers: int) -> Dict[str, Any]:
+    """One fixed-effort splitting run: the same number of trajectories at every stage"""
+    entrances: List[Tuple[Optional[bytes], Any]] = [(None, None)]
+    stages, minutes = [], 0.0
+
+    for level in list(levels) + [None]:
+        seeds = rng.integers(0, 2**31 - 1, size=trajectories)
+        # Spread the effort evenly over the states that entered this stage
+        jobs = [(config, event, *entrances[i % len(entrances)], int(seed), level)
+                for i, seed in enumerate(seeds)]
+        results = _map(pool, jobs, workers)
+
+        minutes += sum(result[3] for result in results)
+        hits = [(snapshot, state) for success, snapshot, state, _ in results if success]
+        stages.append(len(hits) / trajectories)
+        if not hits:
+            stages.extend([0.0] * (len(levels) + 1 - len(stages)))
+            break
+        entrances = hits
+
+    return {'probability': float(np.prod(stages)), 'stages': stages,
+            'minutes': minutes, 'trajectories': trajectories}
+
+
+def estimate_rare_event(event: RareEvent, levels: List[float],
+                        config: Optional[Dict[str, Any]] = None, trajectories: int = 100,
+                        repetitions: int = 1, confidence: float = 0.95,
+                        workers: Optional[int] = None, seed: int = 0,
+                        verbose: bool = True) -> SplittingEstimate:
+    """
+    Estimate the probability of a rare event by multilevel splitting
+
+    Trajectories start from kickoff and run until the event's importance
+    reaches the first level; the match states that get there are snapshotted
+    and cloned (with fresh seeds) to continue towards the next level, and so
+    on. The last stage plays the clones to full time and checks the event.
+    The estimate is the product of the stage success fractions.
+
+    Args:
+        event: The rare event and its importance function
+        levels: Increasing importance thresholds to split at
+        config: FootballModel keyword arguments (e.g. match_duration)
+        trajectories: Trajectories per stage
+        repetitions: Independent splitting runs; with more than one the
+            variance is estimated empirically from their spread
+        confidence: Confidence level of the reported interval
+        workers: Worker processes (defaults to the CPU count; 1 runs inline)
+        seed: Seed of the trajectory seeds
+        verbose: Print each repetition's estimate
+    """
+    config = dict(config or {})
+    levels = list(levels)
+    if any(b <= a for a, b in zip(levels, levels[1:])):
+        raise ValueError("levels must be strictly increasing")
+    workers = workers or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+
+    start = time.perf_counter()
+    runs = []
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for r in range(repetitions):
+            run = _split_once(event, levels, config, trajectories, rng, pool, workers)
+            runs.append(run)
+            if verbose:
+                print(f"Repetition {r + 1}: p = {run['probability']:.3e} "
+                      f"(stages {', '.join(f'{p:.2f}' for p in run['stages'])})")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    duration = config.get('match_duration', 90)
+    return SplittingEstimate(event, levels, runs, duration, confidence, time.perf_counter() - start)
+
+
+def naive_estimate(event: RareEvent, matches: int, config: Optional[Dict[str, Any]] = None,
+                   workers: Optional[int] = None, first_seed: int = 0) -> Tuple[float, float]:
+    """Plain Monte Carlo over full matches: (probability, standard error)"""
+    config = dict(config or {})
+    workers = workers or os.cpu_count() or 1
+    jobs = [(config, event, None, None, first_seed + i, None) for i in range(matches)]
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        hits = sum(result[0] for result in _map(pool, jobs, workers))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    p = hits / matches
+    return p, float(np.sqrt(p * (1 - p) / matches))
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("RARE EVENT: HOME WIN BY 6+ IN A 30-MINUTE MATCH")
+    print("="*60)
+    estimate = estimate_rare_event(GoalMargin('Home', 6), levels=[2, 3, 4, 5],
+                                   config={'match_duration': 30}, trajectories=60, repetitions=3)
+    print(estimate)
@@ -0,0 +1,255 @@
+"""
+Simulation Result Cache
+Content-addressed on-disk cache of match statistics and event logs
+"""
+
+import ast
+import fcntl
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+import struct
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+from match_archive import encode_column, decode_column
+from utils_logger import EventLogger, EVENT_COLUMNS
+
+
+CACHE_SUFFIX = '.match'
+LOCK_FILE = 'cache.lock'
+MAGIC = b'FMC1'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# The simulation entry point; it and every repository module it imports
+# (directly or indirectly) determine simulation results
+SOURCE_ROOT = 'football_simulation'
+
+
+def _is_main_guard(node: ast.stmt) -> bool:
+    return isinstance(node, ast.If) and '__main__' in ast.unparse(node.test)
+
+
+def _imported_names(path: str) -> List[str]:
+    """Modules imported anywhere in a file except its __main__ block"""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = []
+    for statement in tree.body:
+        if _is_main_guard(statement):
+            continue
+        for node in ast.walk(statement):
+            if isinstance(node, ast.Import):
+                names.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names.append(node.module)
+    return names
+
+
+@functools.lru_cache(maxsize=None)
+def source_modules(root: str = SOURCE_ROOT) -> Tuple[str, ...]:
+    """
+    The root module and the repository modules it imports, transitively
+
+    Found by parsing the sources rather than from sys.modules, so the list
+    does not depend on what else the current process happened to import.
+    Third-party and standard-library modules are skipped.
+    """
+    directory = os.path.dirname(importlib.util.find_spec(root).origin)
+    found: Dict[str, str] = {}
+    pending = [root]
+    while pending:
+        name = pending.pop()
+        if name in found:
+            continue
+        spec = importlib.util.find_spec(name.partition('.')[0])
+        if spec is None or not spec.origin or os.path.dirname(spec.origin) != directory:
+            continue
+        found[spec.name] = spec.origin
+        pending.extend(_imported_names(spec.origin))
+    return tuple(sorted(found))
+
+
+@functools.lru_cache(maxsize=None)
+def code_version() -> str:
+    """Hash of the simulation source, so edits invalidate cached results"""
+    digest = hashlib.sha256()
+    for name in source_modules():
+        digest.update(name.encode('utf-8') + b'\0')
+        with open(importlib.util.find_spec(name).origin, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(config: Dict[str, Any]) -> str:
+    """Content address of a model configuration under the current code version"""
+    payload = json.dumps({'config': config, 'code': code_version()}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CachedMatch:
+    """
+    A finished match restored from the cache
+
+    Exposes the parts of FootballModel that callers read after a match:
+    scores, counters, the event logger, get_match_stats() and export_logs().
+    """
+
+    running = False
+
+    def __init__(self, stats: Dict[str, Any], columns: Dict[str, List[Any]]):
+        self.match_id = stats['match_id']
+        self.seed = stats.get('seed')
+        self.current_minute = stats['duration_minutes']
+        self.home_score = stats['home_score']
+        self.away_score = stats['away_score']
+        self.possession_counter = stats['possessions']
+        self.event_logger = EventLogger.from_columns(columns)
+        self._stats = stats
+
+    def get_match_stats(self) -> Dict:
+        stats = dict(self._stats)
+        stats['event_summary'] = self.event_logger.get_summary()
+        return stats
+
+    def export_logs(self, base_filename: str = None) -> Tuple[str, str]:
+        """Export event logs to CSV and XES files"""
+        if base_filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            base_filename = f"football_match_{self.match_id}_{timestamp}"
+
+        csv_path = f"{base_filename}.csv"
+        xes_path = f"{base_filename}.xes"
+
+        self.event_logger.dump_csv(csv_path)
+        self.event_logger.dump_xes(xes_path)
+
+        return csv_path, xes_path
+
+
+class ResultCache:
+    """
+    On-disk cache of finished matches keyed by configuration and code version
+
+    Each entry is one file named by its key, holding the match statistics and
+    the event log in compressed columnar form. Entries are written to a
+    temporary file and renamed into place, so concurrent readers never see a
+    partial entry. A hit refreshes the file's mtime; when the cache grows
+    beyond max_bytes the least recently used entries are evicted under a
+    directory lock. Several processes can share one cache directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, config: Dict[str, Any]) -> Optional[CachedMatch]:
+        """Return the cached match for a configuration, or None on a miss"""
+        path = self._path(cache_key(config))
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        stats, columns = self._decode(data)
+        self.hits += 1
+        return CachedMatch(stats, columns)
+
+    def put(self, config: Dict[str, Any], model) -> str:
+        """Store a finished match and evict old entries if over budget"""
+        key = cache_key(config)
+        stats = model.get_match_stats()
+        stats.pop('event_summary', None)
+        data = self._encode(stats, model.event_logger.to_columns())
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._evict()
+        return key
+
+    def size_bytes(self) -> int:
+        """Total size of all cache entries"""
+        return sum(size for _, _, size in self._entries())
+
+    def clear(self):
+        """Remove every cache entry"""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self) -> List[Tuple[str, float, int]]:
+        entries = []
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if not item.name.endswith(CACHE_SUFFIX):
+                    continue
+                try:
+                    info = item.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another process
+                entries.append((item.path, info.st_mtime, info.st_size))
+        return entries
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        with open(os.path.join(self.directory, LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                entries = sorted(self._entries(), key=lambda entry: entry[1])
+                total = sum(size for _, _, size in entries)
+                for path, _, size in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _encode(stats: Dict[str, Any], columns: Dict[str, List[Any]]) -> bytes:
+        names = [col for col in EVENT_COLUMNS if col in columns]
+        blobs = [encode_column(col, columns[col]) for col in names]
+        header = json.dumps({
+            'stats': stats,
+            'columns': [[col, len(blob)] for col, blob in zip(names, blobs)],
+        }).encode('utf-8')
+        return MAGIC + struct.pack('<I', len(header)) + header + b''.join(blobs)
+
+    @staticmethod
+    def _decode(data: bytes) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+        if data[:4] != MAGIC:
+            raise ValueError("Not a match cache entry")
+        (header_len,) = struct.unpack_from('<I', data, 4)
+        header = json.loads(data[8:8 + header_len].decode('utf-8'))
+
+        columns = {}
+        position = 8 + header_len
+        for col, length in header['columns']:
+            columns[col] = decode_column(col, data[position:position + length])
+            position += length
+        return header['stats'], columns
@@ -0,0 +1,212 @@
+"""
+Global Sensitivity Analysis
+Sobol indices of goal difference over player attributes and tactical settings
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+from monte_carlo import simulate_score
+from parameter_sweep import model_kwargs
+
+
+# Factor ranges; attributes are team means, tactical factors the centre of the
+# range each player's value is drawn from
+DEFAULT_FACTORS = {
+    'passing': (35.0, 65.0),
+    'dribbling': (35.0, 65.0),
+    'shooting': (35.0, 65.0),
+    'pressure_tolerance': (0.3, 0.7),
+    'risk_taking': (0.3, 0.7),
+    'stamina_decay': (0.0, 0.3),
+}
+
+# Half-width of the per-player draw around a tactical factor's value
+TACTICAL_HALF_WIDTH = 0.3
+
+
+def factor_config(values: Dict[str, float], team: str = 'home',
+                  base_config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Map factor values onto a flat sweep configuration for one team
+
+    Names containing a dot are passed through as sweep keys, so any setting
+    parameter_sweep.model_kwargs understands can be used as a factor.
+    """
+    config = dict(base_config or {})
+    for name, value in values.items():
+        value = float(value)
+        if '.' in name:
+            config[name] = value
+        elif name in ('passing', 'dribbling', 'shooting', 'speed', 'defending', 'positioning'):
+            config[f'{team}.attribute_means.{name}'] = value
+        elif name in ('pressure_tolerance', 'risk_taking'):
+            config[f'{team}.{name}_range'] = (value - TACTICAL_HALF_WIDTH, value + TACTICAL_HALF_WIDTH)
+        elif name == 'stamina_decay':
+            config[f'{team}.stamina_decay'] = value
+        else:
+            raise ValueError(f"Unknown factor {name!r}")
+    return config
+
+
+def sample_matrices(n: int, bounds: List[Tuple[float, float]], method: str = 'sobol',
+                    seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Two independent n x d sample matrices A and B for the Saltelli scheme
+
+    Both come from one 2d-dimensional quasi-random design (scrambled Sobol or
+    Latin hypercube), so together they fill the space evenly. Sobol designs
+    need n to be a power of two.
+    """
+    d = len(bounds)
+    if method == 'sobol':
+        if n & (n - 1):
+            raise ValueError(f"Sobol designs need a power-of-two sample size, got {n}")
+        unit = qmc.Sobol(d=2 * d, scramble=True, seed=seed).random(n)
+    elif method == 'lhs':
+        unit = qmc.LatinHypercube(d=2 * d, seed=seed).random(n)
+    else:
+        raise ValueError(f"Unknown design method {method!r}; use 'sobol' or 'lhs'")
+
+    lows = np.array([low for low, _ in bounds] * 2)
+    highs = np.array([high for _, high in bounds] * 2)
+    points = qmc.scale(unit, lows, highs)
+    return points[:, :d], points[:, d:]
+
+
+def sobol_indices(f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First-order (Saltelli 2010) and total-order (Jansen) indices
+
+    f_a and f_b have shape (..., n); f_ab has shape (d, ..., n) where row i
+    is the output at A with column i taken from B.
+    """
+    variance = np.concatenate([f_a, f_b], axis=-1).var(axis=-1, ddof=1)
+    variance = np.where(variance > 0, variance, np.nan)
+    first = (f_b * (f_ab - f_a)).mean(axis=-1) / variance
+    total = 0.5 * ((f_a - f_ab) ** 2).mean(axis=-1) / variance
+    return first, total
+
+
+class SensitivityResult:
+    """First- and total-order indices with bootstrap confidence intervals"""
+
+    def __init__(self, factors: List[str], f_a: np.ndarray, f_b: np.ndarray, f_ab: np.ndarray,
+                 n_bootstrap: int, confidence: float, seed: int, elapsed: float, evaluations: int):
+        self.factors = factors
+        self.confidence = confidence
+        self.elapsed = elapsed
+        self.evaluations = evaluations
+        self.outputs = (f_a, f_b, f_ab)
+
+        self.first_order, self.total_order = sobol_indices(f_a, f_b, f_ab)
+
+        # Resample design rows; every matrix keeps the same rows so CRN pairs stay intact
+        rng = np.random.default_rng(seed)
+        rows = rng.integers(0, len(f_a), size=(n_bootstrap, len(f_a)))
+        boot_first, boot_total = sobol_indices(f_a[rows], f_b[rows], f_ab[:, rows])
+        tail = (1 - confidence) / 2 * 100
+        self.first_order_ci = np.nanpercentile(boot_first, [tail, 100 - tail], axis=1).T
+        self.total_order_ci = np.nanpercentile(boot_total, [tail, 100 - tail], axis=1).T
+
+    def to_frame(self) -> pd.DataFrame:
+        """One row per factor, sorted by total-order index"""
+        return pd.DataFrame({
+            'S1': self.first_order,
+            'S1_low': self.first_order_ci[:, 0],
+            'S1_high': self.first_order_ci[:, 1],
+            'ST': self.total_order,
+            'ST_low': self.total_order_ci[:, 0],
+            'ST_high': self.total_order_ci[:, 1],
+        }, index=pd.Index(self.factors, name='factor')).sort_values('ST', ascending=False)
+
+    def __str__(self):
+        lines = [f"{self.evaluations} matches in {self.elapsed:.1f}s "
+                 f"({self.confidence:.0%} bootstrap intervals)",
+                 f"  {'factor':20} {'S1':>22} {'ST':>22}"]
+        for factor, row in self.to_frame().iterrows():
+            lines.append(f"  {factor:20} {row.S1:6.3f} [{row.S1_low:6.3f}, {row.S1_high:6.3f}] "
+                         f"{row.ST:6.3f} [{row.ST_low:6.3f}, {row.ST_high:6.3f}]")
+        return "\n".join(lines)
+
+
+def sensitivity_analysis(factors: Optional[Dict[str, Tuple[float, float]]] = None, n: int = 64,
+                         method: str = 'sobol', replicates: int = 1, team: str = 'home',
+                         base_config: Optional[Dict[str, Any]] = None,
+                         workers: Optional[int] = None, seed: int = 0, first_seed: int = 0,
+                         n_bootstrap: int = 1000, confidence: float = 0.95,
+                         verbose: bool = True) -> SensitivityResult:
+    """
+    Sobol sensitivity of goal difference (home minus away) to team factors
+
+    Runs the Saltelli scheme: matrices A and B plus one matrix per factor
+    with that column swapped from B, n(d + 2) design points in all. Every
+    design row is played on the same seeds in all matrices (common random
+    numbers), so the differences the indices are built from reflect the
+    factors rather than match-to-match luck; a factor that never changes a
+    decision gets an index of exactly zero.
+
+    Args:
+        factors: Factor name -> (low, high); defaults to DEFAULT_FACTORS
+        n: Design rows (a power of two for Sobol designs)
+        method: 'sobol' or 'lhs'
+        replicates: Matches averaged per design point
+        team: Team whose factors vary ('home' or 'away')
+        base_config: Fixed sweep settings, e.g. {'match_duration': 30}
+        workers: Worker processes (defaults to the CPU count; 1 runs inline)
+        seed: Seed of the design and the bootstrap
+        first_seed: Match seed of design row 0
+        n_bootstrap: Bootstrap resamples for the confidence intervals
+        confidence: Confidence level of the intervals
+        verbose: Print progress
+    """
+    factors = dict(factors or DEFAULT_FACTORS)
+    names = list(factors)
+    d = len(names)
+    workers = workers or os.cpu_count() or 1
+
+    a, b = sample_matrices(n, list(factors.values()), method, seed)
+    matrices = [a, b]
+    for i in range(d):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        matrices.append(ab)
+
+    jobs = []
+    for matrix in matrices:
+        for row, values in enumerate(matrix):
+            kwargs = model_kwargs(factor_config(dict(zip(names, values)), team, base_config))
+            for r in range(replicates):
+                jobs.append((kwargs, first_seed + row * replicates + r))
+
+    if verbose:
+        print(f"Sensitivity analysis: {d} factors, {n} rows ({method}), "
+              f"{len(jobs)} matches on {workers} worker(s)")
+
+    start = time.perf_counter()
+    if workers <= 1:
+        scores = [simulate_score(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scores = list(pool.map(simulate_score, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    elapsed = time.perf_counter() - start
+
+    scores = np.asarray(scores, dtype=float).reshape(d + 2, n, replicates, 2)
+    outputs = (scores[..., 0] - scores[..., 1]).mean(axis=-1)
+
+    return SensitivityResult(names, outputs[0], outputs[1], outputs[2:], n_bootstrap,
+                             confidence, seed, elapsed, len(jobs))
+
+
+if __name__ == "__main__":
+    print("="*60)
+    print("SENSITIVITY OF GOAL DIFFERENCE (home factors, 30-minute matches)")
+    print("="*60)
+    result = sensitivity_analysis(n=32, base_config={'match_duration': 30})
+    print(result)
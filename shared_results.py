@@ -0,0 +1,336 @@
+"""
+Shared-Memory Results
+Multi-process match ensembles that write results straight into shared arrays
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from football_simulation import FootballModel
+from pitch import DEFAULT_GRID, pitch_grid
+
+
+TEAMS = ['Home', 'Away']
+ACTIONS = ['PossessionStart', 'PossessionEnd', 'BallRecovery', 'SupportRequest', 'Pass',
+           'Dribble', 'Shot', 'Goal', 'Clearance', 'Foul', 'Tackle', 'Interception', 'Other']
+OUTCOMES = ['Success', 'Failure']
+PLAYER_SLOTS = 12  # Jersey numbers 1-11, plus 0 for match-level events
+
+ACTION_CODES = {action: i for i, action in enumerate(ACTIONS)}
+
+# Columns of the optional per-match event chunks; zone codes are sized per grid
+EVENT_DTYPES = {
+    'team': np.uint8,
+    'player_id': np.uint8,
+    'action': np.uint8,
+    'zone': None,
+    'pressure': np.uint8,
+    'outcome': np.uint8,
+    'xg_change': np.float32,
+}
+
+
+def zone_labels(grid: Tuple[int, int] = DEFAULT_GRID) -> List[str]:
+    """Zones of a pitch grid, plus 'Unknown' for events without a valid zone"""
+    return pitch_grid(*grid).zones + ['Unknown']
+
+
+def _zone_dtype(zones: int):
+    return np.uint8 if zones <= 1 << 8 else np.uint16 if zones <= 1 << 16 else np.uint32
+
+
+def _layout(matches: int, event_capacity: int,
+            zones: int) -> List[Tuple[str, Any, Tuple[int, ...]]]:
+    """(name, dtype, shape) of every array in the shared block"""
+    arrays = [
+        ('grid', np.int32, (2,)),
+        ('seeds', np.int64, (matches,)),
+        ('done', np.uint8, (matches,)),
+        ('scores', np.int32, (matches, 2)),
+        ('possessions', np.int32, (matches,)),
+        ('event_counts', np.int32, (matches,)),
+        ('zone_counts', np.int32, (matches, zones)),
+        ('team_shots', np.int32, (matches, 2)),
+        ('player_actions', np.int32, (matches, 2, PLAYER_SLOTS)),
+        ('player_successes', np.int32, (matches, 2, PLAYER_SLOTS)),
+        ('player_xg', np.float64, (matches, 2, PLAYER_SLOTS)),
+    ]
+    if event_capacity:
+        arrays += [(f'event_{col}', dtype or _zone_dtype(zones), (matches, event_capacity))
+                   for col, dtype in EVENT_DTYPES.items()]
+    return arrays
+
+
+class SharedResults:
+    """
+    Preallocated result arrays in one multiprocessing.shared_memory block
+
+    Every match owns one slot (row) of each array, so workers write without
+    locks and the parent reads the same memory with no pickling. Arrays are
+    NumPy views into the block; copy anything needed after close(). Zones
+    are coded against the pitch grid the matches are played on, which is
+    also stored in the block.
+    """
+
+    def __init__(self, matches: int, event_capacity: int = 0, name: Optional[str] = None,
+                 grid: Tuple[int, int] = DEFAULT_GRID):
+        self.matches = matches
+        self.event_capacity = event_capacity
+        self.grid = tuple(grid)
+        self.zones = zone_labels(self.grid)
+        self.zone_codes = {zone: i for i, zone in enumerate(self.zones)}
+        layout = _layout(matches, event_capacity, len(self.zones))
+
+        offsets, size = [], 0
+        for _, dtype, shape in layout:
+            size = -(-size // 8) * 8  # 8-byte alignment
+            offsets.append(size)
+            size += int(np.prod(shape)) * np.dtype(dtype).itemsize
+
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        self.arrays: Dict[str, np.ndarray] = {}
+        for (array_name, dtype, shape), offset in zip(layout, offsets):
+            self.arrays[array_name] = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+        if self.owner:
+            for array in self.arrays.values():
+                array.fill(0)
+            self.arrays['grid'][:] = self.grid
+        elif tuple(self.arrays['grid']) != self.grid:
+            raise ValueError(f"Block {name} holds a {tuple(self.arrays['grid'])} grid, not {self.grid}")
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def spec(self) -> Tuple[str, int, int, Tuple[int, int]]:
+        """What a worker needs to attach to this block"""
+        return self.shm.name, self.matches, self.event_capacity, self.grid
+
+    def __getattr__(self, item):
+        arrays = self.__dict__.get('arrays', {})
+        if item in arrays:
+            return arrays[item]
+        raise AttributeError(item)
+
+    def close(self):
+        """Release the views and the block; the creator also unlinks it"""
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write_match(self, slot: int, model) -> None:
+        """Fill one slot from a finished match"""
+        if tuple(model.grid) != self.grid:
+            raise ValueError(f"Match played on a {model.grid} grid; results are coded for {self.grid}")
+        self.seeds[slot] = model.seed if model.seed is not None else -1
+        self.scores[slot] = (model.home_score, model.away_score)
+        self.possessions[slot] = model.possession_counter
+
+        events = model.event_logger.events
+        count = len(events)
+        team_codes = {team: i for i, team in enumerate(TEAMS)}
+        team = np.fromiter((team_codes.get(e['team'], 0) for e in events), np.int64, count)
+        player = np.fromiter((e['player_id'] for e in events), np.int64, count)
+        player[(player < 0) | (player >= PLAYER_SLOTS)] = 0
+        unknown = self.zone_codes['Unknown']
+        zone = np.fromiter((self.zone_codes.get(e['zone'], unknown) for e in events), np.int64, count)
+        action = np.fromiter((ACTION_CODES.get(e['action'], ACTION_CODES['Other']) for e in events), np.int64, count)
+        success = np.fromiter((e['outcome'] == 'Success' for e in events), np.int64, count)
+        xg = np.fromiter((e['xg_change'] for e in events), np.float64, count)
+
+        # Scatter into the slot with one bincount per array
+        cells = 2 * PLAYER_SLOTS
+        flat = team * PLAYER_SLOTS + player
+        self.zone_counts[slot] = np.bincount(zone, minlength=len(self.zones))
+        self.team_shots[slot] = np.bincount(team[action == ACTION_CODES['Shot']], minlength=2)
+        self.player_actions[slot] = np.bincount(flat, minlength=cells).reshape(2, PLAYER_SLOTS)
+        self.player_successes[slot] = np.bincount(flat, success, minlength=cells).reshape(2, PLAYER_SLOTS)
+        self.player_xg[slot] = np.bincount(flat, xg, minlength=cells).reshape(2, PLAYER_SLOTS)
+
+        if self.event_capacity:
+            n = min(count, self.event_capacity)
+            self.event_team[slot, :n] = team[:n]
+            self.event_player_id[slot, :n] = player[:n]
+            self.event_action[slot, :n] = action[:n]
+            self.event_zone[slot, :n] = zone[:n]
+            self.event_pressure[slot, :n] = [e['pressure'] for e in events[:n]]
+            self.event_outcome[slot, :n] = 1 - success[:n]
+            self.event_xg_change[slot, :n] = xg[:n]
+
+        self.event_counts[slot] = count
+        self.done[slot] = 1  # Written last: the slot is complete
+
+    def completed(self) -> np.ndarray:
+        """Slots whose matches have finished"""
+        return np.flatnonzero(self.done)
+
+    def events(self, slot: int) -> Dict[str, List[Any]]:
+        """Decoded event columns of one match (events beyond the capacity are dropped)"""
+        if not self.event_capacity:
+            raise ValueError("Event chunks were not enabled for these results")
+        n = min(int(self.event_counts[slot]), self.event_capacity)
+        return {
+            'team': [TEAMS[i] for i in self.event_team[slot, :n]],
+            'player_id': self.event_player_id[slot, :n].tolist(),
+            'action': [ACTIONS[i] for i in self.event_action[slot, :n]],
+            'zone': [self.zones[i] for i in self.event_zone[slot, :n]],
+            'pressure': self.event_pressure[slot, :n].tolist(),
+            'outcome': [OUTCOMES[i] for i in self.event_outcome[slot, :n]],
+            'xg_change': self.event_xg_change[slot, :n].astype(float).round(3).tolist(),
+        }
+
+    def scoreboard(self) -> pd.DataFrame:
+        """One row per finished match"""
+        slots = self.completed()
+        return pd.DataFrame({
+            'seed': self.seeds[slots],
+            'home_score': self.scores[slots, 0],
+            'away_score': self.scores[slots, 1],
+            'possessions': self.possessions[slots],
+            'total_events': self.event_counts[slots],
+        }, index=slots)
+
+    def to_aggregate(self):
+        """Totals over finished matches as a corpus_aggregation.PartialAggregate"""
+        from corpus_aggregation import PartialAggregate
+
+        slots = self.completed()
+        partial = PartialAggregate()
+        partial.files = len(slots)
+        partial.events = int(self.event_counts[slots].sum())
+
+        zone_totals = self.zone_counts[slots].sum(axis=0)
+        partial.zone_counts.update({self.zones[i]: int(c) for i, c in enumerate(zone_totals) if c})
+
+        actions = self.player_actions[slots].sum(axis=0)
+        successes = self.player_successes[slots].sum(axis=0)
+        xg = self.player_xg[slots].sum(axis=0)
+        for t, p in zip(*np.nonzero(actions)):
+            key = (TEAMS[t], int(p))
+            partial.player_actions[key] = int(actions[t, p])
+            partial.player_successes[key] = int(successes[t, p])
+            partial.player_xg[key] = float(xg[t, p])
+
+        scores = self.scores[slots].sum(axis=0)
+        shots = self.team_shots[slots].sum(axis=0)
+        for t, team in enumerate(TEAMS):
+            partial.team_xg[team] = float(xg[t].sum())
+            partial.team_shots[team] = int(shots[t])
+            partial.team_goals[team] = int(scores[t])
+        return partial
+
+
+# Block attached once per worker process by the pool initializer
+_worker_results: Optional[SharedResults] = None
+
+
+def _attach(spec: Tuple[str, int, int, Tuple[int, int]]):
+    global _worker_results
+    name, matches, event_capacity, grid = spec
+    _worker_results = SharedResults(matches, event_capacity, name=name, grid=grid)
+
+
+def _simulate_into(job: Tuple[int, int, Dict[str, Any]]) -> int:
+    """Play one match and write it into its slot (runs in worker processes)"""
+    slot, seed, config = job
+    model = FootballModel(seed=seed, verbose=False, **config)
+    while model.running:
+        model.step()
+    _worker_results.write_match(slot, model)
+    return slot
+
+
+def run_ensemble(seeds: List[int], config: Optional[Dict[str, Any]] = None,
+                 workers: Optional[int] = None, event_capacity: int = 0) -> SharedResults:
+    """
+    Play one match per seed in a process pool, collecting into shared memory
+
+    Workers return only their slot number; scores, zone counts, player
+    stats and (with event_capacity > 0) up to that many encoded events per
+    match land directly in the shared block. Use the result as a context
+    manager, or close() it, to free the block.
+
+    Args:
+        seeds: One seed per match
+        config: FootballModel keyword arguments (e.g. match_duration)
+        workers: Worker processes (defaults to the CPU count)
+        event_capacity: Events kept per match; 0 keeps aggregates only
+    """
+    config = dict(config or {})
+    workers = workers or os.cpu_count() or 1
+    results = SharedResults(len(seeds), event_capacity, grid=config.get('grid', DEFAULT_GRID))
+    jobs = [(slot, seed, config) for slot, seed in enumerate(seeds)]
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(results.spec,)) as pool:
+            for _ in pool.map(_simulate_into, jobs, chunksize=max(1, len(jobs) // (4 * workers))):
+                pass
+    except BaseException:
+        results.close()
+        raise
+    return results
+
+
+def _simulate_pickled(job: Tuple[int, int, Dict[str, Any]]) -> Tuple[Tuple[int, int], Dict[str, List[Any]]]:
+    """Baseline worker that ships the whole event log back to the parent"""
+    _, seed, config = job
+    model = FootballModel(seed=seed, verbose=False, **config)
+    while model.running:
+        model.step()
+    return (model.home_score, model.away_score), model.event_logger.to_columns()
+
+
+if __name__ == "__main__":
+    seeds = list(range(200))
+    config = {'match_duration': 5}
+    workers = max(2, os.cpu_count() or 1)
+
+    # Baseline: ship every event log to the parent and aggregate there
+    from corpus_aggregation import PartialAggregate
+
+    start = time.perf_counter()
+    baseline = PartialAggregate()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pickled = list(pool.map(_simulate_pickled, [(0, s, config) for s in seeds], chunksize=8))
+    for _, columns in pickled:
+        baseline.update(pd.DataFrame(columns))
+    pickled_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with run_ensemble(seeds, config, workers=workers, event_capacity=1000) as results:
+        shared_time = time.perf_counter() - start
+        board = results.scoreboard()
+        aggregate = results.to_aggregate()
+        same = all((h, a) == tuple(results.scores[i]) for i, ((h, a), _) in enumerate(pickled))
+        same = same and aggregate.zone_counts == baseline.zone_counts \
+            and aggregate.player_actions == baseline.player_actions
+
+        print(f"{len(seeds)} five-minute matches on {workers} workers")
+        print(f"  pickled event logs: {pickled_time:.2f}s (aggregated in the parent)")
+        print(f"  shared memory:      {shared_time:.2f}s")
+        print(f"  identical results:  {same}")
+        print(f"\nMean score {board.home_score.mean():.2f} - {board.away_score.mean():.2f}, "
+              f"{aggregate.events} events")
+        print("\nZone Activity Heatmap:")
+        print(aggregate.heatmap())
+        print("\nTeam totals:")
+        print(aggregate.team_stats())
@@ -0,0 +1,99 @@
+"""
+Team Configuration
+Formations, attribute distributions and tactical ranges for a simulated side
+"""
+
+import copy
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Tuple
+
+
+# Outfield lines (defenders, midfielders, forwards) of each supported formation
+FORMATIONS = {
+    '4-4-2': (4, 4, 2),
+    '4-3-3': (4, 3, 3),
+    '4-5-1': (4, 5, 1),
+    '3-5-2': (3, 5, 2),
+    '3-4-3': (3, 4, 3),
+    '5-3-2': (5, 3, 2),
+    '5-4-1': (5, 4, 1),
+}
+
+# Attribute bonuses on top of the team mean, keyed by Position value
+DEFAULT_POSITION_BONUSES = {
+    'GK': {
+        'passing': -10, 'shooting': -20, 'defending': 20,
+        'dribbling': -10, 'positioning': 15
+    },
+    'DEF': {
+        'passing': 5, 'shooting': -15, 'defending': 25,
+        'dribbling': -5, 'positioning': 10
+    },
+    'MID': {
+        'passing': 20, 'shooting': 0, 'defending': 5,
+        'dribbling': 10, 'positioning': 5
+    },
+    'FWD': {
+        'passing': 0, 'shooting': 25, 'defending': -15,
+        'dribbling': 15, 'positioning': 10
+    }
+}
+
+ATTRIBUTES = ['speed', 'passing', 'shooting', 'defending', 'dribbling', 'positioning']
+
+
+@dataclass
+class TeamConfig:
+    """
+    How a team's players are generated
+
+    Each attribute is drawn from N(mean + position bonus, spread) and clipped
+    to 10-99. attribute_means overrides the team mean for single attributes;
+    the tactical ranges bound the uniform draws of pressure_tolerance and
+    risk_taking. stamina_decay is the stamina each player loses per step.
+    """
+    formation: str = '4-4-2'
+    attribute_mean: float = 50
+    attribute_spread: float = 15
+    attribute_means: Dict[str, float] = field(default_factory=dict)
+    position_bonuses: Dict[str, Dict[str, float]] = field(
+        default_factory=lambda: copy.deepcopy(DEFAULT_POSITION_BONUSES)
+    )
+    pressure_tolerance_range: Tuple[float, float] = (0.3, 0.9)
+    risk_taking_range: Tuple[float, float] = (0.2, 0.8)
+    stamina_decay: float = 0.1
+
+    def __post_init__(self):
+        if self.formation not in FORMATIONS:
+            raise ValueError(f"Unknown formation {self.formation!r}; choose from {sorted(FORMATIONS)}")
+
+    def lineup(self) -> List[Tuple[str, int]]:
+        """(position value, jersey number) for all eleven players"""
+        defenders, midfielders, forwards = FORMATIONS[self.formation]
+        positions = ['GK'] + ['DEF'] * defenders + ['MID'] * midfielders + ['FWD'] * forwards
+        return [(position, number) for number, position in enumerate(positions, start=1)]
+
+    def attribute_base(self, attribute: str, position: str) -> float:
+        """Mean of the distribution an attribute is drawn from"""
+        mean = self.attribute_means.get(attribute, self.attribute_mean)
+        return mean + self.position_bonuses.get(position, {}).get(attribute, 0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain, JSON-friendly representation"""
+        data = asdict(self)
+        data['pressure_tolerance_range'] = list(self.pressure_tolerance_range)
+        data['risk_taking_range'] = list(self.risk_taking_range)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TeamConfig':
+        data = dict(data)
+        for key in ('pressure_tolerance_range', 'risk_taking_range'):
+            if key in data:
+                data[key] = tuple(data[key])
+        return cls(**data)
+
+
+# The sides FootballModel plays when no configuration is given
+DEFAULT_HOME_CONFIG = TeamConfig(formation='4-4-2')
+DEFAULT_AWAY_CONFIG = TeamConfig(formation='4-3-3')
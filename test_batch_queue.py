@@ -0,0 +1,95 @@
+"""
+Batch Queue Tests
+Lease races between claim, requeue_expired, heartbeat and complete
+"""
+
+import os
+
+from batch_queue import BatchQueue, run_worker
+
+
+def _backdate(queue: BatchQueue, state: str, seconds: float = 1000):
+    """Make every shard in a state look untouched for `seconds`"""
+    then = queue.now() - seconds
+    for name in queue._names(state):
+        os.utime(queue._path(state, name), (then, then))
+
+
+def test_requeue_during_claim_keeps_the_lease(tmp_path):
+    queue = BatchQueue.create(str(tmp_path), matches=2, shard_size=1, duration=1)
+    _backdate(queue, 'pending')
+
+    # Run a requeue inside claim, between the rename and the heartbeat
+    clock, requeued = queue.now, []
+
+    def racing_now():
+        queue.now = clock
+        requeued.append(queue.requeue_expired(lease_seconds=60))
+        return clock()
+    queue.now = racing_now
+
+    spec = queue.claim('first')
+    assert spec is not None and spec['worker'] == 'first'
+    assert requeued == [0]
+    assert queue._names('leased') == [os.path.basename(queue._lease(spec['name'], 'first'))]
+    assert spec['name'] not in queue._names('pending')
+
+
+def test_claim_of_vanished_shard_is_lost_race(tmp_path):
+    queue = BatchQueue.create(str(tmp_path), matches=2, shard_size=1, duration=1)
+    clock = queue.now
+
+    def requeue_first():
+        # Simulate a requeue that slipped in right after the rename
+        for lease in queue._names('leased'):
+            os.rename(queue._path('leased', lease), queue._path('pending', lease.partition('@')[0]))
+        queue.now = clock
+        return clock()
+    queue.now = requeue_first
+
+    spec = queue.claim('first')
+    # The first shard went back to pending and must not be leased twice
+    leased = {lease.partition('@')[0] for lease in queue._names('leased')}
+    pending = set(queue._names('pending'))
+    assert spec is None or leased == {spec['name']}
+    assert not leased & pending
+    assert len(leased | pending) == 2
+
+
+def test_heartbeat_after_reclaim_reports_lost_lease(tmp_path):
+    queue = BatchQueue.create(str(tmp_path), matches=1, shard_size=1, duration=1)
+    first = queue.claim('first')
+    assert queue.heartbeat(first)
+
+    _backdate(queue, 'leased')
+    assert queue.requeue_expired(lease_seconds=60) == 1
+    second = queue.claim('second')
+    assert second['name'] == first['name']
+
+    assert not queue.heartbeat(first)
+    assert queue.heartbeat(second)
+
+
+def test_late_complete_leaves_reclaimed_shard_alone(tmp_path):
+    queue = BatchQueue.create(str(tmp_path), matches=1, shard_size=1, duration=1)
+    first = queue.claim('first')
+    _backdate(queue, 'leased')
+    queue.requeue_expired(lease_seconds=60)
+    second = queue.claim('second')
+
+    queue.record(second, {'seed': 0, 'home_score': 1})
+    assert not queue.complete(first, started=0.0)
+    assert queue._names('done') == []
+    assert queue._names('leased') == [os.path.basename(queue._lease(second['name'], 'second'))]
+    stem = queue._path('results', second['name'][:-len('.json')])
+    assert os.path.exists(stem + '.partial') and not os.path.exists(stem + '.jsonl')
+
+    assert queue.complete(second, started=0.0)
+    assert queue._names('done') == [second['name']]
+
+
+def test_workers_finish_the_job(tmp_path):
+    queue = BatchQueue.create(str(tmp_path), matches=3, shard_size=2, duration=1)
+    assert run_worker(str(tmp_path), worker='only', poll_interval=0, verbose=False) == 2
+    assert queue.status()['complete']
+    assert sorted(row['seed'] for row in queue.iter_results()) == [0, 1, 2]
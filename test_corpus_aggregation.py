@@ -0,0 +1,28 @@
+"""
+Corpus Aggregation Tests
+Reading logs written before receiver_id was added to the schema
+"""
+
+import os
+
+from corpus_aggregation import CSV_DTYPES, read_csv_chunks
+from utils_logger import EVENT_DEFAULTS
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'example_output.csv')
+
+
+def test_read_example_output_with_default_columns():
+    chunks = list(read_csv_chunks(EXAMPLE))
+    assert chunks
+    for chunk in chunks:
+        assert list(chunk.columns) == list(CSV_DTYPES)
+        assert (chunk['receiver_id'] == EVENT_DEFAULTS['receiver_id']).all()
+        assert str(chunk['receiver_id'].dtype) == CSV_DTYPES['receiver_id']
+
+
+def test_read_current_schema_keeps_receiver_id(tmp_path):
+    path = tmp_path / 'match.csv'
+    path.write_text(open(EXAMPLE).read().splitlines()[0] + ',receiver_id\n'
+                    + open(EXAMPLE).read().splitlines()[1] + ',7\n')
+    chunk = next(read_csv_chunks(str(path)))
+    assert chunk['receiver_id'].tolist() == [7]
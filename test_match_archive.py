@@ -0,0 +1,34 @@
+"""
+Match Archive Tests
+Recovery of the index after an interrupted append
+"""
+
+import os
+
+from match_archive import INDEX_FILE, MatchArchive
+
+
+def _columns(match_id: int, events: int = 3):
+    return {
+        'possession_id': [f"M{match_id}-P001"] * events,
+        'action': ['Pass'] * events,
+        'player_id': list(range(1, events + 1)),
+    }
+
+
+def test_append_after_torn_index_line(tmp_path):
+    archive = MatchArchive(str(tmp_path))
+    archive.append(_columns(1), {'match_id': 1})
+
+    # An append killed halfway through writing its index line
+    with open(os.path.join(tmp_path, INDEX_FILE), 'ab') as f:
+        f.write(b'{"entry": 1, "match_id": 2, "ro')
+
+    writer = MatchArchive(str(tmp_path))
+    assert len(writer) == 1
+    writer.append(_columns(3), {'match_id': 3})
+
+    reader = MatchArchive(str(tmp_path))
+    assert [entry['match_id'] for entry in reader.entries] == [1, 3]
+    assert reader.read_match(3)['player_id'] == [1, 2, 3]
+    assert reader._index_position == os.path.getsize(os.path.join(tmp_path, INDEX_FILE))
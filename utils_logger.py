@@ -3,13 +3,32 @@ Event Logger for Football Simulation
 Handles logging events to both CSV and XES formats for process mining
 """
 
-import pandas as pd
-import pm4py
+from collections import Counter
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import json
 import os
 
+# pandas and pm4py are imported inside the export methods: they are slow to
+# load and only needed when a DataFrame or XES file is actually requested,
+# so simulation workers that just return scores never pay for them.
+
+
+# Column order shared by the CSV export and the columnar views of a log
+EVENT_COLUMNS = [
+    'possession_id', 'timestamp', 'team', 'player_id',
+    'action', 'zone', 'pressure', 'team_status', 'outcome', 'xg_change', 'receiver_id'
+]
+
+# Values used for fields an event does not provide
+EVENT_DEFAULTS = {
+    'pressure': 0,
+    'team_status': 'Tied',
+    'outcome': 'Success',
+    'xg_change': 0.0,
+    'receiver_id': 0  # Jersey number of a pass's (intended) receiver, 0 for other events
+}
+
 
 class EventLogger:
     """Event logger for football simulation events"""
@@ -19,48 +38,34 @@ class EventLogger:
     
     def add(self, event_dict: Dict[str, Any]):
         """Add an event to the buffer"""
-        # Ensure all required fields are present
-        required_fields = [
-            'possession_id', 'timestamp', 'team', 'player_id', 
-            'action', 'zone', 'pressure', 'team_status', 'outcome', 'xg_change'
-        ]
-        
         # Add timestamp if not present
         if 'timestamp' not in event_dict:
             event_dict['timestamp'] = datetime.now().isoformat() + 'Z'
         
         # Add default values for missing fields
-        for field in required_fields:
+        for field in EVENT_COLUMNS:
             if field not in event_dict:
-                if field == 'pressure':
-                    event_dict[field] = 0
-                elif field == 'team_status':
-                    event_dict[field] = 'Tied'
-                elif field == 'outcome':
-                    event_dict[field] = 'Success'
-                elif field == 'xg_change':
-                    event_dict[field] = 0.0
-                else:
-                    event_dict[field] = 'Unknown'
+                event_dict[field] = self.default_value(field)
         
         self.events.append(event_dict.copy())
     
+    @staticmethod
+    def default_value(field: str) -> Any:
+        """Value used for a field an event does not provide"""
+        return EVENT_DEFAULTS.get(field, 'Unknown')
+    
     def dump_csv(self, path: str):
         """Export events to CSV format"""
         if not self.events:
             print("No events to export")
             return
         
-        df = pd.DataFrame(self.events)
+        import pandas as pd
         
-        # Ensure proper column order
-        columns = [
-            'possession_id', 'timestamp', 'team', 'player_id', 
-            'action', 'zone', 'pressure', 'team_status', 'outcome', 'xg_change'
-        ]
+        df = pd.DataFrame(self.events)
         
         # Reorder columns if they exist
-        existing_columns = [col for col in columns if col in df.columns]
+        existing_columns = [col for col in EVENT_COLUMNS if col in df.columns]
         df = df[existing_columns]
         
         os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
@@ -74,6 +79,9 @@ class EventLogger:
             return
         
         try:
+            import pandas as pd
+            import pm4py
+            
             df = pd.DataFrame(self.events)
             
             # PM4Py expects specific column names
@@ -148,6 +156,7 @@ class EventLogger:
                 xes_content += f'      <int key="pressure" value="{event["pressure"]}"/>\n'
                 xes_content += f'      <string key="outcome" value="{event["outcome"]}"/>\n'
                 xes_content += f'      <float key="xg_change" value="{event["xg_change"]}"/>\n'
+                xes_content += f'      <int key="receiver_id" value="{event.get("receiver_id", 0)}"/>\n'
                 xes_content += f'    </event>\n'
             
             xes_content += f'  </trace>\n'
@@ -159,6 +168,20 @@ class EventLogger:
             f.write(xes_content)
         print(f"Events exported to XES (manual): {path}")
     
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]]) -> 'EventLogger':
+        """Build a logger holding the events of a columnar log"""
+        logger = cls()
+        names = list(columns)
+        if names:
+            logger.events = [dict(zip(names, row)) for row in zip(*(columns[col] for col in names))]
+        return logger
+    
+    def to_columns(self, columns: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Return the buffered events as one list per column"""
+        columns = columns or EVENT_COLUMNS
+        return {col: [event.get(col) for event in self.events] for col in columns}
+    
     def clear(self):
         """Clear all events from the buffer"""
         self.events.clear()
@@ -172,11 +195,28 @@ class EventLogger:
         if not self.events:
             return "No events logged"
         
-        df = pd.DataFrame(self.events)
+        possessions = {event['possession_id'] for event in self.events if 'possession_id' in event}
+        actions = Counter(event['action'] for event in self.events if 'action' in event)
+        teams = Counter(event['team'] for event in self.events if 'team' in event)
+        
         summary = {
             'total_events': len(self.events),
-            'unique_possessions': df['possession_id'].nunique() if 'possession_id' in df.columns else 0,
-            'actions': df['action'].value_counts().to_dict() if 'action' in df.columns else {},
-            'teams': df['team'].value_counts().to_dict() if 'team' in df.columns else {}
+            'unique_possessions': len(possessions),
+            'actions': dict(actions.most_common()),
+            'teams': dict(teams.most_common())
         }
         return summary
+
+
+def columns_of(log, fields: List[str]) -> Dict[str, List[Any]]:
+    """
+    Columns of an event log as {field: list}
+
+    Accepts anything with to_columns() (EventLogger, DecisionTraceRecorder),
+    a DataFrame, or a columnar dict, which is returned as is.
+    """
+    if hasattr(log, 'to_columns'):
+        return log.to_columns(list(fields))
+    if hasattr(log, 'to_dict'):
+        return {field: log[field].tolist() for field in fields}
+    return log
@@ -0,0 +1,84 @@
+"""
+Setup Verification
+Measures the import cost of the simulation core so it does not regress
+"""
+
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+# Extra startup time and peak RSS the simulation core may add on top of a
+# bare `import mesa, numpy`. Loading pm4py alone costs well over a second.
+STARTUP_BUDGET_SECONDS = 0.3
+RSS_BUDGET_MB = 25.0
+
+# Modules that must only be loaded when an export is requested
+DEFERRED_MODULES = ['pm4py']
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+{body}
+print(json.dumps({{
+    'seconds': elapsed,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': sorted(m for m in {watch!r} if m in sys.modules),
+}}))
+"""
+
+
+def measure(imports: str, body: str = "", repeats: int = 3) -> Dict:
+    """Run an import probe in fresh interpreters and keep the fastest run"""
+    code = PROBE.format(imports=imports, body=body, watch=DEFERRED_MODULES + ['pandas'])
+    runs: List[Dict] = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', code], capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return min(runs, key=lambda run: run['seconds'])
+
+
+def verify_startup() -> bool:
+    """Compare the simulation core's import cost with bare Mesa and NumPy"""
+    print("="*60)
+    print("STARTUP CHECK")
+    print("="*60)
+
+    baseline = measure("import mesa, numpy")
+    core = measure("import football_simulation")
+    match = measure(
+        "import football_simulation",
+        "football_simulation.FootballModel(match_duration=1, seed=1).step()"
+    )
+
+    print(f"mesa + numpy:        {baseline['seconds']:.3f}s, {baseline['rss_mb']:.1f} MB")
+    print(f"football_simulation: {core['seconds']:.3f}s, {core['rss_mb']:.1f} MB")
+    print(f"  loaded: {', '.join(core['modules']) or 'none'}")
+
+    extra_seconds = core['seconds'] - baseline['seconds']
+    extra_rss = core['rss_mb'] - baseline['rss_mb']
+    print(f"Core overhead:       {extra_seconds:+.3f}s, {extra_rss:+.1f} MB")
+
+    passed = True
+    if extra_seconds > STARTUP_BUDGET_SECONDS:
+        print(f"✗ Startup overhead exceeds {STARTUP_BUDGET_SECONDS}s")
+        passed = False
+    if extra_rss > RSS_BUDGET_MB:
+        print(f"✗ RSS overhead exceeds {RSS_BUDGET_MB} MB")
+        passed = False
+    for module in DEFERRED_MODULES:
+        if module in core['modules'] or module in match['modules']:
+            print(f"✗ {module} is loaded without an export being requested")
+            passed = False
+
+    if passed:
+        print("✓ Simulation core starts within budget")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if verify_startup() else 1)